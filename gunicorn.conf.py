@@ -0,0 +1,24 @@
+"""
+GUNICORN.CONF.PY - V13
+======================
+
+Gunicorn hooks voor de warm-start (rental_system/warmup.py)
+Gunicorn leest dit bestand automatisch uit de werkdirectory.
+
+WARMUP_ENABLED=True     warm-up fases uitvoeren
+WARMUP_PRELOAD=True     app laden in de master (preload_app), workers
+                        erven gecompileerde templates en URL resolver
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import os
+
+preload_app = os.environ.get('WARMUP_PRELOAD', 'False').lower() in ['true', 'on', '1']
+
+
+def post_worker_init(worker):
+    from rental_system import warmup
+    if warmup.is_enabled():
+        warmup.post_fork()
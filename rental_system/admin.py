@@ -10,12 +10,34 @@ Version: V13
 """
 
 from django.contrib import admin
-from .models import Rental
+from .models import BlackoutRule, Rental, Resource, Task
+
+@admin.register(Resource)
+class ResourceAdmin(admin.ModelAdmin):
+    """Admin interface voor Resource model (vloot)"""
+    list_display = ['name', 'slug', 'is_active', 'sort_order']
+    list_filter = ['is_active']
+    search_fields = ['name', 'slug']
+    prepopulated_fields = {'slug': ('name',)}
 
 @admin.register(Rental)
 class RentalAdmin(admin.ModelAdmin):
     """Admin interface voor Rental model"""
-    list_display = ['customer_name', 'customer_email', 'start_date', 'end_date', 'status', 'created_at']
-    list_filter = ['status', 'start_date', 'created_at']
+    list_display = ['customer_name', 'customer_email', 'resource', 'start_date', 'end_date', 'status', 'formula', 'final_amount', 'created_at']
+    list_filter = ['status', 'resource', 'formula', 'start_date', 'created_at']
     search_fields = ['customer_name', 'customer_email']
-    ordering = ['-created_at']
\ No newline at end of file
+    ordering = ['-created_at']
+
+@admin.register(BlackoutRule)
+class BlackoutRuleAdmin(admin.ModelAdmin):
+    """Admin interface voor gesloten dagen (blackout kalender)"""
+    list_display = ['name', 'kind', 'action', 'resource', 'start_date', 'end_date', 'weekday', 'is_active']
+    list_filter = ['kind', 'action', 'resource', 'is_active']
+    search_fields = ['name']
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    """Admin interface voor achtergrondtaken (zie taskqueue.py)"""
+    list_display = ['name', 'status', 'run_at', 'attempts', 'max_attempts', 'locked_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'name']
+    readonly_fields = ['created_at', 'finished_at', 'locked_at', 'locked_by', 'last_error']
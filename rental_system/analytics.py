@@ -0,0 +1,207 @@
+"""
+ANALYTICS.PY - V13
+==================
+
+Bezetting en omzet per maand of kwartaal, volledig in de database
+Alle cijfers komen uit aggregaties (Trunc + Count/Sum, gefilterde
+aggregaten voor de lead-time buckets, RANK() window voor de formules);
+er worden geen individuele reservaties in Python geladen.
+
+Resultaten worden per periode gecached. Afgesloten periodes (volledig
+in het verleden) veranderen zelden en blijven ANALYTICS_CLOSED_CACHE_TIMEOUT
+bewaard; een nieuwe afrekening (settle_rentals) of een gewijzigde
+reservatie in het verleden (signals.py) maakt ze meteen ongeldig. Lopende
+en toekomstige periodes volgen de beschikbaarheid versie.
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, DecimalField, DurationField, ExpressionWrapper, F, Q, Sum, Value, Window
+from django.db.models.functions import Coalesce, Rank, TruncDate, TruncMonth, TruncQuarter
+
+from .cache_versions import ANALYTICS, AVAILABILITY, get_versions
+from .models import DailyOccupancy, Rental, Resource
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'analytics:v1'
+GRANULARITIES = {'month': (TruncMonth, 1), 'quarter': (TruncQuarter, 3)}
+LEAD_TIME_BUCKETS = [
+    ('0-6', None, 7),
+    ('7-29', 7, 30),
+    ('30-89', 30, 90),
+    ('90+', 90, None),
+]
+
+
+def period_start(day, granularity):
+    months = GRANULARITIES[granularity][1]
+    return day.replace(month=(day.month - 1) // months * months + 1, day=1)
+
+
+def next_period(start, granularity):
+    month = start.month - 1 + GRANULARITIES[granularity][1]
+    return start.replace(year=start.year + month // 12, month=month % 12 + 1, day=1)
+
+
+def period_label(start, granularity):
+    if granularity == 'quarter':
+        return f'{start.year}-Q{(start.month - 1) // 3 + 1}'
+    return start.strftime('%Y-%m')
+
+
+def parse_month(value, name):
+    """'YYYY-MM' of 'YYYY-MM-DD' -> date; ValueError bij ongeldige invoer"""
+    for fmt in ('%Y-%m', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f'{name} must be a month (YYYY-MM)')
+
+
+def parse_periods(granularity, start_value='', end_value=''):
+    """Lijst van periode startdata; standaard het lopende jaar tot en met nu"""
+    if granularity not in GRANULARITIES:
+        raise ValueError(f'granularity must be one of {", ".join(GRANULARITIES)}')
+    today = date.today()
+    start = period_start(parse_month(start_value, 'start') if start_value else today.replace(month=1, day=1), granularity)
+    end = period_start(parse_month(end_value, 'end') if end_value else today, granularity)
+    if end < start:
+        raise ValueError('end must be on or after start')
+
+    periods = [start]
+    while periods[-1] < end:
+        periods.append(next_period(periods[-1], granularity))
+    max_periods = getattr(settings, 'ANALYTICS_MAX_PERIODS', 60)
+    if len(periods) > max_periods:
+        raise ValueError(f'At most {max_periods} periods per request')
+    return periods
+
+
+def _lead_time():
+    """Dagen tussen boeking en start, als database expressie"""
+    return ExpressionWrapper(F('start_date') - TruncDate('created_at'), output_field=DurationField())
+
+
+def _lead_time_filter(low, high):
+    condition = Q()
+    if low is not None:
+        condition &= Q(lead_time__gte=timedelta(days=low))
+    if high is not None:
+        condition &= Q(lead_time__lt=timedelta(days=high))
+    return condition
+
+
+def _money(value):
+    return float(value or 0)
+
+
+def compute_periods(periods, granularity, resource=None):
+    """Cijfers voor aaneengesloten periodes, met vier aggregatie queries"""
+    trunc = GRANULARITIES[granularity][0]
+    first_day = periods[0]
+    last_day = next_period(periods[-1], granularity) - timedelta(days=1)
+
+    occupancy = DailyOccupancy.objects.filter(day__range=(first_day, last_day))
+    rentals = Rental.objects.active().filter(start_date__range=(first_day, last_day))
+    if resource is not None:
+        occupancy = occupancy.filter(resource=resource)
+        rentals = rentals.filter(resource=resource)
+    capacity = 1 if resource is not None else Resource.objects.active().count()
+
+    booked = {
+        row['period']: row
+        for row in occupancy.annotate(period=trunc('day')).values('period').annotate(
+            booked_days=Count('id'), day_revenue=Sum('price'),
+        )
+    }
+
+    revenue = Coalesce(Sum('final_amount'), Value(0), output_field=DecimalField(max_digits=12, decimal_places=2))
+    formula_rows = rentals.annotate(period=trunc('start_date')).values('period', 'formula').annotate(
+        rentals=Count('id'),
+        settled_rentals=Count('id', filter=Q(settled_at__isnull=False)),
+        revenue=revenue,
+    )
+    if connection.features.supports_over_clause:
+        formula_rows = formula_rows.annotate(rank=Window(
+            Rank(), partition_by=[F('period')], order_by=[revenue.desc(), Count('id').desc()],
+        ))
+    by_formula = {}
+    for row in formula_rows:
+        by_formula.setdefault(row['period'], {})[row['formula'] or 'onbekend'] = {
+            'rentals': row['rentals'],
+            'settled_rentals': row['settled_rentals'],
+            'revenue': _money(row['revenue']),
+            'rank': row.get('rank'),
+        }
+
+    lead_times = {
+        row.pop('period'): row
+        for row in rentals.annotate(period=trunc('start_date'), lead_time=_lead_time()).values('period').annotate(**{
+            label: Count('id', filter=_lead_time_filter(low, high)) for label, low, high in LEAD_TIME_BUCKETS
+        })
+    }
+
+    results = {}
+    for start in periods:
+        end = next_period(start, granularity) - timedelta(days=1)
+        days = (end - start).days + 1
+        booked_row = booked.get(start, {})
+        booked_days = booked_row.get('booked_days', 0)
+        formulas = by_formula.get(start, {})
+        results[start] = {
+            'period': period_label(start, granularity),
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'days': days,
+            'capacity_days': capacity * days,
+            'booked_days': booked_days,
+            'occupancy_rate': round(booked_days / (capacity * days), 4) if capacity else 0.0,
+            'day_revenue': _money(booked_row.get('day_revenue')),
+            'rentals': sum(item['rentals'] for item in formulas.values()),
+            'revenue': round(sum((item['revenue'] for item in formulas.values()), 0.0), 2),
+            'revenue_by_formula': formulas,
+            'lead_time_days': lead_times.get(start, {label: 0 for label, _, _ in LEAD_TIME_BUCKETS}),
+        }
+    return results
+
+
+def _cache_key(start, granularity, resource, closed, versions):
+    version = f'a{versions[ANALYTICS]}' if closed else f'a{versions[ANALYTICS]}.v{versions[AVAILABILITY]}'
+    resource_key = resource.slug if resource is not None else 'all'
+    return f'{CACHE_PREFIX}:{granularity}:{start.isoformat()}:{resource_key}:{version}'
+
+
+def get_analytics(periods, granularity, resource=None):
+    """Cijfers per periode uit de cache; ontbrekende periodes in één keer berekend"""
+    today = date.today()
+    versions = get_versions(ANALYTICS, AVAILABILITY)
+    closed = {start: next_period(start, granularity) <= today for start in periods}
+    keys = {start: _cache_key(start, granularity, resource, closed[start], versions) for start in periods}
+    found = cache.get_many(keys.values())
+
+    missing = [start for start in periods if keys[start] not in found]
+    if missing:
+        # Eén aaneengesloten bereik over alle ontbrekende periodes
+        span = [start for start in periods if missing[0] <= start <= missing[-1]]
+        computed = compute_periods(span, granularity, resource)
+        timeouts = {
+            True: getattr(settings, 'ANALYTICS_CLOSED_CACHE_TIMEOUT', 86400),
+            False: getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 300),
+        }
+        for is_closed, timeout in timeouts.items():
+            batch = {keys[start]: computed[start] for start in missing if closed[start] is is_closed}
+            if batch:
+                cache.set_many(batch, timeout)
+        found.update({keys[start]: computed[start] for start in missing})
+        logger.info(f"Analytics computed for {len(missing)} {granularity} periods")
+
+    return [dict(found[keys[start]], closed=closed[start]) for start in periods]
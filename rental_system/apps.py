@@ -17,4 +17,18 @@ class RentalSystemConfig(AppConfig):
     verbose_name = 'Rental System V13'
     
     def ready(self):
-        pass
\ No newline at end of file
+        # Signal handlers registreren (bezetting bijhouden bij Rental wijzigingen)
+        from . import signals  # noqa: F401
+        
+        # Rate limit tellers horen in een gedeelde cache (manage.py check)
+        from django.core import checks
+        from .ratelimit import check_shared_cache
+        checks.register(check_shared_cache, checks.Tags.caches)
+        
+        # Achtergrondtaken registreren (zie taskqueue.py)
+        from . import tasks  # noqa: F401
+        
+        # Opt-in warm-up zonder database of netwerk (veilig vóór de fork)
+        from . import warmup
+        if warmup.is_enabled():
+            warmup.pre_fork()
\ No newline at end of file
@@ -0,0 +1,348 @@
+"""
+AVAILABILITY.PY - V13
+=====================
+
+Lokale beschikbaarheid op basis van de dag-claims
+Vlootmatrix: resources x dagen in één query, compact als bitstrings
+Gematerialiseerde bezetting (DailyOccupancy), bijgewerkt bij schrijven
+Beschikbaarheid gecached per maand (per resource) met prefetch vooruit
+Gesloten dagen uit de gecompileerde blackout kalender (blackouts.py)
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+
+from .blackouts import get_calendar
+from .cache_versions import AVAILABILITY, bump_version, get_version
+from .db_router import primary
+from .models import BookingClaim, DailyOccupancy, Rental, Resource
+
+logger = logging.getLogger(__name__)
+
+FREE = '0'
+BOOKED = '1'
+BLOCKED = '2'
+
+# Blackout masker (0/1 per dag) -> matrix tekens in één translate
+_BLOCKED_TABLE = bytes.maketrans(b'\x00\x01', (FREE + BLOCKED).encode('ascii'))
+
+# Velden van een dag (api_availability ?fields=), met de waarde als het veld ontbreekt
+DAY_FIELDS = {'date': None, 'available': None, 'price': None, 'type': None, 'blocked': False}
+
+WEEKEND_PRICE = Decimal('150.00')
+MIDWEEK_PRICE = Decimal('120.00')
+
+
+def parse_day(value, field):
+    try:
+        return datetime.strptime(value or '', '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'{field} must be a date (YYYY-MM-DD)')
+
+
+def select_resources(slugs=None):
+    """Actieve resources, optioneel beperkt tot een lijst slugs"""
+    queryset = Resource.objects.active()
+    if slugs:
+        queryset = queryset.filter(slug__in=slugs)
+    return list(queryset.order_by('sort_order', 'id'))
+
+
+def availability_matrix(start_date, end_date, resources):
+    """
+    Bezetting resources x dagen.
+
+    Alle claims van alle resources komen uit één query en worden in een
+    bytearray per resource gezet. Resultaat per resource is een string
+    met één teken per dag ('0' vrij, '1' bezet, '2' gesloten).
+    """
+    max_days = getattr(settings, 'AVAILABILITY_MATRIX_MAX_DAYS', 400)
+    total_days = (end_date - start_date).days + 1
+    if total_days < 1:
+        raise ValueError('end must be on or after start')
+    if total_days > max_days:
+        raise ValueError(f'range exceeds {max_days} days')
+
+    calendar = get_calendar()
+    rows = {
+        resource.id: bytearray(calendar.mask(start_date, end_date, resource).translate(_BLOCKED_TABLE))
+        for resource in resources
+    }
+    start_ordinal = start_date.toordinal()
+    booked = ord(BOOKED)
+
+    claims = (
+        BookingClaim.objects
+        .filter(resource_id__in=rows.keys(), day__range=(start_date, end_date))
+        .values_list('resource_id', 'day')
+        .iterator(chunk_size=5000)
+    )
+    for resource_id, day in claims:
+        rows[resource_id][day.toordinal() - start_ordinal] = booked
+
+    return {
+        'start': start_date.isoformat(),
+        'end': end_date.isoformat(),
+        'days': total_days,
+        'resources': [
+            {'id': resource.id, 'slug': resource.slug, 'name': resource.name}
+            for resource in resources
+        ],
+        'rows': [rows[resource.id].decode('ascii') for resource in resources],
+        'legend': {FREE: 'free', BOOKED: 'booked', BLOCKED: 'closed'},
+    }
+
+
+def month_end(day):
+    """Laatste dag van de maand van day"""
+    next_month = day.replace(day=28) + timedelta(days=4)
+    return next_month - timedelta(days=next_month.day)
+
+
+def day_price(day):
+    """Dagprijs en type (weekend/midweek) voor een dag"""
+    if day.weekday() in (5, 6):
+        return WEEKEND_PRICE, 'weekend'
+    return MIDWEEK_PRICE, 'midweek'
+
+
+def _occupancy_rows(rental):
+    rows = []
+    day = rental.start_date
+    while day <= rental.end_date:
+        price, day_type = day_price(day)
+        rows.append(DailyOccupancy(
+            resource_id=rental.resource_id, day=day, rental_id=rental.id,
+            price=price, day_type=day_type,
+        ))
+        day += timedelta(days=1)
+    return rows
+
+
+def sync_rental_occupancy(rental):
+    """
+    Zet de bezetting van één reservatie gelijk aan haar huidige staat.
+    Draait binnen de transactie van de save (savepoint).
+    """
+    with transaction.atomic():
+        DailyOccupancy.objects.filter(rental_id=rental.id).delete()
+        if rental.status in Rental.INACTIVE_STATUSES:
+            return 0
+        return len(DailyOccupancy.objects.bulk_create(_occupancy_rows(rental)))
+
+
+def rebuild_occupancy(resource=None, batch_size=1000):
+    """Volledige herbouw van DailyOccupancy uit de Rental tabel"""
+    rentals = Rental.objects.active()
+    occupancy = DailyOccupancy.objects.all()
+    if resource is not None:
+        rentals = rentals.filter(resource=resource)
+        occupancy = occupancy.filter(resource=resource)
+
+    created = 0
+    with transaction.atomic():
+        occupancy.delete()
+        batch = []
+        for rental in rentals.only('id', 'resource_id', 'start_date', 'end_date').iterator(chunk_size=batch_size):
+            batch.extend(_occupancy_rows(rental))
+            if len(batch) >= batch_size:
+                created += len(DailyOccupancy.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            created += len(DailyOccupancy.objects.bulk_create(batch))
+        transaction.on_commit(lambda: bump_version(AVAILABILITY))
+    logger.info(f"✅ Occupancy rebuilt: {created} days")
+    return created
+
+
+def occupancy_for_range(resource, start_date, end_date):
+    """Bezette dagen van één resource: één range scan op (resource, day)"""
+    rows = (
+        DailyOccupancy.objects
+        .filter(resource=resource, day__range=(start_date, end_date))
+        .order_by('day')
+        .values_list('day', 'price', 'day_type', 'rental_id')
+    )
+    return {day.isoformat(): (price, day_type, rental_id) for day, price, day_type, rental_id in rows}
+
+
+def apply_occupancy(availability_data, resource):
+    """
+    Markeer dagen uit de WordPress beschikbaarheid die lokaal bezet zijn.
+    Wijzigt availability_data['data'] in place.
+    """
+    days = availability_data.get('data') or []
+    if not days:
+        return availability_data
+
+    occupied = occupancy_for_range(resource, days[0]['date'], days[-1]['date'])
+    for entry in days:
+        booked = occupied.get(entry['date'])
+        if booked is not None:
+            entry['available'] = False
+            entry['price'] = float(booked[0])
+            entry['type'] = booked[1]
+    availability_data['resource'] = resource.slug
+    return availability_data
+
+
+def apply_blackouts(availability_data, resource):
+    """
+    Markeer gesloten dagen (blackout kalender) als niet beschikbaar.
+    Wijzigt availability_data['data'] in place.
+    """
+    days = availability_data.get('data') or []
+    if not days:
+        return availability_data
+
+    start = parse_day(days[0]['date'], 'start')
+    mask = get_calendar().mask(start, parse_day(days[-1]['date'], 'end'), resource)
+    start_ordinal = start.toordinal()
+    for entry in days:
+        index = parse_day(entry['date'], 'date').toordinal() - start_ordinal
+        if mask[index]:
+            entry['available'] = False
+            entry['blocked'] = True
+    return availability_data
+
+
+# ========================================
+# MAAND BUCKETS + PREFETCH
+# ========================================
+
+MONTH_CACHE_PREFIX = 'avail:month:v1'
+
+_prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='avail-prefetch')
+_prefetch_lock = threading.Lock()
+_prefetch_pending = set()
+
+
+def next_month(year, month):
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def iter_months(start_date, end_date):
+    """(jaar, maand) van elke maand die start_date..end_date raakt"""
+    year, month = start_date.year, start_date.month
+    while (year, month) <= (end_date.year, end_date.month):
+        yield year, month
+        year, month = next_month(year, month)
+
+
+def _month_key(resource, year, month, version):
+    return f'{MONTH_CACHE_PREFIX}:{resource.id}:{year}-{month:02d}:{version}'
+
+
+def compute_month(resource, year, month):
+    """Beschikbaarheid van één volledige maand: WordPress data + lokale bezetting"""
+    from .wordpress_api import WordPressAPIClient
+
+    start_date = date(year, month, 1)
+    end_date = month_end(start_date)
+    month_data = WordPressAPIClient().get_availability(start_date.isoformat(), end_date.isoformat())
+    if not month_data.get('success'):
+        raise RuntimeError(month_data.get('error', 'availability unavailable'))
+    # Primair lezen: de bucket hangt aan de nieuwe versie, een replica kan achterlopen
+    with primary():
+        apply_occupancy(month_data, resource)
+    apply_blackouts(month_data, resource)
+    return month_data['data']
+
+
+def get_month(resource, year, month, version=None):
+    """Maand bucket uit de cache, of berekenen en cachen"""
+    version = version if version is not None else get_version(AVAILABILITY)
+    key = _month_key(resource, year, month, version)
+    days = cache.get(key)
+    if days is None:
+        days = compute_month(resource, year, month)
+        cache.set(key, days, getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 3600))
+    return days
+
+
+def get_availability(start_date, end_date, resource, prefetch=True):
+    """
+    Beschikbaarheid voor een willekeurige periode, samengesteld uit
+    gecachte maand buckets. Zelfde vorm als WordPressAPIClient.get_availability.
+    """
+    try:
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        version = get_version(AVAILABILITY)
+
+        data = []
+        last_month = None
+        for year, month in iter_months(start, end):
+            data.extend(
+                day for day in get_month(resource, year, month, version)
+                if start_date <= day['date'] <= end_date
+            )
+            last_month = (year, month)
+
+        if prefetch and last_month is not None:
+            prefetch_months(resource, *next_month(*last_month), version=version)
+
+        return {
+            'success': True,
+            'data': data,
+            'period': {'start': start_date, 'end': end_date},
+            'total_days': len(data),
+            'resource': resource.slug,
+            'version': 'V13'
+        }
+
+    except Exception as e:
+        logger.error(f"❌ Error getting availability: {str(e)}")
+        # Geen exception tekst in de response: die kan request input bevatten
+        return {
+            'success': False,
+            'error': 'Availability unavailable',
+            'data': [],
+            'version': 'V13'
+        }
+
+
+def prefetch_months(resource, year, month, months=None, version=None):
+    """
+    Vul de buckets voor de volgende maanden op de achtergrond, zodat
+    doorbladeren in de kalender een warme cache raakt.
+    """
+    months = months if months is not None else getattr(settings, 'AVAILABILITY_PREFETCH_MONTHS', 2)
+    version = version if version is not None else get_version(AVAILABILITY)
+    for _ in range(months):
+        key = _month_key(resource, year, month, version)
+        with _prefetch_lock:
+            pending = key in _prefetch_pending
+            if not pending:
+                _prefetch_pending.add(key)
+        if not pending:
+            if cache.get(key) is None:
+                _prefetch_pool.submit(_prefetch_month, key, resource, year, month, version)
+            else:
+                _release_prefetch(key)
+        year, month = next_month(year, month)
+
+
+def _release_prefetch(key):
+    with _prefetch_lock:
+        _prefetch_pending.discard(key)
+
+
+def _prefetch_month(key, resource, year, month, version):
+    try:
+        get_month(resource, year, month, version)
+    except Exception as e:
+        logger.warning(f"⚠️ Availability prefetch {year}-{month:02d} failed: {str(e)}")
+    finally:
+        _release_prefetch(key)
+        connections.close_all()
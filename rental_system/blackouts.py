@@ -0,0 +1,223 @@
+"""
+BLACKOUTS.PY - V13
+==================
+
+Gesloten dagen (blackout kalender)
+Bronnen: BlackoutRule (admin) en VOORBEHOUDEN_DAGEN uit de settings.
+Alle regels worden één keer gecompileerd tot een bytearray per
+resource, geïndexeerd op dag-ordinal: "is deze dag gesloten" is één
+index lookup, een periode is één slice.
+
+Volgorde van toepassing: globale sluitingen, globale uitzonderingen
+(open), daarna per resource sluitingen en uitzonderingen.
+
+Het gecompileerde masker wordt per proces bewaard en opnieuw opgebouwd
+zodra de BLACKOUTS versie wijzigt (admin save/delete, zie signals.py).
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import logging
+import threading
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+
+from .cache_versions import BLACKOUTS, get_version
+from .db_router import primary
+
+logger = logging.getLogger(__name__)
+
+OPEN_DAY = 0
+CLOSED_DAY = 1
+# Hercompileren als het venster te ver van vandaag verschoven is
+RECOMPILE_AFTER_DAYS = 30
+
+_lock = threading.Lock()
+_calendar = None
+
+
+def _month_day(year, month, day):
+    """date(year, month, day), 29 februari wordt 28 februari in een gewoon jaar"""
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return date(year, month, day - 1)
+
+
+def _fill(mask, base, first, last, value):
+    """Zet first..last (inclusief, geclipt op het masker) op value"""
+    start = max(first.toordinal() - base, 0)
+    end = min(last.toordinal() - base, len(mask) - 1)
+    if start <= end:
+        mask[start:end + 1] = bytes([value]) * (end - start + 1)
+
+
+def _apply_rule(mask, base, rule, value):
+    kind, _, _, start_date, end_date, weekday = rule
+    first_day = date.fromordinal(base)
+    last_day = date.fromordinal(base + len(mask) - 1)
+
+    if kind == 'date':
+        _fill(mask, base, start_date, end_date or start_date, value)
+
+    elif kind == 'weekly':
+        lower = max(start_date or first_day, first_day).toordinal() - base
+        upper = min(end_date or last_day, last_day).toordinal() - base
+        if lower > upper:
+            return
+        # eerste dag met de gevraagde weekdag, dan elke 7 dagen in één slice
+        lower += (weekday - date.fromordinal(base + lower).weekday()) % 7
+        count = len(range(lower, upper + 1, 7))
+        if count:
+            mask[lower:upper + 1:7] = bytes([value]) * count
+
+    elif kind in ('yearly', 'season'):
+        end_date = end_date or start_date
+        for year in range(first_day.year - 1, last_day.year + 1):
+            first = _month_day(year, start_date.month, start_date.day)
+            last_year = year + 1 if (end_date.month, end_date.day) < (start_date.month, start_date.day) else year
+            _fill(mask, base, first, _month_day(last_year, end_date.month, end_date.day), value)
+
+
+def settings_rules():
+    """VOORBEHOUDEN_DAGEN als eenmalige globale sluitingen"""
+    rules = []
+    for value in getattr(settings, 'VOORBEHOUDEN_DAGEN', []):
+        try:
+            day = datetime.strptime(value, '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            logger.warning(f"⚠️ Ongeldige voorbehouden dag genegeerd: {value!r}")
+            continue
+        rules.append(('date', 'block', None, day, day, None))
+    return rules
+
+
+def load_rules():
+    """Actieve regels als tuples (kind, action, resource_id, start, end, weekday)"""
+    from .models import BlackoutRule
+
+    # Primair lezen: de kalender blijft tot de volgende versie in het geheugen
+    with primary():
+        rules = list(
+            BlackoutRule.objects.filter(is_active=True).values_list(
+                'kind', 'action', 'resource_id', 'start_date', 'end_date', 'weekday'
+            )
+        )
+    return settings_rules() + rules
+
+
+def compile_rules(rules, start_date, end_date):
+    """
+    Compileer regels voor start_date..end_date.
+    Geeft (globaal masker, {resource_id: masker}) terug; één byte per dag.
+    """
+    base = start_date.toordinal()
+    size = end_date.toordinal() - base + 1
+    layers = {}
+    for rule in rules:
+        layers.setdefault(rule[2], ([], []))[rule[1] == 'open'].append(rule)
+
+    shared = bytearray(size)
+    blocks, opens = layers.pop(None, ([], []))
+    for rule in blocks:
+        _apply_rule(shared, base, rule, CLOSED_DAY)
+    for rule in opens:
+        _apply_rule(shared, base, rule, OPEN_DAY)
+
+    per_resource = {}
+    for resource_id, (blocks, opens) in layers.items():
+        mask = bytearray(shared)
+        for rule in blocks:
+            _apply_rule(mask, base, rule, CLOSED_DAY)
+        for rule in opens:
+            _apply_rule(mask, base, rule, OPEN_DAY)
+        per_resource[resource_id] = mask
+    return shared, per_resource
+
+
+def _resource_id(resource):
+    return getattr(resource, 'pk', resource)
+
+
+class BlackoutCalendar:
+    """Gecompileerde blackout kalender voor een venster rond vandaag"""
+
+    def __init__(self, rules, start_date, end_date, version=None):
+        self.rules = rules
+        self.start_date = start_date
+        self.end_date = end_date
+        self.version = version
+        self.base = start_date.toordinal()
+        self.shared, self.per_resource = compile_rules(rules, start_date, end_date)
+
+    def _mask_for(self, resource):
+        return self.per_resource.get(_resource_id(resource), self.shared)
+
+    def is_blocked(self, day, resource=None):
+        index = day.toordinal() - self.base
+        if 0 <= index < len(self.shared):
+            return self._mask_for(resource)[index] == CLOSED_DAY
+        return self.mask(day, day, resource)[0] == CLOSED_DAY
+
+    def mask(self, start_date, end_date, resource=None):
+        """Eén byte per dag (1 = gesloten) voor start_date..end_date"""
+        if start_date >= self.start_date and end_date <= self.end_date:
+            start = start_date.toordinal() - self.base
+            return bytes(self._mask_for(resource)[start:end_date.toordinal() - self.base + 1])
+        # Buiten het venster: dezelfde compilatie, alleen voor deze periode
+        shared, per_resource = compile_rules(self.rules, start_date, end_date)
+        return bytes(per_resource.get(_resource_id(resource), shared))
+
+    def blocked_ranges(self, start_date, end_date, resource=None):
+        """Aaneengesloten gesloten periodes (start, end inclusief)"""
+        mask = self.mask(start_date, end_date, resource)
+        base = start_date.toordinal()
+        position = mask.find(CLOSED_DAY)
+        while position != -1:
+            end = mask.find(OPEN_DAY, position)
+            if end == -1:
+                end = len(mask)
+            yield date.fromordinal(base + position), date.fromordinal(base + end - 1)
+            position = mask.find(CLOSED_DAY, end)
+
+    def stats(self):
+        return {
+            'version': self.version,
+            'start': self.start_date.isoformat(),
+            'end': self.end_date.isoformat(),
+            'rules': len(self.rules),
+            'resource_overrides': len(self.per_resource),
+            'closed_days': self.shared.count(CLOSED_DAY),
+        }
+
+
+def compile_calendar(version=None, today=None):
+    today = today or date.today()
+    start_date = today - timedelta(days=getattr(settings, 'BLACKOUT_HORIZON_DAYS_BACK', 366))
+    end_date = today + timedelta(days=getattr(settings, 'BLACKOUT_HORIZON_DAYS_AHEAD', 3 * 366))
+    calendar = BlackoutCalendar(load_rules(), start_date, end_date, version)
+    logger.info(f"✅ Blackout calendar compiled: {calendar.stats()}")
+    return calendar
+
+
+def get_calendar():
+    """Gecompileerde kalender van dit proces; opnieuw compileren na een wijziging"""
+    global _calendar
+    version = get_version(BLACKOUTS)
+    calendar = _calendar
+    stale = calendar is None or calendar.version != version or (
+        abs((date.today() - calendar.start_date).days - getattr(settings, 'BLACKOUT_HORIZON_DAYS_BACK', 366))
+        > RECOMPILE_AFTER_DAYS
+    )
+    if stale:
+        with _lock:
+            if _calendar is None or _calendar is calendar:
+                _calendar = compile_calendar(version)
+            calendar = _calendar
+    return calendar
+
+
+def is_blocked(day, resource=None):
+    return get_calendar().is_blocked(day, resource)
@@ -0,0 +1,108 @@
+"""
+CACHE_VERSIONS.PY - V13
+=======================
+
+Versietellers voor cache invalidatie
+Caches nemen de huidige versie op in hun key; een bump maakt alle
+oude entries in één keer onbereikbaar (ze verlopen vanzelf).
+
+De tellers staan in de database (CacheVersion), niet in de cache: met
+een cache per proces (LocMemCache) zou een bump alleen het proces raken
+dat de wijziging deed, andere workers en `manage.py` commands blijven
+dan oude data serveren. Lezen gebeurt altijd op de primaire database.
+
+CACHE_VERSION_TTL (seconden) houdt een gelezen versie even in het
+geheugen van het proces: één query per interval in plaats van per
+lookup, ten koste van hooguit zoveel seconden vertraging in andere
+processen. Een bump in dit proces is meteen zichtbaar. 0 = altijd lezen.
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .db_router import primary
+from .models import CacheVersion
+
+# Cache backends die alleen binnen één proces bestaan
+PER_PROCESS_BACKENDS = ('LocMemCache', 'DummyCache')
+
+AVAILABILITY = 'availability'
+ANALYTICS = 'analytics'
+BLACKOUTS = 'blackouts'
+
+# namespace -> (versie, gelezen op monotonic)
+_local = {}
+_local_lock = threading.Lock()
+
+
+def get_version(namespace):
+    """Huidige versie van een namespace (start op 1)"""
+    return get_versions(namespace)[namespace]
+
+
+def get_versions(*namespaces):
+    """Meerdere versies in één query"""
+    ttl = getattr(settings, 'CACHE_VERSION_TTL', 1.0)
+    now = time.monotonic()
+    versions = {}
+    if ttl:
+        with _local_lock:
+            for namespace in namespaces:
+                entry = _local.get(namespace)
+                if entry is not None and now - entry[1] < ttl:
+                    versions[namespace] = entry[0]
+
+    missing = [namespace for namespace in namespaces if namespace not in versions]
+    if missing:
+        with primary():
+            found = dict(
+                CacheVersion.objects.filter(namespace__in=missing).values_list('namespace', 'version')
+            )
+        for namespace in missing:
+            versions[namespace] = found.get(namespace, 1)
+        if ttl:
+            with _local_lock:
+                _local.update((namespace, (versions[namespace], now)) for namespace in missing)
+    return versions
+
+
+def version_state(*namespaces):
+    """
+    {namespace: (versie, laatste bump)} rechtstreeks uit de database,
+    zonder CACHE_VERSION_TTL (voor ETag/Last-Modified). Nooit gebumpt:
+    (1, None).
+    """
+    with primary():
+        rows = CacheVersion.objects.filter(namespace__in=namespaces).values_list('namespace', 'version', 'bumped_at')
+        found = {namespace: (version, bumped_at) for namespace, version, bumped_at in rows}
+    return {namespace: found.get(namespace, (1, None)) for namespace in namespaces}
+
+
+def bump_version(namespace):
+    """Verhoog de versie atomisch in de database; alle caches op deze namespace vervallen"""
+    bump = {'version': F('version') + 1, 'bumped_at': timezone.now()}
+    updated = CacheVersion.objects.filter(namespace=namespace).update(**bump)
+    if not updated:
+        try:
+            with transaction.atomic():
+                CacheVersion.objects.create(namespace=namespace, version=2)
+        except IntegrityError:
+            # Gelijktijdig aangemaakt door een ander proces
+            CacheVersion.objects.filter(namespace=namespace).update(**bump)
+    # Dit proces leest de nieuwe versie bij de volgende lookup
+    with _local_lock:
+        _local.pop(namespace, None)
+
+
+def cache_is_shared(alias='default'):
+    """Zien alle processen dezelfde cache (Redis, Memcached, database)?"""
+    return type(caches[alias]).__name__ not in PER_PROCESS_BACKENDS
@@ -0,0 +1,228 @@
+"""
+COMPRESSION.PY - V13
+====================
+
+Response compressie voor JSON API responses
+Encoding via Accept-Encoding: br en zstd als de optionele modules
+geïnstalleerd zijn, anders gzip. Kleine responses worden overgeslagen,
+gestreamde responses worden incrementeel gecomprimeerd.
+
+BREACH: responses waarvan de body het CSRF token bevat worden nooit
+gecomprimeerd, en gzip krijgt een willekeurig lange bestandsnaam in de
+header (Heal-the-BREACH, zoals Django's GZipMiddleware).
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import logging
+import secrets
+import string
+import struct
+import zlib
+
+from django.conf import settings
+from django.middleware.csrf import CSRF_SECRET_LENGTH, CSRF_TOKEN_LENGTH, _unmask_cipher_token
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import constant_time_compare
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # optioneel: pip install brotli
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optioneel: pip install zstandard
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTENT_TYPES = ('application/json', 'application/x-ndjson', 'text/calendar')
+STRONG_ETAG_RE = _lazy_re_compile(r'^\s*"')
+# Kandidaten voor een (gemaskeerd) CSRF token in de body
+CSRF_CANDIDATE_RE = _lazy_re_compile(
+    rb'(?<![a-zA-Z0-9])([a-zA-Z0-9]{%d}|[a-zA-Z0-9]{%d})(?![a-zA-Z0-9])' % (CSRF_TOKEN_LENGTH, CSRF_SECRET_LENGTH)
+)
+
+
+def _gzip_header(max_random_bytes):
+    """gzip header met een willekeurige FNAME van 1..max_random_bytes letters"""
+    length = secrets.randbelow(max_random_bytes) + 1
+    filename = ''.join(secrets.choice(string.ascii_letters) for _ in range(length)).encode('ascii')
+    # magic, deflate, FLG.FNAME, mtime 0, XFL 0, OS onbekend
+    return b'\x1f\x8b\x08\x08' + b'\x00' * 4 + b'\x00\xff' + filename + b'\x00'
+
+
+class _GzipCompressor:
+    # Heal-the-BREACH: willekeurige lengte per response
+    max_random_bytes = 100
+
+    def __init__(self, level=6):
+        # Ruwe deflate; header en trailer (crc32 + lengte) schrijven we zelf
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self._header = _gzip_header(self.max_random_bytes)
+        self._crc = 0
+        self._size = 0
+
+    def _start(self):
+        header, self._header = self._header, b''
+        return header
+
+    def compress(self, data):
+        self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        return self._start() + self._compressor.compress(data)
+
+    def flush(self):
+        return self._start() + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        trailer = struct.pack('<II', self._crc & 0xffffffff, self._size & 0xffffffff)
+        return self._start() + self._compressor.flush(zlib.Z_FINISH) + trailer
+
+
+class _BrotliCompressor:
+    def __init__(self, quality=5):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level=3):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_encodings():
+    """Encodings in volgorde van voorkeur, alleen als de module beschikbaar is"""
+    factories = {'gzip': _GzipCompressor}
+    if brotli is not None:
+        factories['br'] = _BrotliCompressor
+    if zstandard is not None:
+        factories['zstd'] = _ZstdCompressor
+    preference = getattr(settings, 'COMPRESSION_ENCODINGS', ['br', 'zstd', 'gzip'])
+    return [(name, factories[name]) for name in preference if name in factories]
+
+
+def choose_encoding(accept_encoding, encodings=None):
+    """Eerste encoding uit de voorkeurslijst die de client accepteert"""
+    accepted = set()
+    for part in accept_encoding.split(','):
+        token, _, params = part.strip().partition(';')
+        if token and params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(token.lower())
+    for name, factory in encodings if encodings is not None else available_encodings():
+        if name in accepted:
+            return name, factory
+    return None, None
+
+
+def compress_bytes(content, factory):
+    compressor = factory()
+    return compressor.compress(content) + compressor.finish()
+
+
+def compress_stream(chunks, factory):
+    """Comprimeer een stream chunk per chunk; flush zodat de client meteen data krijgt"""
+    compressor = factory()
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def _carries_csrf_token(request, response):
+    """
+    Bevat de body het CSRF token (gemaskeerd of als geheim)?
+    Alleen relevant als get_token() tijdens deze request liep:
+    CsrfViewMiddleware (dieper in de stack) zet dan de cookie opnieuw en
+    wist daarna de vlag in request.META; beide controleren. Gestreamde
+    responses bevatten nooit een token.
+    """
+    if response.streaming:
+        return False
+    if not (request.META.get('CSRF_COOKIE_NEEDS_UPDATE') or settings.CSRF_COOKIE_NAME in response.cookies):
+        return False
+    secret = request.META.get('CSRF_COOKIE')
+    if not secret:
+        return False
+    for match in CSRF_CANDIDATE_RE.finditer(response.content):
+        candidate = match.group(1).decode('ascii')
+        if len(candidate) == CSRF_TOKEN_LENGTH:
+            candidate = _unmask_cipher_token(candidate)
+        if constant_time_compare(candidate, secret):
+            return True
+    return False
+
+
+class JSONCompressionMiddleware:
+    """
+    Comprimeer JSON (en NDJSON/ICS) API responses.
+    Plaats ná CorsMiddleware/SecurityMiddleware, zodat de compressie het
+    laatst gebeurt op de uiteindelijke body.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        self.content_types = tuple(getattr(settings, 'COMPRESSION_CONTENT_TYPES', DEFAULT_CONTENT_TYPES))
+        self.encodings = available_encodings()
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in self.content_types or response.has_header('Content-Encoding'):
+            return response
+        if response.status_code != 200:
+            return response
+        if _carries_csrf_token(request, response):
+            # BREACH: geheim token naast (mogelijk) gereflecteerde input
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        # Vanaf hier hangt de representatie af van Accept-Encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding, factory = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.encodings)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(response.streaming_content, factory)
+            if response.has_header('Content-Length'):
+                del response['Content-Length']
+        else:
+            compressed = compress_bytes(response.content, factory)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # Gecomprimeerd is een andere representatie: strong ETag verzwakken
+        etag = response.get('ETag')
+        if etag and STRONG_ETAG_RE.search(etag):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,117 @@
+"""
+DB_ROUTER.PY - V13
+==================
+
+Lezen van replica's, schrijven naar de primaire database
+Leesqueries van de apps in DATABASE_REPLICA_APPS gaan naar een willekeurige
+replica uit DATABASE_REPLICAS, alle writes naar 'default'. Zonder
+replica's verandert er niets.
+
+Read-your-writes:
+- na een write leest dezelfde request verder van de primaire database
+- ReplicaPinMiddleware zet dan een cookie; requests van die sessie
+  lezen DATABASE_REPLICA_PIN_SECONDS lang ook van de primaire database
+- binnen een transactie op 'default' wordt altijd primair gelezen
+- primary() pint code buiten een request (workers, commands) en
+  cache vullingen die aan een versie hangen (zie availability.compute_month
+  en blackouts.load_rules): een replica met vertraging mag geen oude data
+  onder een nieuwe versie in de cache zetten
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'kw_db_primary'
+
+# Per request (of per primary() blok): {'pinned': bool, 'wrote': bool}
+_state = contextvars.ContextVar('rental_system_db_routing', default=None)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+@contextmanager
+def primary():
+    """Alle reads in dit blok van de primaire database"""
+    outer = _state.get()
+    state = {'pinned': True, 'wrote': False}
+    token = _state.set(state)
+    try:
+        yield
+    finally:
+        _state.reset(token)
+        if outer is not None and state['wrote']:
+            outer['wrote'] = True
+
+
+def _pinned():
+    state = _state.get()
+    if state is not None and (state['pinned'] or state['wrote']):
+        return True
+    return connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+class ReadReplicaRouter:
+    """Reads naar een replica, writes naar default (alleen DATABASE_REPLICA_APPS)"""
+
+    def _routed(self, model):
+        return model._meta.app_label in getattr(settings, 'DATABASE_REPLICA_APPS', ['rental_system'])
+
+    def db_for_read(self, model, **hints):
+        if not self._routed(model):
+            return None
+        replicas = replica_aliases()
+        if not replicas or _pinned():
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # Alleen writes op gerouteerde apps pinnen; sessies en de database
+        # cache (rate limits, page cache) lezen toch nooit van een replica
+        state = _state.get()
+        if state is not None and self._routed(model):
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replica's krijgen hun schema via replicatie
+        return False if db in replica_aliases() else None
+
+
+class ReplicaPinMiddleware:
+    """
+    Read-your-writes per sessie: na een write gaan reads een korte tijd
+    naar de primaire database (cookie met max_age).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 5)
+
+    def __call__(self, request):
+        if not replica_aliases():
+            return self.get_response(request)
+
+        state = {'pinned': PIN_COOKIE in request.COOKIES, 'wrote': False}
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state['wrote']:
+            response.set_cookie(PIN_COOKIE, '1', max_age=self.pin_seconds, httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,107 @@
+"""
+FORMULAS.PY - V13
+=================
+
+Formule catalogus voor rental system
+Eén plek voor de prijsformules (api_formulas, prijsberekening)
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import copy
+import hashlib
+import json
+import logging
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+LONG_TERM_MARKERS = ('langere-termijn', 'longer-term')
+
+FORMULAS = [
+    {
+        'name': 'Weekend formule',
+        'price': 150.00,
+        'included_km': 100,
+        'deposit': 200.00,
+        'extra_km_rate': 0.30
+    },
+    {
+        'name': 'Midweek formule',
+        'price': 120.00,
+        'included_km': 80,
+        'deposit': 150.00,
+        'extra_km_rate': 0.30
+    },
+    {
+        'name': 'Week formule',
+        'price': 450.00,
+        'included_km': 300,
+        'deposit': 400.00,
+        'extra_km_rate': 0.25
+    },
+    {
+        'name': 'Langere-termijn formule',
+        'price': 100.00,
+        'included_km': 200,
+        'deposit': 100.00,
+        'extra_km_rate': 0.20
+    }
+]
+
+# Velden van een formule (api_formulas ?fields=)
+FORMULA_FIELDS = dict.fromkeys(('name', 'price', 'included_km', 'deposit', 'extra_km_rate'))
+
+
+@lru_cache(maxsize=1)
+def get_catalogue():
+    """Formules per naam; één keer opgebouwd per proces"""
+    catalogue = {formula['name']: formula for formula in FORMULAS}
+    logger.info(f"✅ Formula catalogue loaded: {len(catalogue)} formulas")
+    return catalogue
+
+
+def get_formulas():
+    """Kopie van de formules in vaste volgorde (veilig om aan te passen)"""
+    return copy.deepcopy(FORMULAS)
+
+
+def get_formula(name):
+    """Formule op naam, None als ze niet bestaat"""
+    return get_catalogue().get(name)
+
+
+def is_long_term(name):
+    """Langere-termijn formules rekenen per dag (zoals de kalender front-end)"""
+    return any(marker in name.lower() for marker in LONG_TERM_MARKERS)
+
+
+@lru_cache(maxsize=1)
+def catalogue_version():
+    """
+    Versie van catalogus + tarief settings. Verandert zodra een formule,
+    EXTRA_KM_TARIFF, VOORSCHOT_PERCENTAGE of PREPAIEMENT_TYPE wijzigt.
+    Die liggen vast per proces: één keer berekend, opnieuw na
+    catalogue_version.cache_clear() (of override_settings in tests).
+    """
+    raw = json.dumps({
+        'formulas': FORMULAS,
+        'extra_km_tariff': getattr(settings, 'EXTRA_KM_TARIFF', 0.30),
+        'voorschot_percentage': getattr(settings, 'VOORSCHOT_PERCENTAGE', 30),
+        'prepaiement_type': getattr(settings, 'PREPAIEMENT_TYPE', 'huur_borg'),
+    }, sort_keys=True)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:12]
+
+
+TARIFF_SETTINGS = ('EXTRA_KM_TARIFF', 'VOORSCHOT_PERCENTAGE', 'PREPAIEMENT_TYPE')
+
+
+@receiver(setting_changed)
+def _tariff_settings_changed(setting, **kwargs):
+    if setting in TARIFF_SETTINGS:
+        catalogue_version.cache_clear()
@@ -0,0 +1,183 @@
+"""
+ICAL.PY - V13
+=============
+
+iCalendar (ICS) beschikbaarheidsfeed voor partners
+Bezette periodes (Rental) en gesloten dagen (blackout kalender:
+BlackoutRule + VOORBEHOUDEN_DAGEN)
+
+De feed wordt regel per regel gegenereerd en per periode gecached.
+De cache key bevat een fingerprint van de Rental tabel, zodat elke
+wijziging automatisch een nieuwe feed (en ETag) oplevert.
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import hashlib
+import logging
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .blackouts import get_calendar
+from .cache_versions import AVAILABILITY, BLACKOUTS, version_state
+from .models import Rental
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'ical:v1'
+PRODID = '-//KroanWorks//Verhuur Kalender V13//NL'
+UID_DOMAIN = 'kroanworks.be'
+EPOCH = datetime(2000, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def merge_ranges(ranges):
+    """
+    Voeg aansluitende of overlappende (start, end) periodes samen.
+    Verwacht periodes gesorteerd op start; end is inclusief.
+    """
+    current_start = current_end = None
+    for start, end in ranges:
+        if current_start is None:
+            current_start, current_end = start, end
+        elif start <= current_end + timedelta(days=1):
+            current_end = max(current_end, end)
+        else:
+            yield current_start, current_end
+            current_start, current_end = start, end
+    if current_start is not None:
+        yield current_start, current_end
+
+
+def booked_periods(start_date, end_date, resource=None):
+    """Samengevoegde bezette periodes binnen start_date..end_date"""
+    rentals = Rental.objects.active().overlapping(start_date, end_date)
+    if resource is not None:
+        rentals = rentals.filter(resource=resource)
+    rows = (
+        rentals
+        .order_by('start_date', 'end_date')
+        .values_list('start_date', 'end_date')
+        .iterator()
+    )
+    clipped = ((max(start, start_date), min(end, end_date)) for start, end in rows)
+    return merge_ranges(clipped)
+
+
+def blocked_periods(start_date, end_date, resource=None):
+    """Aaneengesloten gesloten periodes binnen start_date..end_date"""
+    return get_calendar().blocked_ranges(start_date, end_date, resource)
+
+
+def feed_state(start_date, end_date, resource=None):
+    """
+    Goedkope fingerprint van de feed: één aggregate query op Rental en
+    de versies van AVAILABILITY en BLACKOUTS. Geeft (etag, last_modified).
+
+    last_modified volgt dezelfde invoer als de ETag: ook een verwijderde
+    reservatie of een gewijzigde blackout regel (elk een bump) maakt de
+    feed nieuwer, zodat If-Modified-Since pollers geen oude feed houden.
+    """
+    state = Rental.objects.aggregate(count=Count('id'), last=Max('updated_at'))
+    versions = version_state(AVAILABILITY, BLACKOUTS)
+    last_modified = max(
+        [state['last'] or EPOCH] + [bumped_at for _, bumped_at in versions.values() if bumped_at is not None]
+    )
+    raw = '|'.join([
+        start_date.isoformat(),
+        end_date.isoformat(),
+        resource.slug if resource is not None else '*',
+        str(state['count']),
+        last_modified.isoformat(),
+        str(versions[AVAILABILITY][0]),
+        str(versions[BLACKOUTS][0]),
+    ])
+    etag = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    return etag, last_modified
+
+
+def _format_date(value):
+    return value.strftime('%Y%m%d')
+
+
+def _event_lines(kind, summary, start, end, stamp):
+    # DTEND is exclusief in iCalendar, onze periodes zijn inclusief
+    return [
+        'BEGIN:VEVENT',
+        f'UID:{kind}-{_format_date(start)}-{_format_date(end)}@{UID_DOMAIN}',
+        f'DTSTAMP:{stamp}',
+        f'DTSTART;VALUE=DATE:{_format_date(start)}',
+        f'DTEND;VALUE=DATE:{_format_date(end + timedelta(days=1))}',
+        f'SUMMARY:{summary}',
+        'TRANSP:OPAQUE',
+        f'CATEGORIES:{kind.upper()}',
+        'END:VEVENT',
+    ]
+
+
+def iter_feed(start_date, end_date, last_modified, resource=None):
+    """Genereer de ICS feed incrementeel, één chunk per VEVENT"""
+    stamp = last_modified.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    yield '\r\n'.join([
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        'X-WR-CALNAME:KroanWorks beschikbaarheid',
+    ]) + '\r\n'
+
+    for start, end in booked_periods(start_date, end_date, resource):
+        yield '\r\n'.join(_event_lines('booked', 'Bezet', start, end, stamp)) + '\r\n'
+
+    for start, end in blocked_periods(start_date, end_date, resource):
+        yield '\r\n'.join(_event_lines('blocked', 'Voorbehouden', start, end, stamp)) + '\r\n'
+
+    yield 'END:VCALENDAR\r\n'
+
+
+def get_feed(start_date, end_date, etag, last_modified, resource=None):
+    """
+    Iterator met de feed chunks. Bij een cache hit komen de chunks uit
+    de cache; anders wordt de feed gestreamd en achteraf gecached.
+    """
+    cache_key = f'{CACHE_PREFIX}:{start_date.isoformat()}:{end_date.isoformat()}:{etag}'
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return iter(cached)
+    return _stream_and_cache(cache_key, start_date, end_date, last_modified, resource)
+
+
+def _stream_and_cache(cache_key, start_date, end_date, last_modified, resource=None):
+    chunks = []
+    for chunk in iter_feed(start_date, end_date, last_modified, resource):
+        chunks.append(chunk)
+        yield chunk
+    timeout = getattr(settings, 'ICAL_CACHE_TIMEOUT', 3600)
+    cache.set(cache_key, chunks, timeout)
+    logger.info(f"✅ ICS feed cached: {start_date} - {end_date} ({len(chunks) - 2} events)")
+
+
+def parse_range(start_value, end_value, today=None):
+    """
+    Parse start/end querystring waarden (YYYY-MM-DD).
+    Standaard: 30 dagen terug tot een jaar vooruit.
+    """
+    today = today or date.today()
+    start_date = (
+        datetime.strptime(start_value, '%Y-%m-%d').date()
+        if start_value else today - timedelta(days=30)
+    )
+    end_date = (
+        datetime.strptime(end_value, '%Y-%m-%d').date()
+        if end_value else today + timedelta(days=365)
+    )
+    if end_date < start_date:
+        raise ValueError('end must be on or after start')
+    max_days = getattr(settings, 'ICAL_MAX_RANGE_DAYS', 1096)
+    if (end_date - start_date).days > max_days:
+        raise ValueError(f'range exceeds {max_days} days')
+    return start_date, end_date
@@ -0,0 +1,190 @@
+"""
+IDEMPOTENCY.PY - V13
+====================
+
+Idempotency-Key ondersteuning voor schrijvende endpoints
+Mobiele clients herhalen een POST na een timeout. Met dezelfde
+Idempotency-Key header gebeurt het werk (inclusief de WordPress POST)
+maar één keer:
+
+- eerste request: record 'in_progress' (unieke constraint = lock),
+  daarna wordt de response byte voor byte opgeslagen
+- gelijktijdige duplicaten wachten op de lopende request
+- herhalingen krijgen de opgeslagen response, zonder upstream call
+- dezelfde key met een andere body: 422
+
+Records verlopen na IDEMPOTENCY_TTL (opruimen: purge_idempotency_keys).
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import hashlib
+import logging
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .models import IdempotencyRecord
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_KEY_LENGTH = 255
+REPLAY_HEADER = 'Idempotent-Replayed'
+POLL_INTERVAL = 0.05
+POLL_INTERVAL_MAX = 0.5
+
+
+def request_fingerprint(request):
+    """Hash van methode, pad en body: dezelfde key mag niet voor iets anders dienen"""
+    digest = hashlib.sha256()
+    digest.update(request.method.encode('ascii'))
+    digest.update(b'\0')
+    digest.update(request.path.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def request_principal(request):
+    user = getattr(request, 'user', None)
+    return f'user:{user.pk}' if user is not None and user.is_authenticated else ''
+
+
+def _error(message, status, **extra):
+    return JsonResponse({'success': False, 'error': message, **extra, 'version': 'V15'}, status=status)
+
+
+def _replay(record):
+    response = HttpResponse(
+        bytes(record.response_body or b''),
+        status=record.response_status,
+        content_type=record.response_content_type or 'application/json',
+    )
+    response[REPLAY_HEADER] = 'true'
+    return response
+
+
+def _should_store(response):
+    """Alleen definitieve antwoorden bewaren; 5xx en 429 mogen opnieuw geprobeerd worden"""
+    return not response.streaming and response.status_code < 500 and response.status_code != 429
+
+
+def _claim(scope, key, principal, fingerprint):
+    """Probeer de key te claimen. Geeft (record, owned) terug."""
+    now = timezone.now()
+    ttl = getattr(settings, 'IDEMPOTENCY_TTL', 24 * 3600)
+    try:
+        with transaction.atomic():
+            record = IdempotencyRecord.objects.create(
+                scope=scope, key=key, principal=principal, request_hash=fingerprint,
+                locked_at=now, expires_at=now + timedelta(seconds=ttl),
+            )
+        return record, True
+    except IntegrityError:
+        pass
+
+    record = IdempotencyRecord.objects.filter(scope=scope, key=key, principal=principal).first()
+    if record is None:
+        return None, False  # net verwijderd, opnieuw proberen
+
+    stale_after = timedelta(seconds=getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', 60))
+    expired = record.expires_at <= now
+    abandoned = record.state == IdempotencyRecord.IN_PROGRESS and record.locked_at <= now - stale_after
+    if expired or abandoned:
+        # Overnemen met een voorwaardelijke update: maar één proces wint
+        taken = IdempotencyRecord.objects.filter(
+            pk=record.pk, state=record.state, locked_at=record.locked_at,
+        ).update(
+            state=IdempotencyRecord.IN_PROGRESS, request_hash=fingerprint, locked_at=now,
+            expires_at=now + timedelta(seconds=ttl), response_status=None,
+            response_content_type='', response_body=None,
+        )
+        if taken:
+            record.refresh_from_db()
+            return record, True
+        return None, False
+    return record, False
+
+
+def _wait_for(record):
+    """Wacht tot de lopende request klaar is; None bij timeout of als ze opgaf"""
+    deadline = time.monotonic() + getattr(settings, 'IDEMPOTENCY_WAIT_TIMEOUT', 10)
+    interval = POLL_INTERVAL
+    while time.monotonic() < deadline:
+        time.sleep(interval)
+        interval = min(interval * 2, POLL_INTERVAL_MAX)
+        current = IdempotencyRecord.objects.filter(pk=record.pk).first()
+        if current is None or current.locked_at != record.locked_at:
+            return None
+        if current.state == IdempotencyRecord.COMPLETED:
+            return current
+    return None
+
+
+def idempotent(scope):
+    """
+    Decorator: Idempotency-Key support voor een view.
+    Zonder header verandert er niets.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            key = request.META.get(HEADER, '').strip()
+            if not key:
+                return view_func(request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return _error(f'Idempotency-Key longer than {MAX_KEY_LENGTH} characters', 400)
+
+            principal = request_principal(request)
+            fingerprint = request_fingerprint(request)
+            deadline = time.monotonic() + getattr(settings, 'IDEMPOTENCY_WAIT_TIMEOUT', 10)
+            while True:
+                record, owned = _claim(scope, key, principal, fingerprint)
+                if owned:
+                    break
+                if record is not None:
+                    if record.request_hash != fingerprint:
+                        return _error('Idempotency-Key was already used for a different request', 422)
+                    if record.state == IdempotencyRecord.COMPLETED:
+                        logger.info(f"Idempotent replay {scope}:{key}")
+                        return _replay(record)
+                    completed = _wait_for(record)
+                    if completed is not None:
+                        logger.info(f"Idempotent replay {scope}:{key} after waiting")
+                        return _replay(completed)
+                if time.monotonic() >= deadline:
+                    response = _error('A request with this Idempotency-Key is still in progress', 409)
+                    response['Retry-After'] = '1'
+                    return response
+
+            try:
+                response = view_func(request, *args, **kwargs)
+            except Exception:
+                IdempotencyRecord.objects.filter(pk=record.pk, locked_at=record.locked_at).delete()
+                raise
+
+            if _should_store(response):
+                IdempotencyRecord.objects.filter(pk=record.pk, locked_at=record.locked_at).update(
+                    state=IdempotencyRecord.COMPLETED,
+                    response_status=response.status_code,
+                    response_content_type=response.get('Content-Type', ''),
+                    response_body=response.content,
+                )
+            else:
+                IdempotencyRecord.objects.filter(pk=record.pk, locked_at=record.locked_at).delete()
+            return response
+        return wrapped
+    return decorator
+
+
+def purge_expired(now=None):
+    """Verlopen records verwijderen; geeft het aantal terug"""
+    deleted, _ = IdempotencyRecord.objects.filter(expires_at__lte=now or timezone.now()).delete()
+    return deleted
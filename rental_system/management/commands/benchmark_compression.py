@@ -0,0 +1,66 @@
+"""
+BENCHMARK_COMPRESSION.PY - V13
+==============================
+
+Bytes per request voor /api/availability over typische periodes (maand,
+kwartaal, jaar), per beschikbare encoding. Elke meting is een echte
+request door de volledige middleware stack met Accept-Encoding: de
+bytes zijn wat de client ontvangt, Content-Encoding toont of de
+middleware werkelijk comprimeerde (BREACH/min_size kunnen dat
+overslaan). De tijd is wall clock per request, dus inclusief de view.
+
+Gebruik: python manage.py benchmark_compression [--iterations 50]
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from rental_system.compression import available_encodings
+
+RANGES = [('month', 30), ('quarter', 91), ('year', 365)]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark bytes sent per request for /api/availability with each Accept-Encoding'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if 'testserver' not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = list(settings.ALLOWED_HOSTS) + ['testserver']
+
+        client = Client()
+        iterations = options['iterations']
+        start = date.today().replace(day=1)
+        accept_encodings = ['identity'] + [name for name, _ in available_encodings()]
+
+        self.stdout.write(f"{'range':<9}{'accept':<10}{'sent as':<10}{'bytes':>10}{'ratio':>8}{'ms/req':>10}")
+        for label, days in RANGES:
+            params = {'start': start.isoformat(), 'end': (start + timedelta(days=days - 1)).isoformat()}
+            identity_size = None
+            for accept in accept_encodings:
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    response = client.get('/api/availability', params, HTTP_ACCEPT_ENCODING=accept)
+                    if response.status_code != 200:
+                        raise CommandError(f'/api/availability returned {response.status_code} for {label}')
+                    size = self._bytes_sent(response)
+                ms = (time.perf_counter() - started) * 1000 / iterations
+                identity_size = identity_size or size
+                sent_as = response.get('Content-Encoding', 'identity')
+                self.stdout.write(
+                    f"{label:<9}{accept:<10}{sent_as:<10}{size:>10}{size / identity_size:>8.2f}{ms:>10.2f}"
+                )
+
+    def _bytes_sent(self, response):
+        if response.streaming:
+            return sum(len(chunk) for chunk in response.streaming_content)
+        return len(response.content)
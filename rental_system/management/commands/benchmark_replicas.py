@@ -0,0 +1,176 @@
+"""
+BENCHMARK_REPLICAS.PY - V13
+===========================
+
+Leesdoorvoer met 0..N read replica's (zie rental_system/db_router.py)
+Parallelle clients draaien de zware leesqueries (reservatie lijst,
+analytics, bezetting per kwartaal) eerst zonder replica's en daarna met
+1, 2, ... replica's; per stap: operaties per seconde en de verdeling
+van de queries over de databases.
+
+Standaard worden de replica's lokaal nagebootst met kopieën van de
+SQLite database (sqlite3 backup API), met benchmark reservaties erin.
+Eén schijf en één proces: dat toont vooral de routering en haar
+overhead. Echte winst meten kan met aparte PostgreSQL instanties via
+--configured (de replica's uit DATABASE_REPLICAS).
+
+Gebruik: python manage.py benchmark_replicas --replicas 3 --clients 8 --duration 5
+         python manage.py benchmark_replicas --configured
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import copy
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import override_settings
+
+from rental_system import analytics, availability, rental_listing
+from rental_system.models import Rental, Resource
+
+BENCHMARK_EMAIL = 'benchmark-replicas@kroanworks.invalid'
+ALIAS_PREFIX = 'benchmark_replica'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark read throughput with 0..N read replicas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--replicas', type=int, default=3, help='Number of SQLite replica copies')
+        parser.add_argument('--configured', action='store_true', help='Use DATABASE_REPLICAS instead of SQLite copies')
+        parser.add_argument('--clients', type=int, default=8, help='Parallel clients (threads)')
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds per step')
+        parser.add_argument('--rentals', type=int, default=5000, help='Benchmark rentals to seed (SQLite copies)')
+        parser.add_argument('--keep', action='store_true', help='Keep benchmark rentals afterwards')
+
+    def handle(self, *args, **options):
+        if options['configured']:
+            aliases = list(getattr(settings, 'DATABASE_REPLICAS', []))
+            if not aliases:
+                raise CommandError('DATABASE_REPLICAS is empty')
+            self._run_steps(aliases, options)
+            return
+
+        if connection.vendor != 'sqlite' or connection.settings_dict['NAME'] in ('', ':memory:'):
+            raise CommandError('SQLite copies need a file based SQLite default database, use --configured')
+
+        directory = tempfile.mkdtemp(prefix='kw-replicas-')
+        aliases = []
+        try:
+            self._seed(options['rentals'])
+            for index in range(1, options['replicas'] + 1):
+                aliases.append(self._add_replica(f'{ALIAS_PREFIX}{index}', os.path.join(directory, f'replica{index}.sqlite3')))
+            self._run_steps(aliases, options)
+        finally:
+            for alias in aliases:
+                connections[alias].close()
+                del connections[alias]
+                del connections.settings[alias]
+            shutil.rmtree(directory, ignore_errors=True)
+            if not options['keep']:
+                Rental.objects.filter(customer_email=BENCHMARK_EMAIL).delete()
+
+    def _seed(self, count):
+        resource, _ = Resource.objects.get_or_create(slug='benchmark-replicas', defaults={
+            'name': 'Benchmark replica voertuig', 'is_active': False,
+        })
+        Rental.objects.filter(customer_email=BENCHMARK_EMAIL).delete()
+        first_day = date.today() + timedelta(days=7300)  # ver weg van echte boekingen
+        # bulk_create: geen signals, de bezetting is hier niet nodig
+        Rental.objects.bulk_create([
+            Rental(
+                resource=resource, customer_name=f'Replica {index}', customer_email=BENCHMARK_EMAIL,
+                start_date=first_day + timedelta(days=index), end_date=first_day + timedelta(days=index),
+                status=('pending', 'confirmed', 'cancelled')[index % 3], formula='Weekend formule',
+            )
+            for index in range(count)
+        ], batch_size=1000)
+        self.stdout.write(f'Seeded {count} benchmark rentals')
+
+    def _add_replica(self, alias, path):
+        """Kopie van de default database (backup API: consistent, ook met open connecties)"""
+        source = sqlite3.connect(str(connection.settings_dict['NAME']))
+        target = sqlite3.connect(path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        replica = copy.deepcopy(connections.settings['default'])
+        replica['NAME'] = path
+        connections.settings[alias] = replica
+        return alias
+
+    def _operations(self):
+        resource = Resource.objects.filter(slug='benchmark-replicas').first() or Resource.get_default()
+        today = date.today()
+        periods = analytics.parse_periods('month', f'{today.year}-01', f'{today.year}-12')
+        quarter_start = today + timedelta(days=7300)
+        return [
+            ('rentals page', lambda: rental_listing.page({}, 'desc', None, 50)),
+            ('rentals page (status)', lambda: rental_listing.page({'status': ['pending']}, 'asc', None, 50)),
+            ('analytics year', lambda: analytics.compute_periods(periods, 'month')),
+            ('occupancy quarter', lambda: availability.occupancy_for_range(resource, quarter_start, quarter_start + timedelta(days=90))),
+        ]
+
+    def _run_steps(self, aliases, options):
+        operations = self._operations()
+        self.stdout.write(f"{'replicas':>9}{'ops/s':>10}{'speedup':>9}  queries per database")
+        baseline = None
+        for count in range(len(aliases) + 1):
+            with override_settings(DATABASE_REPLICAS=aliases[:count]):
+                ops, queries = self._step(operations, ['default'] + aliases, options['clients'], options['duration'])
+            rate = ops / options['duration']
+            baseline = baseline or rate
+            total = sum(queries.values()) or 1
+            spread = ', '.join(f'{alias} {queries[alias] * 100 / total:.0f}%' for alias in ['default'] + aliases[:count])
+            self.stdout.write(f'{count:>9}{rate:>10.1f}{rate / baseline:>8.2f}x  {spread}')
+
+    def _step(self, operations, aliases, clients, duration):
+        stop = threading.Event()
+        lock = threading.Lock()
+        totals = Counter()
+        queries = Counter()
+
+        def client(offset):
+            local_queries = Counter()
+            done = 0
+
+            def counter(alias):
+                def wrapper(execute, sql, params, many, context):
+                    local_queries[alias] += 1
+                    return execute(sql, params, many, context)
+                return wrapper
+
+            try:
+                with ExitStack() as stack:
+                    for alias in aliases:
+                        stack.enter_context(connections[alias].execute_wrapper(counter(alias)))
+                    while not stop.is_set():
+                        operations[(offset + done) % len(operations)][1]()
+                        done += 1
+            finally:
+                connections.close_all()
+            with lock:
+                totals['ops'] += done
+                queries.update(local_queries)
+
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            for offset in range(clients):
+                pool.submit(client, offset)
+            time.sleep(duration)
+            stop.set()
+        return totals['ops'], queries
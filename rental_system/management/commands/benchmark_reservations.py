@@ -0,0 +1,129 @@
+"""
+BENCHMARK_RESERVATIONS.PY - V13
+===============================
+
+Concurrency benchmark voor reservaties met dag-claims
+Veel parallelle clients boeken willekeurige periodes; achteraf wordt
+gecontroleerd dat geen enkele dag dubbel geboekt is.
+
+Gebruik: python manage.py benchmark_reservations --clients 16 --requests 50
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+
+from rental_system import reservations
+from rental_system.models import Rental, Resource
+
+BENCHMARK_EMAIL = 'benchmark@kroanworks.invalid'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark parallel reservations and verify there are no double bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=16, help='Parallel clients (threads)')
+        parser.add_argument('--requests', type=int, default=50, help='Reservations per client')
+        parser.add_argument('--horizon', type=int, default=365, help='Days ahead to book in')
+        parser.add_argument('--max-length', type=int, default=5, help='Maximum rental length in days')
+        parser.add_argument('--resources', type=int, default=1, help='Number of benchmark vehicles to spread bookings over')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--keep', action='store_true', help='Keep benchmark rentals afterwards')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.settings_dict['NAME'] in ('', ':memory:'):
+            raise CommandError('In-memory SQLite is not shared between threads, use a file database')
+
+        rng = random.Random(options['seed'])
+        resources = [
+            Resource.objects.get_or_create(slug=f'benchmark-{index}', defaults={
+                'name': f'Benchmark voertuig {index}', 'is_active': False,
+            })[0]
+            for index in range(options['resources'])
+        ]
+        start_day = date.today() + timedelta(days=3650)  # ver weg van echte boekingen
+        plans = [
+            [(rng.choice(resources),) + self._random_period(rng, start_day, options['horizon'], options['max_length'])
+             for _ in range(options['requests'])]
+            for _ in range(options['clients'])
+        ]
+
+        Rental.objects.filter(customer_email=BENCHMARK_EMAIL).delete()
+        results = Counter()
+        lock = threading.Lock()
+
+        def run_client(index, periods):
+            local = Counter()
+            try:
+                for resource, period_start, period_end in periods:
+                    local[self._book(index, resource, period_start, period_end)] += 1
+            finally:
+                connections.close_all()
+            with lock:
+                results.update(local)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['clients']) as pool:
+            for index, periods in enumerate(plans):
+                pool.submit(run_client, index, periods)
+        elapsed = time.perf_counter() - started
+
+        attempts = sum(results.values())
+        double_booked = self._double_booked_days()
+        self.stdout.write(f"Clients:          {options['clients']}")
+        self.stdout.write(f"Resources:        {options['resources']}")
+        self.stdout.write(f"Attempts:         {attempts}")
+        self.stdout.write(f"Booked:           {results['booked']}")
+        self.stdout.write(f"Conflicts (409):  {results['conflict']}")
+        self.stdout.write(f"Lock retries:     {results['retry_failed']}")
+        self.stdout.write(f"Elapsed:          {elapsed:.2f}s")
+        self.stdout.write(f"Throughput:       {attempts / elapsed:.1f} attempts/s, "
+                          f"{results['booked'] / elapsed:.1f} bookings/s")
+
+        if not options['keep']:
+            Rental.objects.filter(customer_email=BENCHMARK_EMAIL).delete()
+            Resource.objects.filter(slug__startswith='benchmark-', rentals__isnull=True).delete()
+
+        if double_booked:
+            raise CommandError(f'Double bookings detected on {len(double_booked)} days: {double_booked[:10]}')
+        self.stdout.write(self.style.SUCCESS('Double bookings:  0'))
+
+    def _random_period(self, rng, start_day, horizon, max_length):
+        period_start = start_day + timedelta(days=rng.randrange(horizon))
+        return period_start, period_start + timedelta(days=rng.randrange(max_length))
+
+    def _book(self, index, resource, period_start, period_end, attempts=5):
+        for attempt in range(attempts):
+            try:
+                reservations.create_rental(
+                    f'Benchmark client {index}', BENCHMARK_EMAIL, period_start, period_end, resource=resource
+                )
+                return 'booked'
+            except reservations.BookingConflict:
+                return 'conflict'
+            except OperationalError:
+                # SQLite: "database is locked" bij schrijfcontentie
+                time.sleep(0.01 * (2 ** attempt))
+        return 'retry_failed'
+
+    def _double_booked_days(self):
+        """Controleer los van de claims: geen (resource, dag) in twee actieve benchmark reservaties"""
+        days = Counter()
+        rentals = (
+            Rental.objects.active()
+            .filter(customer_email=BENCHMARK_EMAIL)
+            .values_list('resource_id', 'start_date', 'end_date')
+        )
+        for resource_id, start_date, end_date in rentals.iterator():
+            days.update((resource_id, day) for day in reservations.rental_days(start_date, end_date))
+        return sorted(day for day, count in days.items() if count > 1)
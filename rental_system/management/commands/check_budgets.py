@@ -0,0 +1,307 @@
+"""
+CHECK_BUDGETS.PY - V13
+======================
+
+Performance budgets per endpoint (regressie check)
+Roept elke route uit rental_system/urls.py aan tegen een lokale
+WordPress stub, in een aparte test database, en vergelijkt met de
+budgetten in rental_system/performance_budgets.json:
+
+- max_queries:     SQL queries bij een koude request (caches leeg)
+- max_http_calls:  uitgaande HTTP calls bij een koude request
+- max_time_ratio:  mediane wall time van de warme requests gedeeld door
+                   die van de baseline route (api_health), zodat de check
+                   niet afhangt van de snelheid van de machine
+
+Gebruik: python manage.py check_budgets [--repeat 11] [--route api_status]
+         python manage.py check_budgets --update   (budgetten herschrijven)
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import json
+import os
+import statistics
+import threading
+import time
+from contextlib import ExitStack
+from datetime import date, timedelta
+from unittest import mock
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+import rental_system
+from rental_system.urls import urlpatterns
+
+DEFAULT_BUDGET_FILE = os.path.join(os.path.dirname(rental_system.__file__), 'performance_budgets.json')
+BASELINE_ROUTE = 'api_health'
+TIME_HEADROOM = 3.0
+MIN_TIME_RATIO = 4.0
+
+
+def _future(days):
+    return (date.today() + timedelta(days=days)).isoformat()
+
+
+def _batch_responses(body):
+    return {'responses': [{'status': 201, 'body': {'id': 5000 + n}, 'headers': {}} for n, _ in enumerate(body['requests'])]}
+
+
+def _json(data):
+    return {'data': json.dumps(data), 'content_type': 'application/json'}
+
+
+# Request per route; iteration telt per herhaling op (unieke data voor schrijvende routes)
+CASES = {
+    'index': lambda i: ('get', {}),
+    'api_health': lambda i: ('get', {}),
+    'api_user_session': lambda i: ('get', {}),
+    'api_availability': lambda i: ('get', {'data': {'start': _future(30), 'end': _future(89)}}),
+    'api_availability_matrix': lambda i: ('get', {'data': {'start': _future(0), 'end': _future(364)}}),
+    'api_availability_ics': lambda i: ('get', {}),
+    'api_analytics': lambda i: ('get', {'user': 'staff', 'data': {'granularity': 'month'}}),
+    'api_rentals': lambda i: ('get', {'user': 'staff', 'data': {'status': 'pending', 'limit': 5}}),
+    'api_calculate_price': lambda i: ('post', _json({
+        'formula': 'Weekend formule', 'start_date': _future(10), 'end_date': _future(12), 'km': 150,
+    })),
+    'api_create_reservation': lambda i: ('post', _json({
+        'customer_name': 'Budget', 'customer_email': 'budget@kroanworks.invalid',
+        'start_date': _future(400 + i * 7), 'end_date': _future(401 + i * 7), 'formula': 'Weekend formule',
+    })),
+    'api_create_reservations_bulk': lambda i: ('post', dict(_json({
+        'customer_name': 'Budget', 'customer_email': 'budget@kroanworks.invalid', 'items': [
+            {'start_date': _future(800 + i * 70 + day * 3), 'end_date': _future(801 + i * 70 + day * 3), 'formula': 'Weekend formule'}
+            for day in range(20)
+        ],
+    }), REMOTE_ADDR=f'10.45.0.{i + 1}')),  # eigen IP per herhaling (rate 5/m)
+    'api_login': lambda i: ('post', _json({'username': 'budget', 'password': 'budget'})),
+    'api_logout': lambda i: ('post', {}),
+    'api_status': lambda i: ('get', {}),
+    'api_wordpress_test': lambda i: ('get', {}),
+    'api_formulas': lambda i: ('get', {}),
+    'api_debug_formulas': lambda i: ('get', {}),
+    'api_info': lambda i: ('get', {}),
+}
+
+
+class WordPressStub:
+    """Vervangt requests.Session.request; antwoordt lokaal en telt de calls"""
+
+    ROUTES = [
+        ('/batch/v1', 207, _batch_responses),
+        ('/jwt-auth/v1/token', 200, {'token': 'stub', 'id': 1, 'username': 'budget', 'email': 'budget@kroanworks.invalid', 'name': 'Budget'}),
+        ('/wp/v2/reservations', 201, {'id': 4242}),
+        ('/wp/v2/users', 200, [{'id': 1, 'name': 'Budget'}]),
+        ('/wp/v2/posts', 200, []),
+    ]
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def request(self, session, method, url, *args, **kwargs):
+        with self._lock:
+            self.calls.append((method.upper(), url))
+        if self.latency:
+            time.sleep(self.latency)
+        status, payload = 200, {}
+        for fragment, route_status, route_payload in self.ROUTES:
+            if fragment in url:
+                status, payload = route_status, route_payload
+                if callable(payload):
+                    payload = payload(kwargs.get('json') or {})
+                break
+        response = requests.Response()
+        response.status_code = status
+        response.url = url
+        response.headers['Content-Type'] = 'application/json'
+        response._content = json.dumps(payload).encode('utf-8')
+        response.request = requests.Request(method, url).prepare()
+        return response
+
+    def patch(self):
+        stub = self
+
+        def request(session, method, url, *args, **kwargs):
+            return stub.request(session, method, url, *args, **kwargs)
+
+        return mock.patch.object(requests.Session, 'request', request)
+
+
+class Command(BaseCommand):
+    help = 'Check SQL, outbound HTTP and relative latency budgets for every rental_system route'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget-file', default=DEFAULT_BUDGET_FILE)
+        parser.add_argument('--repeat', type=int, default=11, help='Requests per route for the timing median')
+        parser.add_argument('--route', action='append', dest='routes', help='Only check this route name (repeatable)')
+        parser.add_argument('--wp-latency', type=float, default=0.0, help='Simulated WordPress latency in ms')
+        parser.add_argument('--update', action='store_true', help='Rewrite the budget file from this run')
+
+    def handle(self, *args, **options):
+        names = [pattern.name for pattern in urlpatterns if pattern.name]
+        unknown = set(options['routes'] or []) - set(names)
+        if unknown:
+            raise CommandError(f"Unknown route(s): {', '.join(sorted(unknown))}")
+        missing = [name for name in names if name not in CASES]
+        if missing:
+            raise CommandError(f"No request defined in check_budgets.CASES for route(s): {', '.join(missing)}")
+
+        budgets = self._load(options['budget_file'])
+        selected = [name for name in names if not options['routes'] or name in options['routes']]
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        # Replica's lezen uit dezelfde test database (zoals TEST MIRROR in de test runner)
+        for alias in getattr(settings, 'DATABASE_REPLICAS', []):
+            connections[alias].close()
+            connections[alias].creation.set_as_test_mirror(connection.settings_dict)
+        try:
+            with ExitStack() as stack:
+                stack.enter_context(override_settings(
+                    AVAILABILITY_PREFETCH_MONTHS=0,  # geen achtergrond threads tijdens het meten
+                    PROFILING_ENABLED=False,
+                    # Zelfde meting met elke CACHE_BACKEND: cache queries tellen niet mee
+                    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'check-budgets'}},
+                ))
+                stub = WordPressStub(options['wp_latency'] / 1000)
+                stack.enter_context(stub.patch())
+                clients = self._fixtures()
+                baseline = self._measure(BASELINE_ROUTE, clients, stub, options['repeat'])
+                results = {name: self._measure(name, clients, stub, options['repeat']) for name in selected}
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        self._report(results, baseline)
+        if options['update']:
+            self._write(options['budget_file'], budgets, results, baseline, names)
+            return
+
+        failures = self._check(results, baseline, budgets.get('routes', {}), names, options['routes'])
+        if failures:
+            raise CommandError('Performance budget exceeded:\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS(f'All {len(results)} routes within budget'))
+
+    def _load(self, path):
+        try:
+            with open(path, encoding='utf-8') as source:
+                return json.load(source)
+        except FileNotFoundError:
+            return {'routes': {}}
+
+    def _fixtures(self):
+        from django.contrib.auth.models import User
+        from rental_system import reservations
+        from rental_system.blackouts import get_calendar
+        from rental_system.models import Resource
+
+        resource = Resource.get_default()
+        for offset in range(0, 60, 6):
+            reservations.create_rental(
+                'Budget', 'budget@kroanworks.invalid', date.today() + timedelta(days=20 + offset),
+                date.today() + timedelta(days=22 + offset), resource=resource, formula='Weekend formule',
+            )
+        staff = User.objects.create_user('budget-staff', 'staff@kroanworks.invalid', 'budget', is_staff=True)
+        get_calendar()
+
+        staff_client = Client()
+        staff_client.force_login(staff)
+        return {None: Client(), 'staff': staff_client}
+
+    def _request(self, name, clients, iteration):
+        method, spec = CASES[name](iteration)
+        spec = dict(spec)
+        client = clients[spec.pop('user', None)]
+        return getattr(client, method)(reverse(name), **spec)
+
+    def _measure(self, name, clients, stub, repeat):
+        from rental_system.quotes import quote_cache
+
+        cache.clear()
+        quote_cache.clear()
+        timings = []
+        cold = None
+        for iteration in range(max(repeat, 1)):
+            calls_before = len(stub.calls)
+            with ExitStack() as stack:
+                captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+                started = time.perf_counter()
+                response = self._request(name, clients, iteration)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                timings.append(time.perf_counter() - started)
+            if cold is None:
+                cold = {
+                    'status': response.status_code,
+                    'queries': sum(len(context.captured_queries) for context in captured),
+                    'http_calls': len(stub.calls) - calls_before,
+                    'http': [f'{method} {url}' for method, url in stub.calls[calls_before:]],
+                    'sql': [query['sql'] for context in captured for query in context.captured_queries],
+                }
+        # Koude request telt voor queries/HTTP, de warme voor de tijd
+        return dict(cold, median=statistics.median(timings[1:] or timings))
+
+    def _report(self, results, baseline):
+        self.stdout.write(f"baseline {BASELINE_ROUTE}: {baseline['median'] * 1000:.2f} ms")
+        self.stdout.write(f"{'route':<30}{'status':>7}{'queries':>9}{'http':>6}{'ms':>9}{'ratio':>8}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<30}{result['status']:>7}{result['queries']:>9}{result['http_calls']:>6}"
+                f"{result['median'] * 1000:>9.2f}{result['median'] / baseline['median']:>8.1f}"
+            )
+
+    def _check(self, results, baseline, budgets, names, only):
+        failures = []
+        if not only:
+            failures += [f'{name}: no budget defined' for name in names if name not in budgets]
+            failures += [f'{name}: budget for a route that no longer exists' for name in budgets if name not in names]
+        for name, result in results.items():
+            budget = budgets.get(name)
+            if budget is None:
+                continue
+            if result['status'] >= 500:
+                failures.append(f"{name}: status {result['status']} (server error)")
+            if result['queries'] > budget['max_queries']:
+                failures.append(
+                    f"{name}: max_queries exceeded, {result['queries']} SQL queries > budget {budget['max_queries']}"
+                    + ''.join(f'\n      {sql[:160]}' for sql in result['sql'])
+                )
+            if result['http_calls'] > budget['max_http_calls']:
+                failures.append(
+                    f"{name}: max_http_calls exceeded, {result['http_calls']} outbound calls > budget {budget['max_http_calls']}"
+                    + ''.join(f'\n      {call}' for call in result['http'])
+                )
+            ratio = result['median'] / baseline['median']
+            if ratio > budget['max_time_ratio']:
+                failures.append(
+                    f"{name}: max_time_ratio exceeded, {ratio:.1f}x {BASELINE_ROUTE} "
+                    f"({result['median'] * 1000:.2f} ms) > budget {budget['max_time_ratio']}x"
+                )
+        return failures
+
+    def _write(self, path, budgets, results, baseline, names):
+        routes = dict(budgets.get('routes', {}))
+        for name, result in results.items():
+            routes[name] = {
+                'max_queries': result['queries'],
+                'max_http_calls': result['http_calls'],
+                'max_time_ratio': round(max(result['median'] / baseline['median'] * TIME_HEADROOM, MIN_TIME_RATIO), 1),
+            }
+        data = {
+            'baseline': BASELINE_ROUTE,
+            'routes': {name: routes[name] for name in names if name in routes},
+        }
+        with open(path, 'w', encoding='utf-8') as target:
+            json.dump(data, target, indent=2)
+            target.write('\n')
+        self.stdout.write(self.style.SUCCESS(f'Budgets written to {path}'))
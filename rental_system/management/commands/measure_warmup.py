@@ -0,0 +1,83 @@
+"""
+MEASURE_WARMUP.PY - V13
+=======================
+
+Meet time-to-first-good-response van een vers proces, met en zonder
+warm-up. Elke meting draait in een nieuw Python proces (zoals een
+nieuwe gunicorn worker) en doet de eerste requests via de test client.
+
+Gebruik: python manage.py measure_warmup [--runs 3] [--url /api/formulas]
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+DEFAULT_URLS = ['/', '/api/availability', '/api/formulas']
+CHILD_HELP = 'Internal: run one measurement in this process and print JSON'
+
+
+class Command(BaseCommand):
+    help = 'Measure time-to-first-good-response of a fresh process, cold vs warmed up'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3)
+        parser.add_argument('--url', action='append', dest='urls', help='URL to request (repeatable)')
+        parser.add_argument('--child', choices=['cold', 'warm'], help=CHILD_HELP)
+
+    def handle(self, *args, **options):
+        urls = options['urls'] or DEFAULT_URLS
+        if options['child']:
+            self.stdout.write(json.dumps(self._measure_child(urls, options['child'] == 'warm')))
+            return
+
+        for mode in ('cold', 'warm'):
+            runs = [self._spawn(mode, urls) for _ in range(options['runs'])]
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{mode}:'))
+            self.stdout.write(f"  warm-up:          {statistics.median(r['warmup_ms'] for r in runs):8.1f} ms")
+            for url in urls:
+                latencies = [r['first_response_ms'][url] for r in runs if r['first_response_ms'][url] is not None]
+                if latencies:
+                    self.stdout.write(f"  first {url:<28} {statistics.median(latencies):8.1f} ms")
+                else:
+                    self.stdout.write(self.style.ERROR(f"  first {url:<28}   no good response"))
+            total = [sum(v or 0 for v in r['first_response_ms'].values()) for r in runs]
+            self.stdout.write(f"  all first responses: {statistics.median(total):8.1f} ms (median of {len(runs)})")
+
+    def _spawn(self, mode, urls):
+        command = [sys.executable, sys.argv[0], 'measure_warmup', '--child', mode]
+        for url in urls:
+            command += ['--url', url]
+        env = dict(os.environ, WARMUP_ENABLED='False')
+        output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    def _measure_child(self, urls, warm):
+        from django.conf import settings
+        from django.test import Client
+        from rental_system import warmup
+
+        if 'testserver' not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = list(settings.ALLOWED_HOSTS) + ['testserver']
+
+        started = time.perf_counter()
+        if warm:
+            warmup.warm_up()
+        warmup_ms = (time.perf_counter() - started) * 1000
+
+        client = Client()
+        first_response_ms = {}
+        for url in urls:
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = (time.perf_counter() - started) * 1000
+            first_response_ms[url] = round(elapsed, 1) if response.status_code < 400 else None
+        return {'warmup_ms': round(warmup_ms, 1), 'first_response_ms': first_response_ms}
@@ -0,0 +1,33 @@
+"""
+PROFILING_TOKEN.PY - V13
+========================
+
+Maak een ondertekend token om één of meer requests te profilen
+(zie rental_system/profiling.py). Geldig tot PROFILING_TOKEN_MAX_AGE.
+
+Gebruik: python manage.py profiling_token [--label naam]
+         curl -H "X-Profile-Token: <token>" https://.../api/availability
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from rental_system.profiling import TOKEN_PARAM, make_token
+
+
+class Command(BaseCommand):
+    help = 'Create a signed token that enables per-request profiling'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--label', default='manual', help='Label stored in the profile summary')
+
+    def handle(self, *args, **options):
+        token = make_token(options['label'])
+        self.stdout.write(token)
+        max_age = getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600)
+        self.stderr.write(f'Valid for {max_age}s. Send as header X-Profile-Token or query ?{TOKEN_PARAM}=<token>.')
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            self.stderr.write(self.style.WARNING('PROFILING_ENABLED is off: requests will not be profiled.'))
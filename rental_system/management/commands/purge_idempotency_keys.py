@@ -0,0 +1,23 @@
+"""
+PURGE_IDEMPOTENCY_KEYS.PY - V13
+===============================
+
+Verwijder verlopen Idempotency-Key records (zie rental_system/idempotency.py)
+
+Gebruik: python manage.py purge_idempotency_keys
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+from django.core.management.base import BaseCommand
+
+from rental_system.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete expired idempotency records'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency records'))
@@ -0,0 +1,45 @@
+"""
+REBUILD_OCCUPANCY.PY - V13
+==========================
+
+Volledige herbouw van de gematerialiseerde bezetting (DailyOccupancy)
+en de dag-claims (BookingClaim) uit de actieve reservaties
+Voor herstel na bulk updates of handmatige database wijzigingen.
+
+Gebruik: python manage.py rebuild_occupancy [--resource slug]
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rental_system.availability import rebuild_occupancy
+from rental_system.models import Resource
+from rental_system.reservations import rebuild_claims
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily occupancy and booking claim tables from all rentals'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resource', help='Only rebuild this resource (slug)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        resource = None
+        if options['resource']:
+            try:
+                resource = Resource.objects.get(slug=options['resource'])
+            except Resource.DoesNotExist:
+                raise CommandError(f"Unknown resource: {options['resource']}")
+
+        started = time.perf_counter()
+        claimed = rebuild_claims(resource, batch_size=options['batch_size'])
+        created = rebuild_occupancy(resource, batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {claimed} claimed and {created} occupied days in {elapsed:.2f}s'
+        ))
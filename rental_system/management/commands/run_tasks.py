@@ -0,0 +1,109 @@
+"""
+RUN_TASKS.PY - V13
+==================
+
+Worker voor de takenwachtrij in de database (zie rental_system/taskqueue.py)
+Claimt taken die klaar zijn en voert ze uit op een pool van threads.
+Meerdere workers (processen of machines) kunnen naast elkaar draaien.
+SIGTERM/SIGINT: geen nieuwe taken meer, lopende taken afwerken.
+
+Gebruik: python manage.py run_tasks [--concurrency 4] [--poll-interval 1.0]
+         python manage.py run_tasks --burst   (stoppen als de wachtrij leeg is)
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait as wait_futures
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from rental_system import taskqueue
+
+REQUEUE_INTERVAL = 60
+PURGE_INTERVAL = 3600
+
+
+def _run(claimed):
+    try:
+        return taskqueue.run_task(claimed)
+    finally:
+        # Elke thread heeft eigen database connecties
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Run background tasks from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='Tasks running at the same time')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls when idle')
+        parser.add_argument('--burst', action='store_true', help='Exit when no task is ready')
+        parser.add_argument('--max-tasks', type=int, default=0, help='Exit after this many tasks (0 = no limit)')
+        parser.add_argument('--worker-id', default=f'{socket.gethostname()}:{os.getpid()}')
+
+    def handle(self, *args, **options):
+        self.stopping = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self._stop)
+
+        concurrency = max(options['concurrency'], 1)
+        worker = options['worker_id'][:100]
+        self.stdout.write(
+            f"Worker {worker}: concurrency {concurrency}, tasks: {', '.join(taskqueue.registered_tasks())}"
+        )
+
+        done = succeeded = 0
+        next_requeue = next_purge = 0.0
+        running = set()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='task-worker') as pool:
+            while not self.stopping.is_set():
+                now = time.monotonic()
+                if now >= next_requeue:
+                    requeued = taskqueue.requeue_stale()
+                    if requeued:
+                        self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale tasks'))
+                    next_requeue = now + REQUEUE_INTERVAL
+                if now >= next_purge:
+                    taskqueue.purge_finished()
+                    next_purge = now + PURGE_INTERVAL
+
+                free = concurrency - len(running)
+                if options['max_tasks']:
+                    free = min(free, options['max_tasks'] - done - len(running))
+                claimed = taskqueue.claim(worker, free) if free > 0 else []
+                running.update(pool.submit(_run, task) for task in claimed)
+
+                if not running:
+                    if options['burst'] or (options['max_tasks'] and done >= options['max_tasks']):
+                        break
+                    self.stopping.wait(options['poll_interval'])
+                    continue
+
+                # Pool vol: wachten op een vrije plaats; wachtrij leeg: hooguit het poll interval
+                if len(running) >= concurrency:
+                    timeout = None
+                elif claimed:
+                    timeout = 0
+                else:
+                    timeout = options['poll_interval']
+                finished, running = wait_futures(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                done += len(finished)
+                succeeded += sum(1 for future in finished if future.result())
+
+            finished, _ = wait_futures(running)
+            done += len(finished)
+            succeeded += sum(1 for future in finished if future.result())
+
+        connections.close_all()
+        self.stdout.write(self.style.SUCCESS(f'Worker {worker} stopped: {done} tasks, {succeeded} succeeded'))
+
+    def _stop(self, signum, frame):
+        self.stdout.write(f'Signal {signum}: finishing running tasks')
+        self.stopping.set()
@@ -0,0 +1,60 @@
+"""
+SETTLE_RENTALS.PY - V13
+=======================
+
+Maandafrekening: eindbedrag, voorschot en terug te storten waarborg
+voor alle afgelopen reservaties (zie rental_system/settlement.py).
+
+Gebruik: python manage.py settle_rentals [--until 2026-10-31] [--chunk-size 5000]
+                                         [--resettle] [--dry-run] [--no-numpy]
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import time
+from datetime import date, datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rental_system import settlement
+
+
+class Command(BaseCommand):
+    help = 'Compute final amount, advance and deposit refund for all ended rentals'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--until', help='Settle rentals that ended on or before this date (default: today)')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--resettle', action='store_true', help='Also recompute already settled rentals')
+        parser.add_argument('--dry-run', action='store_true', help='Compute but do not write anything')
+        parser.add_argument('--no-numpy', action='store_true', help='Force the pure Python computation')
+
+    def handle(self, *args, **options):
+        try:
+            until = datetime.strptime(options['until'], '%Y-%m-%d').date() if options['until'] else date.today()
+        except ValueError:
+            raise CommandError('--until must be a date (YYYY-MM-DD)')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        use_numpy = settlement.numpy is not None and not options['no_numpy']
+        started = time.perf_counter()
+        stats = settlement.settle_rentals(
+            until,
+            chunk_size=options['chunk_size'],
+            resettle=options['resettle'],
+            dry_run=options['dry_run'],
+            use_numpy=use_numpy,
+        )
+        elapsed = time.perf_counter() - started
+
+        rate = stats['read'] / elapsed if elapsed > 0 else 0
+        verb = 'Would settle' if options['dry_run'] else 'Settled'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {stats['settled']} rentals until {until} in {elapsed:.2f}s "
+            f"({rate:,.0f} rows/s, {'numpy' if use_numpy else 'python'})"
+        ))
+        self.stdout.write(f"  total final amount: € {stats['total_cents'] / 100:,.2f}")
+        if stats['skipped']:
+            self.stdout.write(self.style.WARNING(f"  skipped {stats['skipped']} rentals with an unknown formula"))
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental_system', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingClaim',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('rental', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='claims', to='rental_system.rental')),
+            ],
+            options={
+                'verbose_name': 'Booking claim',
+                'verbose_name_plural': 'Booking claims',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='bookingclaim',
+            constraint=models.UniqueConstraint(fields=('day',), name='unique_booking_claim_day'),
+        ),
+    ]
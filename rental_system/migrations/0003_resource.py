@@ -0,0 +1,70 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import rental_system.models
+
+
+def create_default_resource(apps, schema_editor):
+    """Bestaande reservaties en claims horen bij het standaard voertuig"""
+    Resource = apps.get_model('rental_system', 'Resource')
+    Rental = apps.get_model('rental_system', 'Rental')
+    BookingClaim = apps.get_model('rental_system', 'BookingClaim')
+
+    resource, _ = Resource.objects.get_or_create(
+        slug='standaard', defaults={'name': 'Standaard voertuig'}
+    )
+    Rental.objects.filter(resource__isnull=True).update(resource=resource)
+    BookingClaim.objects.filter(resource__isnull=True).update(resource=resource)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental_system', '0002_bookingclaim_bookingclaim_unique_booking_claim_day'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Resource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(unique=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('sort_order', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Resource',
+                'verbose_name_plural': 'Resources',
+                'ordering': ['sort_order', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='rental',
+            name='resource',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='rentals', to='rental_system.resource'),
+        ),
+        migrations.AddField(
+            model_name='bookingclaim',
+            name='resource',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='claims', to='rental_system.resource'),
+        ),
+        migrations.RunPython(create_default_resource, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='rental',
+            name='resource',
+            field=models.ForeignKey(default=rental_system.models.default_resource_id, on_delete=django.db.models.deletion.PROTECT, related_name='rentals', to='rental_system.resource'),
+        ),
+        migrations.AlterField(
+            model_name='bookingclaim',
+            name='resource',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='claims', to='rental_system.resource'),
+        ),
+        migrations.RemoveConstraint(
+            model_name='bookingclaim',
+            name='unique_booking_claim_day',
+        ),
+        migrations.AddConstraint(
+            model_name='bookingclaim',
+            constraint=models.UniqueConstraint(fields=('resource', 'day'), name='unique_booking_claim_resource_day'),
+        ),
+    ]
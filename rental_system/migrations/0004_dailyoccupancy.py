@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental_system', '0003_resource'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('day_type', models.CharField(max_length=20)),
+                ('rental', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='rental_system.rental')),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='rental_system.resource')),
+            ],
+            options={
+                'verbose_name': 'Daily occupancy',
+                'verbose_name_plural': 'Daily occupancy',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyoccupancy',
+            constraint=models.UniqueConstraint(fields=('resource', 'day'), name='unique_occupancy_resource_day'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental_system', '0004_dailyoccupancy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rental',
+            name='advance_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='rental',
+            name='deposit_refund',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='rental',
+            name='final_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='rental',
+            name='formula',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='rental',
+            name='km_driven',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='rental',
+            name='settled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental_system', '0005_rental_settlement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlackoutRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('kind', models.CharField(choices=[('date', 'Eenmalig (datum of periode)'), ('yearly', 'Jaarlijks (zelfde dag elk jaar)'), ('weekly', 'Wekelijks (weekdag)'), ('season', 'Seizoen (jaarlijkse periode)')], default='date', max_length=10)),
+                ('action', models.CharField(choices=[('block', 'Gesloten'), ('open', 'Open (uitzondering)')], default='block', max_length=10)),
+                ('start_date', models.DateField(blank=True, help_text='Eenmalig/jaarlijks/seizoen: (eerste) dag. Wekelijks: geldig vanaf (optioneel)', null=True)),
+                ('end_date', models.DateField(blank=True, help_text='Laatste dag (inclusief). Jaarlijks/seizoen: het jaartal wordt genegeerd', null=True)),
+                ('weekday', models.PositiveSmallIntegerField(blank=True, choices=[(0, 'Maandag'), (1, 'Dinsdag'), (2, 'Woensdag'), (3, 'Donderdag'), (4, 'Vrijdag'), (5, 'Zaterdag'), (6, 'Zondag')], null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('resource', models.ForeignKey(blank=True, help_text='Leeg: geldt voor alle resources', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='blackout_rules', to='rental_system.resource')),
+            ],
+            options={
+                'verbose_name': 'Blackout rule',
+                'verbose_name_plural': 'Blackout rules',
+                'ordering': ['resource_id', 'kind', 'start_date'],
+            },
+        ),
+    ]
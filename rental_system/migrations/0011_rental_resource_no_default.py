@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental_system', '0010_cacheversion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rental',
+            name='resource',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='rentals', to='rental_system.resource'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:43
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rental_system', '0011_rental_resource_no_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cacheversion',
+            name='bumped_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
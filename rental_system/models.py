@@ -13,18 +13,316 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+
+class ResourceQuerySet(models.QuerySet):
+    """Queryset helpers voor verhuurbare resources"""
+
+    def active(self):
+        return self.filter(is_active=True)
+
+
+class Resource(models.Model):
+    """Verhuurbaar voertuig of item uit de vloot"""
+    DEFAULT_SLUG = 'standaard'
+
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=50, unique=True)
+    is_active = models.BooleanField(default=True)
+    sort_order = models.PositiveIntegerField(default=0)
+
+    objects = ResourceQuerySet.as_manager()
+
+    def __str__(self):
+        return self.name
+
+    @classmethod
+    def get_default(cls):
+        """Standaard resource voor reservaties zonder expliciete resource"""
+        resource = cls.objects.active().order_by('sort_order', 'id').first()
+        if resource is None:
+            resource, _ = cls.objects.get_or_create(
+                slug=cls.DEFAULT_SLUG, defaults={'name': 'Standaard voertuig'}
+            )
+        return resource
+
+    class Meta:
+        verbose_name = "Resource"
+        verbose_name_plural = "Resources"
+        ordering = ['sort_order', 'id']
+
+
+def default_resource_id():
+    # Alleen nog voor migratie 0003; Rental.save() kiest de standaard resource
+    return Resource.get_default().pk
+
+
+class RentalQuerySet(models.QuerySet):
+    """Queryset helpers voor kalender bezetting"""
+
+    def active(self):
+        """Reservaties die dagen bezetten (geannuleerde niet)"""
+        return self.exclude(status__in=Rental.INACTIVE_STATUSES)
+
+    def overlapping(self, start_date, end_date):
+        """Reservaties die (deels) binnen start_date..end_date vallen"""
+        return self.filter(start_date__lte=end_date, end_date__gte=start_date)
+
+
 class Rental(models.Model):
     """Model voor rental data"""
+    # Statussen die de kalender niet (meer) bezetten
+    INACTIVE_STATUSES = ('cancelled',)
+
+    resource = models.ForeignKey(Resource, on_delete=models.PROTECT, related_name='rentals')
     customer_name = models.CharField(max_length=100)
     customer_email = models.EmailField()
     start_date = models.DateField()
     end_date = models.DateField()
     status = models.CharField(max_length=20, default='pending')
+    formula = models.CharField(max_length=100, blank=True, default='')
+
+    # Afrekening (zie `manage.py settle_rentals`)
+    km_driven = models.PositiveIntegerField(null=True, blank=True)
+    final_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    advance_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    deposit_refund = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    settled_at = models.DateTimeField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = RentalQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.customer_name} - {self.start_date}"
-    
+
+    def save(self, *args, **kwargs):
+        # Standaard resource pas bij het opslaan: Rental() zelf doet geen queries
+        if self.resource_id is None:
+            self.resource = Resource.get_default()
+        super().save(*args, **kwargs)
+
+    def clean(self):
+        """Admin: overlap als formulierfout, niet als IntegrityError bij het opslaan"""
+        from django.core.exceptions import ValidationError
+        if not (self.start_date and self.end_date and self.resource_id):
+            return
+        if self.end_date < self.start_date:
+            raise ValidationError({'end_date': 'Moet op of na de startdatum liggen'})
+        if self.status in self.INACTIVE_STATUSES:
+            return
+        taken = BookingClaim.objects.filter(
+            resource_id=self.resource_id, day__range=(self.start_date, self.end_date)
+        )
+        if self.pk is not None:
+            taken = taken.exclude(rental_id=self.pk)
+        if taken.exists():
+            raise ValidationError(
+                f'Periode {self.start_date} - {self.end_date} is (deels) al geboekt voor {self.resource}'
+            )
+
     class Meta:
         verbose_name = "Rental"
-        verbose_name_plural = "Rentals"
\ No newline at end of file
+        verbose_name_plural = "Rentals"
+        indexes = [
+            # Keyset paginering van api/rentals, met en zonder status filter
+            models.Index(fields=['created_at', 'id'], name='rental_created_id_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='rental_status_created_id_idx'),
+            models.Index(fields=['start_date'], name='rental_start_date_idx'),
+        ]
+
+
+class BookingClaim(models.Model):
+    """
+    Eén geclaimde dag per resource en reservatie.
+    De unieke constraint op (resource, dag) laat overlappende claims atomisch falen.
+    """
+    rental = models.ForeignKey(Rental, on_delete=models.CASCADE, related_name='claims')
+    resource = models.ForeignKey(Resource, on_delete=models.CASCADE, related_name='claims')
+    day = models.DateField()
+
+    def __str__(self):
+        return f"{self.day} - resource {self.resource_id} - rental {self.rental_id}"
+
+    class Meta:
+        verbose_name = "Booking claim"
+        verbose_name_plural = "Booking claims"
+        constraints = [
+            models.UniqueConstraint(fields=['resource', 'day'], name='unique_booking_claim_resource_day'),
+        ]
+
+
+
+class DailyOccupancy(models.Model):
+    """
+    Gematerialiseerde bezetting per resource en dag, inclusief dagprijs.
+    Wordt bijgewerkt bij elke wijziging van een Rental (zie signals.py)
+    en kan volledig herbouwd worden met `manage.py rebuild_occupancy`.
+    """
+    resource = models.ForeignKey(Resource, on_delete=models.CASCADE, related_name='occupancy')
+    day = models.DateField()
+    rental = models.ForeignKey(Rental, on_delete=models.CASCADE, related_name='occupancy')
+    price = models.DecimalField(max_digits=8, decimal_places=2)
+    day_type = models.CharField(max_length=20)
+
+    def __str__(self):
+        return f"{self.resource_id} - {self.day}"
+
+    class Meta:
+        verbose_name = "Daily occupancy"
+        verbose_name_plural = "Daily occupancy"
+        constraints = [
+            models.UniqueConstraint(fields=['resource', 'day'], name='unique_occupancy_resource_day'),
+        ]
+
+
+class CacheVersion(models.Model):
+    """
+    Versieteller per cache namespace (zie cache_versions.py).
+    In de database zodat elk proces (web workers, run_tasks, commands)
+    dezelfde versie ziet, ook met een cache per proces.
+    """
+    namespace = models.CharField(max_length=50, primary_key=True)
+    version = models.PositiveBigIntegerField(default=1)
+    bumped_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.namespace} v{self.version}"
+
+    class Meta:
+        verbose_name = "Cache version"
+        verbose_name_plural = "Cache versions"
+
+
+class BlackoutRule(models.Model):
+    """
+    Gesloten dagen: eenmalig, jaarlijks, wekelijks of een seizoen.
+    Zonder resource geldt de regel voor de hele vloot; een regel met
+    resource en actie 'open' maakt een globale sluiting ongedaan voor
+    die resource. Wordt gecompileerd door rental_system/blackouts.py.
+    """
+    ONE_OFF = 'date'
+    YEARLY = 'yearly'
+    WEEKLY = 'weekly'
+    SEASON = 'season'
+    KIND_CHOICES = [
+        (ONE_OFF, 'Eenmalig (datum of periode)'),
+        (YEARLY, 'Jaarlijks (zelfde dag elk jaar)'),
+        (WEEKLY, 'Wekelijks (weekdag)'),
+        (SEASON, 'Seizoen (jaarlijkse periode)'),
+    ]
+
+    BLOCK = 'block'
+    OPEN = 'open'
+    ACTION_CHOICES = [(BLOCK, 'Gesloten'), (OPEN, 'Open (uitzondering)')]
+
+    WEEKDAY_CHOICES = [
+        (0, 'Maandag'), (1, 'Dinsdag'), (2, 'Woensdag'), (3, 'Donderdag'),
+        (4, 'Vrijdag'), (5, 'Zaterdag'), (6, 'Zondag'),
+    ]
+
+    name = models.CharField(max_length=100)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=ONE_OFF)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, default=BLOCK)
+    resource = models.ForeignKey(
+        Resource, on_delete=models.CASCADE, related_name='blackout_rules', null=True, blank=True,
+        help_text='Leeg: geldt voor alle resources'
+    )
+    start_date = models.DateField(
+        null=True, blank=True,
+        help_text='Eenmalig/jaarlijks/seizoen: (eerste) dag. Wekelijks: geldig vanaf (optioneel)'
+    )
+    end_date = models.DateField(
+        null=True, blank=True,
+        help_text='Laatste dag (inclusief). Jaarlijks/seizoen: het jaartal wordt genegeerd'
+    )
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES, null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.get_kind_display()})"
+
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        if self.kind == self.WEEKLY and self.weekday is None:
+            raise ValidationError({'weekday': 'Verplicht voor een wekelijkse regel'})
+        if self.kind != self.WEEKLY and self.start_date is None:
+            raise ValidationError({'start_date': 'Verplicht voor deze regel'})
+        if self.kind in (self.ONE_OFF, self.WEEKLY) and self.start_date and self.end_date and self.end_date < self.start_date:
+            raise ValidationError({'end_date': 'Moet op of na de startdatum liggen'})
+
+    class Meta:
+        verbose_name = "Blackout rule"
+        verbose_name_plural = "Blackout rules"
+        ordering = ['resource_id', 'kind', 'start_date']
+
+
+class IdempotencyRecord(models.Model):
+    """
+    Opgeslagen response per Idempotency-Key (zie idempotency.py).
+    Zolang de eerste request loopt is de status 'in_progress'; daarna
+    wordt de response byte voor byte bewaard tot expires_at.
+    """
+    IN_PROGRESS = 'in_progress'
+    COMPLETED = 'completed'
+    STATE_CHOICES = [(IN_PROGRESS, 'In progress'), (COMPLETED, 'Completed')]
+
+    scope = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    principal = models.CharField(max_length=150, blank=True, default='')
+    request_hash = models.CharField(max_length=64)
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default=IN_PROGRESS)
+    locked_at = models.DateTimeField()
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_content_type = models.CharField(max_length=100, blank=True, default='')
+    response_body = models.BinaryField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.scope}:{self.key} ({self.state})"
+
+    class Meta:
+        verbose_name = "Idempotency record"
+        verbose_name_plural = "Idempotency records"
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'principal', 'key'], name='unique_idempotency_key'),
+        ]
+
+
+class Task(models.Model):
+    """
+    Achtergrondtaak in de database (zie taskqueue.py en `manage.py run_tasks`).
+    queued -> running -> done, of terug naar queued met een latere run_at
+    zolang er pogingen over zijn; daarna failed.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    name = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    unique_key = models.CharField(max_length=200, blank=True, default='')
+    run_at = models.DateTimeField()
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
+
+    class Meta:
+        verbose_name = "Task"
+        verbose_name_plural = "Tasks"
+        indexes = [
+            # Claimen: volgende taken die klaar zijn om te draaien
+            models.Index(fields=['status', 'run_at', 'id'], name='task_status_run_at_idx'),
+            models.Index(fields=['unique_key', 'status'], name='task_unique_key_idx'),
+        ]
@@ -0,0 +1,95 @@
+"""
+PAGE_CACHE.PY - V13
+===================
+
+Gecachte rendering van de kalenderpagina per doelgroep
+De pagina wordt één keer gerenderd per (ingelogd/anoniem, taal,
+formule catalogus, beschikbaarheid versie, WordPress status) en zonder
+request context opgeslagen. Per-gebruiker stukjes worden als
+placeholder gerenderd en per request goedkoop ingevuld.
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils import translation
+from django.utils.html import escape
+
+from .cache_versions import AVAILABILITY, get_versions
+from .formulas import catalogue_version
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'page:v1'
+WORDPRESS_STATUS_KEY = f'{CACHE_PREFIX}:wordpress_status'
+
+USERNAME_PLACEHOLDER = '__KW_USER_USERNAME__'
+EMAIL_PLACEHOLDER = '__KW_USER_EMAIL__'
+
+
+def wordpress_available(client_factory):
+    """WordPress probe, kort gecached zodat niet elke page view upstream gaat"""
+    status = cache.get(WORDPRESS_STATUS_KEY)
+    if status is None:
+        status = bool(client_factory().test_connection().get('success', False))
+        cache.set(WORDPRESS_STATUS_KEY, status, getattr(settings, 'WORDPRESS_STATUS_CACHE_TIMEOUT', 30))
+    return status
+
+
+def is_authenticated(request):
+    return bool(getattr(request, 'user', None) and request.user.is_authenticated)
+
+
+def page_key(name, request, is_wordpress_available):
+    versions = get_versions(AVAILABILITY)
+    return ':'.join([
+        CACHE_PREFIX,
+        name,
+        'auth' if is_authenticated(request) else 'anon',
+        translation.get_language() or settings.LANGUAGE_CODE,
+        catalogue_version(),
+        str(versions[AVAILABILITY]),
+        'wp1' if is_wordpress_available else 'wp0',
+    ])
+
+
+def audience_user_info(request):
+    """user_info met placeholders in plaats van de echte gebruikersgegevens"""
+    if is_authenticated(request):
+        return {
+            'username': USERNAME_PLACEHOLDER,
+            'email': EMAIL_PLACEHOLDER,
+            'authenticated': True
+        }
+    return {'authenticated': False}
+
+
+def personalise(html, request):
+    """Vul de per-gebruiker placeholders in (ge-escaped)"""
+    if not is_authenticated(request):
+        return html
+    return (
+        html
+        .replace(USERNAME_PLACEHOLDER, escape(request.user.username))
+        .replace(EMAIL_PLACEHOLDER, escape(getattr(request.user, 'email', '')))
+    )
+
+
+def get_or_render(key, template_name, context):
+    """
+    Gecachte HTML of nieuw renderen. Renderen gebeurt zonder request,
+    zodat er nooit gegevens van één bezoeker in de cache belanden.
+    Geeft (html, cache_hit) terug.
+    """
+    html = cache.get(key)
+    if html is not None:
+        return html, True
+    html = render_to_string(template_name, context)
+    cache.set(key, html, getattr(settings, 'CALENDAR_PAGE_CACHE_TIMEOUT', 300))
+    logger.info(f"Calendar page rendered and cached: {key}")
+    return html, False
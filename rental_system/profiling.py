@@ -0,0 +1,261 @@
+"""
+PROFILING.PY - V13
+==================
+
+Profiling op aanvraag in productie, zonder debug toolbar
+Een request wordt geprofiled als PROFILING_ENABLED aan staat en:
+
+- het een geldig, ondertekend token meestuurt (header X-Profile-Token
+  of ?_profile=...), aan te maken met `manage.py profiling_token`, of
+- het uitgeloot wordt door PROFILING_SAMPLE_RATE (0.0 - 1.0).
+
+Per geprofilede request worden weggeschreven in PROFILING_DIR:
+- <id>.prof       cProfile data (snakeviz, pstats)
+- <id>.collapsed  collapsed stacks van een sampling thread
+                  (flamegraph.pl, speedscope)
+- <id>.json       samenvatting: wall time, SQL en WordPress calls
+
+Oude profielen worden opgeruimd (PROFILING_MAX_PROFILES, PROFILING_MAX_AGE).
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import contextvars
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = 'rental_system.profiling'
+TOKEN_HEADER = 'HTTP_X_PROFILE_TOKEN'
+TOKEN_PARAM = '_profile'
+SUFFIXES = ('.prof', '.collapsed', '.json')
+
+_current = contextvars.ContextVar('rental_system_profile', default=None)
+
+
+def make_token(label='manual'):
+    """Ondertekend token; geldig tot PROFILING_TOKEN_MAX_AGE na aanmaak"""
+    return signing.dumps({'label': label}, salt=TOKEN_SALT, compress=True)
+
+
+def check_token(token):
+    """Label uit het token, of None als het ongeldig of verlopen is"""
+    if not token:
+        return None
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT, max_age=getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600))
+    except signing.BadSignature:
+        return None
+    return payload.get('label', 'token')
+
+
+def record_call(kind, label, seconds):
+    """Tijd toeschrijven aan het lopende profiel ('wordpress', 'sql'), als er een is"""
+    profile = _current.get()
+    if profile is not None:
+        profile.record(kind, label, seconds)
+
+
+class StackSampler(threading.Thread):
+    """Neemt op een vast interval de stack van één thread op (collapsed formaat)"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='profiling-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class RequestProfile:
+    """Alles wat tijdens één geprofilede request verzameld wordt"""
+
+    def __init__(self, request, reason):
+        self.request = request
+        self.reason = reason
+        self.calls = {'sql': [], 'wordpress': []}
+        self._lock = threading.Lock()
+
+    def record(self, kind, label, seconds):
+        with self._lock:
+            self.calls.setdefault(kind, []).append((label, seconds))
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record('sql', sql, time.perf_counter() - started)
+
+    def summary(self, wall, status_code):
+        summary = {
+            'method': self.request.method,
+            'path': self.request.path,
+            'status': status_code,
+            'reason': self.reason,
+            'wall_ms': round(wall * 1000, 2),
+        }
+        for kind, calls in self.calls.items():
+            total = sum(seconds for _, seconds in calls)
+            by_label = Counter()
+            for label, seconds in calls:
+                by_label[label] += seconds
+            summary[kind] = {
+                'calls': len(calls),
+                'ms': round(total * 1000, 2),
+                'share': round(total / wall, 4) if wall else 0.0,
+                'top': [
+                    {'label': label[:300], 'ms': round(seconds * 1000, 2)}
+                    for label, seconds in by_label.most_common(10)
+                ],
+            }
+        return summary
+
+
+def _profile_id(request, wall):
+    slug = re.sub(r'[^a-zA-Z0-9]+', '-', request.path).strip('-')[:60] or 'root'
+    return f'{time.strftime("%Y%m%d-%H%M%S")}-{int(time.time() * 1000) % 1000:03d}-{request.method.lower()}-{slug}-{int(wall * 1000)}ms'
+
+
+def prune(directory, max_profiles, max_age):
+    """Verwijder profielen ouder dan max_age seconden en alles boven max_profiles"""
+    try:
+        entries = [entry for entry in os.scandir(directory) if entry.name.endswith(SUFFIXES)]
+    except FileNotFoundError:
+        return 0
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    now = time.time()
+    keep_ids = set()
+    removed = 0
+    for entry in entries:
+        profile_id = entry.name.rsplit('.', 1)[0]
+        too_old = now - entry.stat().st_mtime > max_age
+        if not too_old and (profile_id in keep_ids or len(keep_ids) < max_profiles):
+            keep_ids.add(profile_id)
+            continue
+        try:
+            os.remove(entry.path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+class ProfilingMiddleware:
+    """
+    Profileer requests met een geldig token of volgens de sampling rate.
+    Plaats vroeg in MIDDLEWARE, zodat de rest van de stack meegeteld wordt.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'PROFILING_ENABLED', False)
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+        self.directory = str(getattr(settings, 'PROFILING_DIR', os.path.join(settings.BASE_DIR, 'profiles')))
+        self.interval = getattr(settings, 'PROFILING_SAMPLE_INTERVAL', 0.005)
+        self.use_cprofile = getattr(settings, 'PROFILING_CPROFILE', True)
+
+    def __call__(self, request):
+        reason = self.reason(request) if self.enabled else None
+        if reason is None:
+            return self.get_response(request)
+        return self.profile(request, reason)
+
+    def reason(self, request):
+        token = request.META.get(TOKEN_HEADER) or request.GET.get(TOKEN_PARAM)
+        if token:
+            label = check_token(token)
+            if label is not None:
+                return f'token:{label}'
+            logger.warning(f"⚠️ Invalid profiling token for {request.path}")
+        if self.sample_rate and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    def profile(self, request, reason):
+        profile = RequestProfile(request, reason)
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        profiler = cProfile.Profile() if self.use_cprofile else None
+        context_token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(profile.sql_wrapper))
+                sampler.start()
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+                    sampler.stop()
+        finally:
+            _current.reset(context_token)
+        wall = time.perf_counter() - started
+
+        summary = profile.summary(wall, response.status_code)
+        try:
+            profile_id = self.save(request, wall, profiler, sampler, summary)
+            response['X-Profile-Id'] = profile_id
+        except OSError as e:
+            logger.error(f"❌ Could not write profile: {str(e)}")
+        response['Server-Timing'] = ', '.join([
+            f"app;dur={summary['wall_ms']}",
+            f"db;dur={summary['sql']['ms']}",
+            f"wp;dur={summary['wordpress']['ms']}",
+        ])
+        return response
+
+    def save(self, request, wall, profiler, sampler, summary):
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = _profile_id(request, wall)
+        path = os.path.join(self.directory, profile_id)
+        if profiler is not None:
+            profiler.dump_stats(path + '.prof')
+        with open(path + '.collapsed', 'w', encoding='utf-8') as target:
+            target.write(sampler.collapsed())
+        with open(path + '.json', 'w', encoding='utf-8') as target:
+            json.dump(summary, target, indent=2)
+        prune(
+            self.directory,
+            getattr(settings, 'PROFILING_MAX_PROFILES', 200),
+            getattr(settings, 'PROFILING_MAX_AGE', 7 * 24 * 3600),
+        )
+        logger.info(f"✅ Profile written: {profile_id} ({summary['reason']})")
+        return profile_id
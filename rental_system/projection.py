@@ -0,0 +1,51 @@
+"""
+PROJECTION.PY - V13
+===================
+
+Veldselectie en kolomformaat voor API lijsten
+?fields=date,price geeft alleen die velden terug (in die volgorde);
+?format=columnar geeft per veld één array in plaats van een array van
+objecten:
+
+    objects:   [{"date": "2025-11-01", "price": 150.0}, ...]
+    columnar:  {"date": ["2025-11-01", ...], "price": [150.0, ...]}
+
+Voor lange periodes scheelt dat de herhaalde sleutels in de payload en
+encode/decode tijd aan beide kanten.
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+OBJECTS = 'objects'
+COLUMNAR = 'columnar'
+FORMATS = (OBJECTS, COLUMNAR)
+
+
+def parse_fields(value, allowed):
+    """
+    'date,price' (of een lijst) -> tuple van velden; alle velden als er
+    niets gevraagd is. allowed: {veld: standaardwaarde als het ontbreekt}.
+    """
+    if not value:
+        return tuple(allowed)
+    names = value.split(',') if isinstance(value, str) else list(value)
+    fields = tuple(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+    unknown = [name for name in fields if name not in allowed]
+    if unknown or not fields:
+        raise ValueError(f'fields must be a comma separated subset of: {", ".join(allowed)}')
+    return fields
+
+
+def parse_format(value):
+    value = value or OBJECTS
+    if value not in FORMATS:
+        raise ValueError(f'format must be one of {", ".join(FORMATS)}')
+    return value
+
+
+def project(rows, fields, allowed, output_format=OBJECTS):
+    """Rijen (dicts) beperken tot fields, als objecten of als kolommen"""
+    if output_format == COLUMNAR:
+        return {field: [row.get(field, allowed[field]) for row in rows] for field in fields}
+    return [{field: row.get(field, allowed[field]) for field in fields} for row in rows]
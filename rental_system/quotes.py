@@ -0,0 +1,176 @@
+"""
+QUOTES.PY - V13
+===============
+
+Prijsofferte voor api_calculate_price, met memoization
+Zelfde rekenregels als de kalender front-end (updatePriceCalculation):
+langere-termijn formules rekenen per dag, het voorschot hangt af van
+PREPAIEMENT_TYPE ('huur_borg' of 'huur_alleen').
+
+Offertes worden in een begrensde LRU/TTL cache per proces bewaard,
+op genormaliseerde invoer + catalogus versie. Wijzigt een formule of
+EXTRA_KM_TARIFF/VOORSCHOT_PERCENTAGE, dan verandert de versie en
+vallen oude offertes vanzelf uit de cache.
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+
+from .formulas import catalogue_version, get_formula, is_long_term
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+DEPOSIT_MODES = ('huur_borg', 'huur_alleen')
+
+
+class QuoteCache:
+    """Thread-safe LRU cache met TTL en hit-rate tellers"""
+
+    def __init__(self, max_size=1024, ttl=600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            expires_at, value = entry
+            if expires_at < now:
+                del self._entries[key]
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['max_size'] = self.max_size
+        stats['ttl'] = self.ttl
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+
+quote_cache = QuoteCache(
+    max_size=getattr(settings, 'QUOTE_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'QUOTE_CACHE_TTL', 600),
+)
+
+
+def _money(value):
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def normalise_quote_input(data):
+    """Request data -> (formula, start, end, km, deposit_mode); ValueError bij ongeldige invoer"""
+    formula = str(data.get('formula', '')).strip()
+    if get_formula(formula) is None:
+        raise ValueError(f'Unknown formula: {formula}')
+
+    try:
+        start_date = datetime.strptime(data.get('start_date') or data.get('start') or '', '%Y-%m-%d').date()
+        end_date = datetime.strptime(data.get('end_date') or data.get('end') or '', '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('start_date and end_date must be dates (YYYY-MM-DD)')
+    if end_date < start_date:
+        raise ValueError('end_date must be on or after start_date')
+
+    try:
+        km = max(int(data.get('km') or 0), 0)
+    except (TypeError, ValueError):
+        raise ValueError('km must be a whole number')
+
+    deposit_mode = data.get('deposit_mode') or getattr(settings, 'PREPAIEMENT_TYPE', 'huur_borg')
+    if deposit_mode not in DEPOSIT_MODES:
+        raise ValueError(f'deposit_mode must be one of {", ".join(DEPOSIT_MODES)}')
+
+    return formula, start_date, end_date, km, deposit_mode
+
+
+def calculate_quote(formula_name, start_date, end_date, km, deposit_mode):
+    """Bereken een offerte (zonder cache)"""
+    formula = get_formula(formula_name)
+    days = (end_date - start_date).days + 1
+    price = Decimal(str(formula['price']))
+    deposit = Decimal(str(formula['deposit']))
+
+    # Langere termijn: prijs is per dag, waarborg = dagprijs
+    if is_long_term(formula_name):
+        deposit = price
+        price = price * days
+
+    rate = Decimal(str(formula.get('extra_km_rate', getattr(settings, 'EXTRA_KM_TARIFF', 0.30))))
+    extra_km = max(km - int(formula.get('included_km', 0)), 0)
+    extra_km_cost = rate * extra_km
+
+    percentage = Decimal(getattr(settings, 'VOORSCHOT_PERCENTAGE', 30)) / 100
+    if deposit_mode == 'huur_alleen':
+        prepayment = price * percentage
+        remainder = (price - prepayment) + deposit
+    else:
+        prepayment = (price + deposit) * percentage
+        remainder = (price + deposit) - prepayment
+
+    return {
+        'formula': formula_name,
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'days': days,
+        'km': km,
+        'deposit_mode': deposit_mode,
+        'rental_price': float(_money(price)),
+        'deposit': float(_money(deposit)),
+        'extra_km': extra_km,
+        'extra_km_cost': float(_money(extra_km_cost)),
+        'prepayment': float(_money(prepayment)),
+        'remainder': float(_money(remainder + extra_km_cost)),
+        'total_price': float(_money(price + extra_km_cost)),
+    }
+
+
+def get_quote(data):
+    """Offerte uit de cache, of berekenen en cachen. Geeft (quote, cache_hit)"""
+    normalised = normalise_quote_input(data)
+    key = (catalogue_version(),) + normalised
+    quote = quote_cache.get(key)
+    if quote is not None:
+        return quote, True
+    quote = calculate_quote(*normalised)
+    quote_cache.set(key, quote)
+    return quote, False
+
+
+def get_quote_cache_stats():
+    return quote_cache.stats()
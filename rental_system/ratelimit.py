@@ -0,0 +1,142 @@
+"""
+RATELIMIT.PY - V13
+==================
+
+Rate limiting voor endpoints die upstream (WordPress) werk doen
+Sliding window op basis van twee vaste vensters in de Django cache,
+met atomische cache.incr. Geweigerde requests krijgen meteen een
+goedkope 429 met Retry-After, nog vóór er upstream iets gebeurt.
+
+De tellers moeten in een gedeelde cache staan (REDIS_URL of
+CACHE_BACKEND=database): met LocMemCache telt elke worker apart.
+check_shared_cache meldt dat bij `manage.py check` en bij het opstarten.
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import hashlib
+import json
+import logging
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.http import JsonResponse
+
+from .cache_versions import cache_is_shared
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'rl:v1'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60); '100/5m' -> (100, 300)"""
+    count, _, period = rate.partition('/')
+    multiplier = int(period[:-1] or 1)
+    return int(count), multiplier * PERIODS[period[-1]]
+
+
+def client_ip(request):
+    """
+    IP van de client. X-Forwarded-For alleen achter een vertrouwde proxy
+    (Render); de laatste waarde is door die proxy toegevoegd, niet te spoofen.
+    """
+    if getattr(settings, 'RATELIMIT_TRUST_FORWARDED_FOR', False):
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            return forwarded.split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def request_username(request):
+    """Username uit een JSON body (api_login); leeg als er geen is"""
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return ''
+    username = data.get('username', '') if isinstance(data, dict) else ''
+    return str(username).strip().lower()
+
+
+KEY_FUNCTIONS = {
+    'ip': client_ip,
+    'username': request_username,
+}
+
+
+def check_shared_cache(app_configs=None, **kwargs):
+    """System check: rate limiting zonder gedeelde cache is per worker"""
+    if not getattr(settings, 'RATELIMIT_ENABLED', True) or settings.DEBUG or cache_is_shared():
+        return []
+    return [checks.Warning(
+        'Rate limiting uses a per-process cache: every worker counts separately, '
+        'so N workers allow N times the configured rates.',
+        hint='Configure a shared cache: REDIS_URL or CACHE_BACKEND=database (manage.py createcachetable).',
+        id='rental_system.W001',
+    )]
+
+
+def _hit(scope, key_name, value, limit, period, now):
+    """
+    Tel één request en geef (toegestaan, retry_after) terug.
+    Schatting: vorige venster gewogen naar de resterende overlap + huidige venster.
+    """
+    digest = hashlib.sha1(value.encode('utf-8')).hexdigest()[:20]
+    window = int(now // period)
+    current_key = f'{CACHE_PREFIX}:{scope}:{key_name}:{digest}:{window}'
+    previous_key = f'{CACHE_PREFIX}:{scope}:{key_name}:{digest}:{window - 1}'
+
+    cache.add(current_key, 0, timeout=period * 2)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:
+        # Key net verlopen tussen add en incr
+        cache.set(current_key, 1, timeout=period * 2)
+        current = 1
+    previous = cache.get(previous_key, 0)
+
+    elapsed = now - window * period
+    estimated = previous * (period - elapsed) / period + current
+    if estimated <= limit:
+        return True, 0
+    return False, max(1, math.ceil(period - elapsed))
+
+
+def ratelimit(scope, keys=('ip',)):
+    """
+    Decorator: beperk een view per scope en per key (ip, username).
+    De rate komt uit settings.RATELIMIT_RATES[scope], bv. '10/m'.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            rate = getattr(settings, 'RATELIMIT_RATES', {}).get(scope)
+            if not getattr(settings, 'RATELIMIT_ENABLED', True) or not rate:
+                return view_func(request, *args, **kwargs)
+
+            limit, period = parse_rate(rate)
+            now = time.time()
+            for key_name in keys:
+                value = KEY_FUNCTIONS[key_name](request)
+                if not value:
+                    continue
+                allowed, retry_after = _hit(scope, key_name, value, limit, period, now)
+                if not allowed:
+                    logger.warning(f"⚠️ Rate limit {scope} exceeded by {key_name}, retry after {retry_after}s")
+                    response = JsonResponse({
+                        'success': False,
+                        'error': 'Too many requests',
+                        'retry_after': retry_after,
+                        'version': 'V15'
+                    }, status=429)
+                    response['Retry-After'] = str(retry_after)
+                    return response
+            return view_func(request, *args, **kwargs)
+        return wrapped
+    return decorator
@@ -0,0 +1,164 @@
+"""
+RENTAL_LISTING.PY - V13
+=======================
+
+Reservaties oplijsten voor de back office (api/rentals)
+Keyset paginering op (created_at, id) in plaats van OFFSET: elke pagina
+is één index range scan, pagina 1000 kost evenveel als pagina 1. Er
+wordt bewust niet geteld.
+
+De cursor is ondertekend (django.core.signing) en gebonden aan de
+filters en de sorteerrichting waarmee hij gemaakt is.
+
+Filters op geïndexeerde kolommen: status, resource, start_date
+(start_from/start_to) en created_at (created_from/created_to).
+Met format=ndjson wordt alles gestreamd, chunk per chunk met dezelfde
+keyset query (één reservatie per regel).
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import hashlib
+import json
+from datetime import datetime, time as datetime_time, timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+
+from .availability import parse_day
+from .models import Rental
+from .reservations import resolve_resource
+
+CURSOR_SALT = 'rental_system.rentals.cursor'
+ORDERS = ('desc', 'asc')
+COLUMNS = (
+    'id', 'resource__slug', 'customer_name', 'customer_email', 'start_date', 'end_date', 'status',
+    'formula', 'km_driven', 'final_amount', 'advance_amount', 'deposit_refund', 'settled_at',
+    'created_at', 'updated_at',
+)
+
+
+def _day_start(day):
+    moment = datetime.combine(day, datetime_time.min)
+    return timezone.make_aware(moment) if settings.USE_TZ else moment
+
+
+def parse_filters(params):
+    """Filters uit de query string; ValueError bij ongeldige invoer"""
+    filters = {}
+    statuses = sorted({value for value in params.get('status', '').split(',') if value})
+    if statuses:
+        filters['status'] = statuses
+    if params.get('resource'):
+        filters['resource'] = resolve_resource(params['resource']).slug
+    for name in ('start_from', 'start_to', 'created_from', 'created_to'):
+        if params.get(name):
+            filters[name] = parse_day(params[name], name).isoformat()
+    order = params.get('order', 'desc')
+    if order not in ORDERS:
+        raise ValueError(f'order must be one of {", ".join(ORDERS)}')
+    return filters, order
+
+
+def filtered_queryset(filters):
+    queryset = Rental.objects.all()
+    if 'status' in filters:
+        queryset = queryset.filter(status__in=filters['status'])
+    if 'resource' in filters:
+        queryset = queryset.filter(resource__slug=filters['resource'])
+    if 'start_from' in filters:
+        queryset = queryset.filter(start_date__gte=filters['start_from'])
+    if 'start_to' in filters:
+        queryset = queryset.filter(start_date__lte=filters['start_to'])
+    # created_to is een dag: alles vóór het begin van de volgende dag
+    if 'created_from' in filters:
+        queryset = queryset.filter(created_at__gte=_day_start(parse_day(filters['created_from'], 'created_from')))
+    if 'created_to' in filters:
+        created_to = parse_day(filters['created_to'], 'created_to') + timedelta(days=1)
+        queryset = queryset.filter(created_at__lt=_day_start(created_to))
+    return queryset
+
+
+def _fingerprint(filters, order):
+    payload = json.dumps([filters, order], sort_keys=True).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def encode_cursor(row, filters, order):
+    return signing.dumps(
+        {'k': [row['created_at'].isoformat(), row['id']], 'f': _fingerprint(filters, order)},
+        salt=CURSOR_SALT, compress=True,
+    )
+
+
+def decode_cursor(cursor, filters, order):
+    """(created_at, id) uit een cursor; ValueError als hij ongeldig is of bij andere filters hoort"""
+    try:
+        payload = signing.loads(cursor, salt=CURSOR_SALT)
+        created_at, rental_id = payload['k']
+        key = (datetime.fromisoformat(created_at), int(rental_id))
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise ValueError('Invalid cursor')
+    if payload.get('f') != _fingerprint(filters, order):
+        raise ValueError('Cursor does not match these filters')
+    return key
+
+
+def _after(queryset, key, order):
+    """Keyset voorwaarde: strikt na (created_at, id) in de sorteerrichting"""
+    if key is None:
+        return queryset
+    created_at, rental_id = key
+    if order == 'desc':
+        return queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=rental_id))
+    return queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=rental_id))
+
+
+def fetch(queryset, key, order, limit):
+    """Maximaal limit rijen na key; één query (limit + 1 om 'meer' te zien)"""
+    ordering = ('-created_at', '-id') if order == 'desc' else ('created_at', 'id')
+    rows = list(_after(queryset, key, order).order_by(*ordering).values(*COLUMNS)[:limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def serialize(row):
+    row = dict(row)
+    row['resource'] = row.pop('resource__slug')
+    return row
+
+
+def page(filters, order, cursor=None, limit=None):
+    """Eén pagina: rijen + next_cursor (None op de laatste pagina)"""
+    max_limit = getattr(settings, 'RENTALS_PAGE_MAX', 200)
+    limit = limit or getattr(settings, 'RENTALS_PAGE_SIZE', 50)
+    if not 1 <= limit <= max_limit:
+        raise ValueError(f'limit must be between 1 and {max_limit}')
+    key = decode_cursor(cursor, filters, order) if cursor else None
+    rows, more = fetch(filtered_queryset(filters), key, order, limit)
+    next_cursor = encode_cursor(rows[-1], filters, order) if more else None
+    return [serialize(row) for row in rows], next_cursor
+
+
+def stream_ndjson(filters, order, cursor=None):
+    """
+    Alle reservaties als NDJSON, chunk per chunk met dezelfde keyset query.
+    De cursor wordt meteen gecontroleerd (ValueError), niet pas tijdens het streamen.
+    """
+    key = decode_cursor(cursor, filters, order) if cursor else None
+    return _ndjson_chunks(filtered_queryset(filters), key, order)
+
+
+def _ndjson_chunks(queryset, key, order):
+    chunk_size = getattr(settings, 'RENTALS_EXPORT_CHUNK', 1000)
+    encoder = DjangoJSONEncoder()
+    while True:
+        rows, more = fetch(queryset, key, order, chunk_size)
+        if rows:
+            yield ''.join(encoder.encode(serialize(row)) + '\n' for row in rows)
+        if not more:
+            return
+        key = (rows[-1]['created_at'], rows[-1]['id'])
@@ -0,0 +1,194 @@
+"""
+RESERVATIONS.PY - V13
+=====================
+
+Reservaties aanmaken met dag-claims per resource
+Geen globale lock: elke reservatie claimt haar dagen in één multi-row
+insert. De unieke constraint op BookingClaim (resource, dag) laat
+overlappende claims atomisch falen, niet-overlappende reservaties lopen
+volledig parallel.
+
+Claims en bezetting (DailyOccupancy) volgen de Rental via post_save
+(sync_rental_days): aanmaken, datums wijzigen, annuleren en heractiveren
+lopen allemaal langs dezelfde weg.
+
+Bulk reservaties (create_rentals) lopen in één transactie, alles-of-niets
+of met een savepoint per item.
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from .availability import sync_rental_occupancy
+from .models import BookingClaim, Rental, Resource
+
+logger = logging.getLogger(__name__)
+
+
+BULK_ATOMIC = 'atomic'
+BULK_PER_ITEM = 'per_item'
+BULK_MODES = (BULK_ATOMIC, BULK_PER_ITEM)
+
+
+class BookingConflict(Exception):
+    """Eén of meer dagen zijn al door een andere reservatie geclaimd"""
+
+
+class BulkConflict(BookingConflict):
+    """Alles-of-niets bulk reservatie: item `index` botste, niets is aangemaakt"""
+
+    def __init__(self, index, message):
+        super().__init__(message)
+        self.index = index
+
+
+def _parse_date(value, field):
+    if hasattr(value, 'toordinal'):
+        return value
+    try:
+        return datetime.strptime(value or '', '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'{field} must be a date (YYYY-MM-DD)')
+
+
+def rental_days(start_date, end_date):
+    """Alle dagen van een reservatie, inclusief einddatum"""
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+
+def parse_period(data):
+    """Valideer start/eind uit request data tegen MIN/MAX_RENTAL_DAYS"""
+    start_date = _parse_date(data.get('start_date') or data.get('start'), 'start_date')
+    end_date = _parse_date(data.get('end_date') or data.get('end'), 'end_date')
+    if end_date < start_date:
+        raise ValueError('end_date must be on or after start_date')
+
+    days = (end_date - start_date).days + 1
+    min_days = getattr(settings, 'MIN_RENTAL_DAYS', 1)
+    max_days = getattr(settings, 'MAX_RENTAL_DAYS', 30)
+    if not min_days <= days <= max_days:
+        raise ValueError(f'rental must be between {min_days} and {max_days} days')
+    return start_date, end_date
+
+
+def resolve_resource(value):
+    """Resource op slug of id; standaard resource als er niets is opgegeven"""
+    if value in (None, ''):
+        return Resource.get_default()
+    queryset = Resource.objects.active()
+    lookup = {'pk': value} if str(value).isdigit() else {'slug': value}
+    try:
+        return queryset.get(**lookup)
+    except Resource.DoesNotExist:
+        raise ValueError(f'Unknown resource: {value}')
+
+
+def _claim_rows(rental):
+    return [
+        BookingClaim(rental_id=rental.id, resource_id=rental.resource_id, day=day)
+        for day in rental_days(rental.start_date, rental.end_date)
+    ]
+
+
+def _conflict(rental):
+    return BookingConflict(
+        f'Period {rental.start_date} - {rental.end_date} is (partly) booked for {rental.resource}'
+    )
+
+
+def release_claims(rental):
+    """Geef de dagen van een reservatie terug vrij"""
+    deleted, _ = BookingClaim.objects.filter(rental=rental).delete()
+    return deleted
+
+
+def sync_rental_days(rental, created=False):
+    """
+    Zet claims en bezetting gelijk aan de huidige staat van de reservatie
+    (post_save): vrijgeven en opnieuw claimen als ze actief is. Eén
+    savepoint; overlap -> BookingConflict en alles wordt teruggedraaid.
+    """
+    try:
+        with transaction.atomic():
+            if not created:
+                release_claims(rental)
+            if rental.status not in Rental.INACTIVE_STATUSES:
+                BookingClaim.objects.bulk_create(_claim_rows(rental))
+            # Botst ook als de bezetting (nog) niet met de claims overeenkomt
+            sync_rental_occupancy(rental)
+    except IntegrityError:
+        raise _conflict(rental)
+
+
+def rebuild_claims(resource=None, batch_size=1000):
+    """Volledige herbouw van de dag-claims uit de actieve reservaties"""
+    rentals = Rental.objects.active()
+    claims = BookingClaim.objects.all()
+    if resource is not None:
+        rentals = rentals.filter(resource=resource)
+        claims = claims.filter(resource=resource)
+
+    created = 0
+    with transaction.atomic():
+        claims.delete()
+        batch = []
+        for rental in rentals.only('id', 'resource_id', 'start_date', 'end_date').iterator(chunk_size=batch_size):
+            batch.extend(_claim_rows(rental))
+            if len(batch) >= batch_size:
+                created += len(BookingClaim.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            created += len(BookingClaim.objects.bulk_create(batch))
+    logger.info(f"✅ Claims rebuilt: {created} days")
+    return created
+
+
+def create_rental(customer_name, customer_email, start_date, end_date, status='pending', resource=None, formula=''):
+    """Maak een reservatie en claim haar dagen, alles-of-niets"""
+    resource = resource or Resource.get_default()
+    with transaction.atomic():
+        # post_save claimt de dagen en schrijft de bezetting (BookingConflict bij overlap)
+        rental = Rental.objects.create(
+            resource=resource,
+            customer_name=customer_name,
+            customer_email=customer_email,
+            start_date=start_date,
+            end_date=end_date,
+            status=status,
+            formula=formula,
+        )
+    logger.info(f"✅ Rental {rental.id} claimed {start_date} - {end_date} on {resource.slug}")
+    return rental
+
+
+def create_rentals(items, mode=BULK_ATOMIC):
+    """
+    Maak meerdere reservaties in één transactie.
+    items: dicts met de argumenten van create_rental. Geeft per item (in
+    dezelfde volgorde) (rental, None) of (None, foutmelding) terug.
+
+    BULK_ATOMIC:   eerste conflict -> BulkConflict, alles teruggedraaid
+    BULK_PER_ITEM: elk item in een eigen savepoint, conflicten per item
+    """
+    if mode not in BULK_MODES:
+        raise ValueError(f'mode must be one of {", ".join(BULK_MODES)}')
+    # Vaste volgorde (resource, start) zodat gelijktijdige bulk requests
+    # hun claims in dezelfde volgorde nemen
+    order = sorted(range(len(items)), key=lambda index: (items[index]['resource'].pk, items[index]['start_date']))
+    results = [None] * len(items)
+    with transaction.atomic():
+        for index in order:
+            try:
+                # create_rental opent zelf een savepoint binnen deze transactie
+                results[index] = (create_rental(**items[index]), None)
+            except BookingConflict as e:
+                if mode == BULK_ATOMIC:
+                    raise BulkConflict(index, f'items[{index}]: {e}')
+                results[index] = (None, str(e))
+    return results
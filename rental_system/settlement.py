@@ -0,0 +1,201 @@
+"""
+SETTLEMENT.PY - V13
+===================
+
+Maandelijkse afrekening van afgelopen reservaties
+Reservaties worden per chunk als kolommen ingelezen en alle bedragen
+worden in één keer per chunk berekend (NumPy indien geïnstalleerd,
+anders dezelfde berekening in pure Python). Bedragen worden in
+eurocent (integers) berekend, zodat er geen float afrondingen zijn.
+
+Per reservatie:
+- final_amount:   formuleprijs (langere termijn: per dag) + extra km
+- advance_amount: VOORSCHOT_PERCENTAGE van huur (huur_alleen) of
+                  huur + waarborg (huur_borg), zie PREPAIEMENT_TYPE
+- deposit_refund: waarborg min de extra km kost (minimum 0)
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import logging
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .cache_versions import ANALYTICS, bump_version
+from .db_router import primary
+from .formulas import get_formulas, is_long_term
+from .models import Rental
+
+try:
+    import numpy
+except ImportError:  # optioneel: pip install numpy
+    numpy = None
+
+logger = logging.getLogger(__name__)
+
+SETTLEMENT_FIELDS = ['final_amount', 'advance_amount', 'deposit_refund', 'settled_at']
+COLUMNS = ('id', 'formula', 'start_date', 'end_date', 'km_driven')
+
+
+def _cents(value):
+    return int(round(float(value) * 100))
+
+
+def formula_table():
+    """Formule naam -> index, plus tarief kolommen per formule (in cent)"""
+    formulas = get_formulas()
+    default_rate = getattr(settings, 'EXTRA_KM_TARIFF', 0.30)
+    return {
+        'index': {formula['name']: position for position, formula in enumerate(formulas)},
+        'price': [_cents(formula['price']) for formula in formulas],
+        'deposit': [_cents(formula['deposit']) for formula in formulas],
+        'included_km': [int(formula.get('included_km', 0)) for formula in formulas],
+        'km_rate': [_cents(formula.get('extra_km_rate', default_rate)) for formula in formulas],
+        'long_term': [is_long_term(formula['name']) for formula in formulas],
+    }
+
+
+def settlement_queryset(until, resettle=False):
+    """Actieve reservaties die ten laatste op `until` eindigden"""
+    queryset = Rental.objects.active().filter(end_date__lte=until).exclude(formula='')
+    if not resettle:
+        queryset = queryset.filter(settled_at__isnull=True)
+    return queryset
+
+
+def iter_chunks(queryset, chunk_size=5000):
+    """
+    Lees reservaties als kolommen, chunk per chunk (keyset op id).
+    Geen open cursor tussen de chunks, zodat er tussendoor geschreven kan worden.
+    """
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).order_by('id').values_list(*COLUMNS)[:chunk_size])
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        ids, formulas, starts, ends, km = zip(*rows)
+        yield {
+            'id': ids,
+            'formula': formulas,
+            'days': [end.toordinal() - start.toordinal() + 1 for start, end in zip(starts, ends)],
+            'km': [value or 0 for value in km],
+        }
+
+
+def _compute_numpy(chunk, table, formula_index, percentage, rent_only):
+    index = numpy.asarray(formula_index, dtype=numpy.int64)
+    days = numpy.asarray(chunk['days'], dtype=numpy.int64)
+    km = numpy.asarray(chunk['km'], dtype=numpy.int64)
+    long_term = numpy.asarray(table['long_term'], dtype=bool)[index]
+    base_price = numpy.asarray(table['price'], dtype=numpy.int64)[index]
+
+    price = numpy.where(long_term, base_price * days, base_price)
+    deposit = numpy.where(long_term, base_price, numpy.asarray(table['deposit'], dtype=numpy.int64)[index])
+    extra_km = numpy.maximum(km - numpy.asarray(table['included_km'], dtype=numpy.int64)[index], 0)
+    extra_km_cost = extra_km * numpy.asarray(table['km_rate'], dtype=numpy.int64)[index]
+
+    advance_base = price if rent_only else price + deposit
+    return (
+        (price + extra_km_cost).tolist(),
+        ((advance_base * percentage + 50) // 100).tolist(),
+        numpy.maximum(deposit - extra_km_cost, 0).tolist(),
+    )
+
+
+def _compute_python(chunk, table, formula_index, percentage, rent_only):
+    final, advance, refund = [], [], []
+    for position, days, km in zip(formula_index, chunk['days'], chunk['km']):
+        base_price = table['price'][position]
+        long_term = table['long_term'][position]
+        price = base_price * days if long_term else base_price
+        deposit = base_price if long_term else table['deposit'][position]
+        extra_km_cost = max(km - table['included_km'][position], 0) * table['km_rate'][position]
+        advance_base = price if rent_only else price + deposit
+        final.append(price + extra_km_cost)
+        advance.append((advance_base * percentage + 50) // 100)
+        refund.append(max(deposit - extra_km_cost, 0))
+    return final, advance, refund
+
+
+def compute_chunk(chunk, table, use_numpy=None):
+    """
+    Bereken alle bedragen van een chunk. Geeft (ids, final, advance, refund)
+    in cent terug; reservaties met een onbekende formule vallen weg.
+    """
+    known = [position for position, name in enumerate(chunk['formula']) if name in table['index']]
+    if len(known) != len(chunk['id']):
+        chunk = {key: [values[position] for position in known] for key, values in chunk.items()}
+    formula_index = [table['index'][name] for name in chunk['formula']]
+
+    percentage = int(getattr(settings, 'VOORSCHOT_PERCENTAGE', 30))
+    rent_only = getattr(settings, 'PREPAIEMENT_TYPE', 'huur_borg') == 'huur_alleen'
+    if use_numpy is None:
+        use_numpy = numpy is not None
+    compute = _compute_numpy if use_numpy and chunk['id'] else _compute_python
+    final, advance, refund = compute(chunk, table, formula_index, percentage, rent_only)
+    return list(chunk['id']), final, advance, refund
+
+
+def _amount(cents):
+    return Decimal(cents).scaleb(-2)
+
+
+def write_chunk(ids, final, advance, refund, settled_at, batch_size=500):
+    """
+    Schrijf de bedragen terug. Veel reservaties hebben exact dezelfde
+    bedragen (zelfde formule, geen extra km): die gaan per groep in één
+    UPDATE ... WHERE id IN (...). De rest gaat via bulk_update, waarvan
+    het opbouwen van de CASE expressies per rij de dure stap is.
+    """
+    groups = {}
+    for rental_id, amounts in zip(ids, zip(final, advance, refund)):
+        groups.setdefault(amounts, []).append(rental_id)
+
+    singles = []
+    with transaction.atomic():
+        for (final_cents, advance_cents, refund_cents), group_ids in groups.items():
+            if len(group_ids) == 1:
+                singles.append(Rental(
+                    id=group_ids[0],
+                    final_amount=_amount(final_cents),
+                    advance_amount=_amount(advance_cents),
+                    deposit_refund=_amount(refund_cents),
+                    settled_at=settled_at,
+                ))
+                continue
+            for offset in range(0, len(group_ids), batch_size):
+                Rental.objects.filter(id__in=group_ids[offset:offset + batch_size]).update(
+                    final_amount=_amount(final_cents),
+                    advance_amount=_amount(advance_cents),
+                    deposit_refund=_amount(refund_cents),
+                    settled_at=settled_at,
+                )
+        Rental.objects.bulk_update(singles, SETTLEMENT_FIELDS, batch_size=batch_size)
+    return len(ids)
+
+
+def settle_rentals(until, chunk_size=5000, resettle=False, dry_run=False, use_numpy=None):
+    """Reken alle afgelopen reservaties af; geeft tellers terug"""
+    table = formula_table()
+    settled_at = timezone.now()
+    stats = {'read': 0, 'settled': 0, 'skipped': 0, 'total_cents': 0}
+    with primary():
+        for chunk in iter_chunks(settlement_queryset(until, resettle), chunk_size):
+            ids, final, advance, refund = compute_chunk(chunk, table, use_numpy)
+            stats['read'] += len(chunk['id'])
+            stats['skipped'] += len(chunk['id']) - len(ids)
+            stats['total_cents'] += sum(final)
+            if dry_run:
+                stats['settled'] += len(ids)
+            else:
+                stats['settled'] += write_chunk(ids, final, advance, refund, settled_at)
+    if stats['settled'] and not dry_run:
+        # Nieuwe bedragen: ook afgesloten analytics periodes herberekenen
+        bump_version(ANALYTICS)
+    logger.info(f"✅ Settled {stats['settled']} rentals until {until} (skipped {stats['skipped']})")
+    return stats
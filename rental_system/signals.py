@@ -0,0 +1,78 @@
+"""
+SIGNALS.PY - V13
+================
+
+Signal handlers voor rental system
+Houdt DailyOccupancy en de dag-claims in sync met Rental wijzigingen
+en laat beschikbaarheidscaches vervallen na een commit
+Wijzigingen aan reservaties in het verleden: afgesloten analytics
+periodes opnieuw berekenen
+Blackout regels: kalender hercompileren na een wijziging in de admin
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+from datetime import date
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache_versions import ANALYTICS, AVAILABILITY, BLACKOUTS, bump_version
+from .models import BlackoutRule, Rental
+from .reservations import sync_rental_days
+
+# Velden die bepalen welke dagen een reservatie bezet
+DAY_FIELDS = {'resource', 'resource_id', 'start_date', 'end_date', 'status'}
+
+
+def _in_closed_period(rental):
+    """Begint voor de lopende maand: telt mee in afgesloten analytics periodes"""
+    return rental.start_date < date.today().replace(day=1)
+
+
+@receiver(post_save, sender=Rental, dispatch_uid='rental_occupancy_sync')
+def rental_saved(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    """Aangemaakt, gewijzigd, geannuleerd of heractiveerd: claims en bezetting bijwerken"""
+    if raw:
+        return
+    if update_fields is not None and not DAY_FIELDS.intersection(update_fields):
+        return
+    sync_rental_days(instance, created=created)
+    transaction.on_commit(lambda: bump_version(AVAILABILITY))
+
+
+@receiver(post_delete, sender=Rental, dispatch_uid='rental_availability_invalidate')
+def rental_deleted(sender, instance, **kwargs):
+    """Bezetting verdwijnt via CASCADE; caches laten vervallen"""
+    transaction.on_commit(lambda: bump_version(AVAILABILITY))
+    if _in_closed_period(instance):
+        transaction.on_commit(lambda: bump_version(ANALYTICS))
+
+
+@receiver(post_save, sender=Rental, dispatch_uid='rental_analytics_invalidate')
+def rental_saved_analytics(sender, instance, raw=False, **kwargs):
+    """
+    Bedragen, formule of datums van een oude reservatie gewijzigd (admin):
+    afgesloten periodes vervallen. Een reservatie die uit het verleden
+    weg verschoven wordt valt hier niet onder; daarvoor verlopen
+    afgesloten periodes na ANALYTICS_CLOSED_CACHE_TIMEOUT.
+    """
+    if raw or not _in_closed_period(instance):
+        return
+    transaction.on_commit(lambda: bump_version(ANALYTICS))
+
+
+def _blackouts_changed():
+    bump_version(BLACKOUTS)
+    bump_version(AVAILABILITY)
+
+
+@receiver(post_save, sender=BlackoutRule, dispatch_uid='blackout_rule_saved')
+@receiver(post_delete, sender=BlackoutRule, dispatch_uid='blackout_rule_deleted')
+def blackout_rule_changed(sender, instance, raw=False, **kwargs):
+    """Elke worker compileert de blackout kalender opnieuw bij de volgende lookup"""
+    if raw:
+        return
+    transaction.on_commit(_blackouts_changed)
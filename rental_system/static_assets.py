@@ -0,0 +1,164 @@
+"""
+STATIC_ASSETS.PY - V13
+======================
+
+Static assets zonder extra webserver (Render)
+
+- CompressedManifestStaticFilesStorage: bij collectstatic content-hashed
+  bestandsnamen plus .gz en (als brotli geïnstalleerd is) .br varianten.
+- StaticAssetMiddleware: serveert STATIC_ROOT in-process, kiest de
+  variant op basis van Accept-Encoding en geeft gehashte bestanden een
+  far-future immutable Cache-Control.
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import gzip
+import logging
+import mimetypes
+import os
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optioneel: pip install brotli
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.html', '.xml', '.ico')
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE_CONTROL = 'public, max-age=300'
+
+
+def compress_file(path, min_size=256):
+    """Schrijf path.gz en path.br naast path; geeft de geschreven varianten terug"""
+    with open(path, 'rb') as source:
+        content = source.read()
+    if len(content) < min_size:
+        return []
+
+    written = []
+    gzipped = gzip.compress(content, compresslevel=9, mtime=0)
+    if len(gzipped) < len(content):
+        with open(path + '.gz', 'wb') as target:
+            target.write(gzipped)
+        written.append(path + '.gz')
+
+    if brotli is not None:
+        compressed = brotli.compress(content, quality=11)
+        if len(compressed) < len(content):
+            with open(path + '.br', 'wb') as target:
+                target.write(compressed)
+            written.append(path + '.br')
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage die na het hashen .gz/.br varianten wegschrijft"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+
+        min_size = getattr(settings, 'STATIC_COMPRESS_MIN_SIZE', 256)
+        names = set(self.hashed_files.values())
+        names.update(self.hashed_files.keys())
+        compressed = 0
+        for name in sorted(names):
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS) or not self.exists(name):
+                continue
+            compressed += len(compress_file(self.path(name), min_size))
+        logger.info(f"✅ Static assets compressed: {compressed} variants (brotli: {brotli is not None})")
+
+
+def accepted_encodings(request):
+    """Gevraagde encodings uit Accept-Encoding (q=0 telt als geweigerd)"""
+    encodings = set()
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        token, _, params = part.strip().partition(';')
+        if token and params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            encodings.add(token.lower())
+    return encodings
+
+
+@lru_cache(maxsize=4096)
+def _lookup(path):
+    """Bestaande varianten van een bestand; collectstatic draait vóór de start"""
+    if not os.path.isfile(path):
+        return None
+    return {
+        'identity': os.path.getsize(path),
+        'br': os.path.getsize(path + '.br') if os.path.isfile(path + '.br') else None,
+        'gzip': os.path.getsize(path + '.gz') if os.path.isfile(path + '.gz') else None,
+    }
+
+
+class StaticAssetMiddleware:
+    """
+    Serveer STATIC_URL uit STATIC_ROOT vóór de rest van de middleware.
+    Alleen actief als STATIC_ASSETS_SERVE aan staat (standaard: niet in DEBUG,
+    dan doet runserver/django.conf.urls.static het werk).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'STATIC_ASSETS_SERVE', not settings.DEBUG)
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith('/') else '/' + settings.STATIC_URL
+        self.root = str(settings.STATIC_ROOT or '')
+
+    def __call__(self, request):
+        if (
+            self.enabled and self.root
+            and request.method in ('GET', 'HEAD')
+            and request.path.startswith(self.prefix)
+        ):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except Exception:
+            return None
+        variants = _lookup(path)
+        if variants is None:
+            return None
+
+        immutable = bool(HASHED_NAME_RE.search(name))
+        cache_control = IMMUTABLE_CACHE_CONTROL if immutable else DEFAULT_CACHE_CONTROL
+        # Gehashte bestanden veranderen nooit: elke conditionele request is een 304
+        if immutable and (request.META.get('HTTP_IF_NONE_MATCH') or request.META.get('HTTP_IF_MODIFIED_SINCE')):
+            response = HttpResponseNotModified()
+            response['Cache-Control'] = cache_control
+            patch_vary_headers(response, ['Accept-Encoding'])
+            return response
+
+        accepted = accepted_encodings(request)
+        encoding, suffix = None, ''
+        if variants['br'] is not None and 'br' in accepted:
+            encoding, suffix = 'br', '.br'
+        elif variants['gzip'] is not None and ('gzip' in accepted or '*' in accepted):
+            encoding, suffix = 'gzip', '.gz'
+
+        content_type, _ = mimetypes.guess_type(path)
+        response = FileResponse(open(path + suffix, 'rb'), content_type=content_type or 'application/octet-stream')
+        response['Content-Length'] = str(variants[encoding or 'identity'])
+        response['Cache-Control'] = cache_control
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if variants['br'] is not None or variants['gzip'] is not None:
+            patch_vary_headers(response, ['Accept-Encoding'])
+        return response
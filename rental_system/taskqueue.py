@@ -0,0 +1,218 @@
+"""
+TASKQUEUE.PY - V13
+==================
+
+Lichte takenwachtrij in de bestaande database (geen Redis of Celery)
+Views zetten werk in de wachtrij en antwoorden meteen; `manage.py
+run_tasks` voert het uit:
+
+- @task('naam') registreert een functie (keyword argumenten, JSON)
+- enqueue('naam', run_at=..., **kwargs) maakt een Task rij, in dezelfde
+  transactie als de schrijfactie die haar aanmaakt
+- claimen met SELECT ... FOR UPDATE SKIP LOCKED waar de database dat
+  kent (PostgreSQL, MySQL 8), anders per taak een voorwaardelijke
+  UPDATE (SQLite): maar één worker krijgt een taak
+- mislukte taken worden opnieuw ingepland met exponentiële backoff
+  (met jitter) tot max_attempts, daarna 'failed'
+- taken van een gecrashte worker komen na TASKS_LOCK_TIMEOUT terug
+
+Met TASKS_EAGER draait elke taak meteen na de commit, in het proces
+zelf (lokaal ontwikkelen zonder worker).
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .db_router import primary
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def task(name, max_attempts=None):
+    """Decorator: registreer een functie als taak onder `name`"""
+    def decorator(func):
+        if name in _registry and _registry[name][0] is not func:
+            raise ValueError(f'Task {name!r} is already registered')
+        _registry[name] = (func, max_attempts)
+        func.task_name = name
+        return func
+    return decorator
+
+
+def registered_tasks():
+    return sorted(_registry)
+
+
+def _task_name(name_or_func):
+    name = getattr(name_or_func, 'task_name', name_or_func)
+    if name not in _registry:
+        raise ValueError(f'Unknown task: {name}')
+    return name
+
+
+def _new_task(name, kwargs, run_at, unique_key, max_attempts, now):
+    default_attempts = _registry[name][1] or getattr(settings, 'TASKS_MAX_ATTEMPTS', 5)
+    return Task(
+        name=name, kwargs=kwargs, run_at=run_at or now, unique_key=unique_key,
+        max_attempts=max_attempts or default_attempts,
+    )
+
+
+def _run_eager(task_ids):
+    transaction.on_commit(lambda: [run_task(claimed) for claimed in claim_ids(task_ids, 'eager')])
+
+
+def enqueue(name_or_func, run_at=None, delay=None, unique_key='', max_attempts=None, **kwargs):
+    """
+    Zet een taak in de wachtrij; geeft de Task terug.
+    delay (seconden) of run_at plant de taak later in. Met unique_key wordt
+    een nog wachtende taak met dezelfde key hergebruikt.
+    """
+    name = _task_name(name_or_func)
+    now = timezone.now()
+    if delay:
+        run_at = now + timedelta(seconds=delay)
+    if unique_key:
+        existing = Task.objects.filter(unique_key=unique_key, status=Task.QUEUED).first()
+        if existing is not None:
+            return existing
+    queued = _new_task(name, kwargs, run_at, unique_key, max_attempts, now)
+    queued.save()
+    if getattr(settings, 'TASKS_EAGER', False) and queued.run_at <= now:
+        _run_eager([queued.id])
+    return queued
+
+
+def enqueue_many(name_or_func, kwargs_list, run_at=None, unique_key=None):
+    """
+    Meerdere taken van hetzelfde soort in één INSERT.
+    unique_key: functie kwargs -> key; nog wachtende taken met die key worden overgeslagen.
+    """
+    name = _task_name(name_or_func)
+    now = timezone.now()
+    keyed = [(kwargs, unique_key(kwargs) if unique_key else '') for kwargs in kwargs_list]
+    if unique_key:
+        waiting = set(Task.objects.filter(
+            unique_key__in=[key for _, key in keyed], status=Task.QUEUED,
+        ).values_list('unique_key', flat=True))
+        keyed = [(kwargs, key) for kwargs, key in keyed if key not in waiting]
+    created = Task.objects.bulk_create([_new_task(name, kwargs, run_at, key, None, now) for kwargs, key in keyed])
+    if getattr(settings, 'TASKS_EAGER', False) and (run_at or now) <= now:
+        ids = [queued.id for queued in created if queued.id is not None]
+        if ids:
+            _run_eager(ids)
+    return created
+
+
+def _claim_values(worker, now):
+    return {'status': Task.RUNNING, 'locked_at': now, 'locked_by': worker, 'attempts': F('attempts') + 1}
+
+
+def claim(worker, limit):
+    """Claim maximaal `limit` taken die klaar zijn; geeft de geclaimde Tasks terug"""
+    with primary():
+        return _claim(worker, limit)
+
+
+def _claim(worker, limit):
+    now = timezone.now()
+    ready = Task.objects.filter(status=Task.QUEUED, run_at__lte=now).order_by('run_at', 'id')
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(ready.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            Task.objects.filter(id__in=ids).update(**_claim_values(worker, now))
+    else:
+        # Zonder SKIP LOCKED: per kandidaat een voorwaardelijke update, de eerste wint
+        ids = []
+        for task_id in ready.values_list('id', flat=True)[:limit * 2]:
+            if Task.objects.filter(id=task_id, status=Task.QUEUED).update(**_claim_values(worker, now)):
+                ids.append(task_id)
+                if len(ids) == limit:
+                    break
+    return list(Task.objects.filter(id__in=ids).order_by('run_at', 'id')) if ids else []
+
+
+def claim_ids(task_ids, worker):
+    """Specifieke taken claimen (eager modus)"""
+    now = timezone.now()
+    with primary():
+        claimed = [
+            task_id for task_id in task_ids
+            if Task.objects.filter(id=task_id, status=Task.QUEUED).update(**_claim_values(worker, now))
+        ]
+        return list(Task.objects.filter(id__in=claimed))
+
+
+def retry_delay(attempts):
+    """Exponentiële backoff met jitter na `attempts` mislukte pogingen"""
+    base = getattr(settings, 'TASKS_RETRY_BACKOFF', 10)
+    cap = getattr(settings, 'TASKS_RETRY_BACKOFF_MAX', 3600)
+    delay = min(cap, base * (2 ** max(attempts - 1, 0)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def run_task(claimed):
+    """Voer een geclaimde taak uit en registreer de uitkomst; True bij succes"""
+    entry = _registry.get(claimed.name)
+    mine = Task.objects.filter(id=claimed.id, status=Task.RUNNING, locked_by=claimed.locked_by)
+    if entry is None:
+        mine.update(status=Task.FAILED, finished_at=timezone.now(), last_error=f'Unknown task: {claimed.name}')
+        logger.error(f"❌ Task {claimed.id}: unknown task {claimed.name}")
+        return False
+
+    try:
+        # Taken lezen wat de request net geschreven heeft: primair
+        with primary():
+            entry[0](**claimed.kwargs)
+    except Exception as e:
+        error = ''.join(traceback.format_exception(type(e), e, e.__traceback__))[-4000:]
+        if claimed.attempts >= claimed.max_attempts:
+            mine.update(status=Task.FAILED, finished_at=timezone.now(), last_error=error)
+            logger.error(f"❌ Task {claimed.name} #{claimed.id} failed after {claimed.attempts} attempts: {str(e)}")
+        else:
+            delay = retry_delay(claimed.attempts)
+            mine.update(
+                status=Task.QUEUED, run_at=timezone.now() + timedelta(seconds=delay),
+                locked_at=None, locked_by='', last_error=error,
+            )
+            logger.warning(f"⚠️ Task {claimed.name} #{claimed.id} failed ({str(e)}), retry in {delay:.0f}s")
+        return False
+
+    mine.update(status=Task.DONE, finished_at=timezone.now(), last_error='')
+    logger.info(f"✅ Task {claimed.name} #{claimed.id} done")
+    return True
+
+
+def requeue_stale(now=None):
+    """Taken van een gecrashte worker terug in de wachtrij; geeft het aantal terug"""
+    now = now or timezone.now()
+    stale_before = now - timedelta(seconds=getattr(settings, 'TASKS_LOCK_TIMEOUT', 600))
+    return Task.objects.filter(status=Task.RUNNING, locked_at__lt=stale_before).update(
+        status=Task.QUEUED, locked_at=None, locked_by='',
+    )
+
+
+def purge_finished(now=None):
+    """Afgewerkte en definitief mislukte taken ouder dan TASKS_KEEP_FINISHED verwijderen"""
+    now = now or timezone.now()
+    keep = timedelta(seconds=getattr(settings, 'TASKS_KEEP_FINISHED', 7 * 24 * 3600))
+    deleted, _ = Task.objects.filter(status__in=[Task.DONE, Task.FAILED], finished_at__lt=now - keep).delete()
+    return deleted
+
+
+def queue_stats():
+    """Aantal taken per status"""
+    return {row['status']: row['total'] for row in Task.objects.values('status').annotate(total=Count('id'))}
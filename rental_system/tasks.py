@@ -0,0 +1,122 @@
+"""
+TASKS.PY - V13
+==============
+
+Achtergrondtaken van het rental system (zie taskqueue.py)
+- reservation_notification: bevestigingsmail naar de klant
+- wordpress_sync:           reservaties naar WordPress (batch endpoint)
+- warm_availability:        maand bucket opnieuw vullen na een wijziging
+                            (alleen met een gedeelde cache: de worker vult
+                            anders enkel zijn eigen LocMemCache)
+
+Een taak die een exception gooit wordt later opnieuw geprobeerd.
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import transaction
+
+from .cache_versions import cache_is_shared
+from .models import Rental, Resource
+from .taskqueue import enqueue, enqueue_many, task
+
+logger = logging.getLogger(__name__)
+
+
+def _reservation_payload(rental, notes=''):
+    return {
+        'rental_id': rental.id,
+        'resource': rental.resource.slug,
+        'customer_name': rental.customer_name,
+        'customer_email': rental.customer_email,
+        'start_date': rental.start_date.isoformat(),
+        'end_date': rental.end_date.isoformat(),
+        'formula': rental.formula,
+        'notes': notes,
+    }
+
+
+@task('reservation_notification')
+def reservation_notification(rental_id):
+    """Bevestigingsmail voor een nieuwe reservatie"""
+    rental = Rental.objects.select_related('resource').filter(id=rental_id).first()
+    if rental is None or not rental.customer_email:
+        logger.info(f"No notification for rental {rental_id} (deleted or no email)")
+        return
+    send_mail(
+        f'Reservatie {rental.id} - {rental.resource.name}',
+        (
+            f'Beste {rental.customer_name},\n\n'
+            f'Uw reservatie van {rental.start_date:%d/%m/%Y} tot en met {rental.end_date:%d/%m/%Y} '
+            f'({rental.formula or rental.resource.name}) is goed ontvangen.\n\n'
+            f'Met vriendelijke groeten,\nKroanWorks'
+        ),
+        getattr(settings, 'DEFAULT_FROM_EMAIL', None),
+        [rental.customer_email],
+        fail_silently=False,
+    )
+
+
+@task('wordpress_sync')
+def wordpress_sync(rental_ids, notes=None):
+    """Reservaties naar WordPress; mislukte items laten de taak opnieuw proberen"""
+    from .wordpress_api import WordPressAPIClient
+
+    notes = notes or {}
+    rentals = list(Rental.objects.select_related('resource').filter(id__in=rental_ids).order_by('id'))
+    if not rentals:
+        return
+    results = WordPressAPIClient().create_reservations_batch([
+        _reservation_payload(rental, notes.get(str(rental.id), '')) for rental in rentals
+    ])
+    failed = [rental.id for rental, result in zip(rentals, results) if not result.get('success')]
+    if failed:
+        # Alleen de mislukte reservaties opnieuw, als nieuwe taak
+        if len(failed) < len(rentals):
+            enqueue(wordpress_sync, rental_ids=failed, notes={str(rental_id): notes.get(str(rental_id), '') for rental_id in failed})
+            logger.warning(f"⚠️ WordPress sync: {len(failed)}/{len(rentals)} failed, requeued separately")
+            return
+        raise RuntimeError(f'WordPress sync failed for rentals {failed}')
+
+
+@task('warm_availability', max_attempts=2)
+def warm_availability(resource_id, year, month):
+    """Maand bucket van de huidige versie vullen (na een wijziging vervallen)"""
+    from .availability import get_month
+
+    resource = Resource.objects.filter(id=resource_id).first()
+    if resource is not None:
+        get_month(resource, year, month)
+
+
+def after_reservations(rentals, notes=None):
+    """
+    Werk na nieuwe reservaties in de wachtrij: mail, kalender opwarmen
+    (alleen met een gedeelde cache) en (met TASKS_WORDPRESS_SYNC) de
+    WordPress sync. Eén transactie.
+    """
+    with transaction.atomic():
+        if getattr(settings, 'RESERVATION_NOTIFICATIONS', True):
+            enqueue_many(reservation_notification, [{'rental_id': rental.id} for rental in rentals])
+        if cache_is_shared():
+            months = sorted({
+                (rental.resource_id, day.year, day.month)
+                for rental in rentals for day in (rental.start_date, rental.end_date)
+            })
+            enqueue_many(
+                warm_availability,
+                [{'resource_id': resource_id, 'year': year, 'month': month} for resource_id, year, month in months],
+                unique_key=lambda kwargs: f"warm_availability:{kwargs['resource_id']}:{kwargs['year']}-{kwargs['month']:02d}",
+            )
+        if getattr(settings, 'TASKS_WORDPRESS_SYNC', False):
+            notes = notes or {}
+            return enqueue(
+                wordpress_sync, rental_ids=[rental.id for rental in rentals],
+                notes={str(rental.id): notes.get(rental.id, '') for rental in rentals if notes.get(rental.id)},
+            )
+        return None
@@ -20,8 +20,13 @@ urlpatterns = [
     path('api/health', views.api_health, name='api_health'),
     path('api/user-session', views.api_user_session, name='api_user_session'),
     path('api/availability', views.api_availability, name='api_availability'),
+    path('api/availability-matrix', views.api_availability_matrix, name='api_availability_matrix'),
+    path('api/availability.ics', views.api_availability_ics, name='api_availability_ics'),
+    path('api/analytics', views.api_analytics, name='api_analytics'),
+    path('api/rentals', views.api_rentals, name='api_rentals'),
     path('api/calculate-price', views.api_calculate_price, name='api_calculate_price'),
     path('api/create-reservation', views.api_create_reservation, name='api_create_reservation'),
+    path('api/create-reservations', views.api_create_reservations_bulk, name='api_create_reservations_bulk'),
     path('api/login', views.api_login, name='api_login'),
     path('api/logout', views.api_logout, name='api_logout'),
     path('api/status', views.api_status, name='api_status'),
@@ -14,44 +14,42 @@ VERSIE: V15
 DATUM: 2025-10-29
 """
 
+from django.conf import settings
 from django.shortcuts import render, redirect
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_http_methods, condition
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.middleware.csrf import get_token
 import json
 import logging
 import traceback
-from datetime import datetime, timedelta
-from .wordpress_api import WordPressAPIClient
+from datetime import datetime
+from .wordpress_api import (
+    Deadline, WordPressAPIClient, get_request_metrics, get_singleflight_metrics
+)
+from . import analytics, availability, ical, page_cache, projection, quotes, rental_listing, reservations, tasks
+from .formulas import FORMULA_FIELDS, FORMULAS, get_formulas
+from .idempotency import idempotent
+from .ratelimit import ratelimit
 
 logger = logging.getLogger(__name__)
 
 def index(request):
-    """Main calendar view - Render Deployment Ready"""
+    """Main calendar view - Render Deployment Ready (cached per audience)"""
     try:
-        # Get WordPress API client
-        wp_client = WordPressAPIClient()
-        
-        # Test WordPress connection
-        wp_status = wp_client.test_connection()
-        is_wordpress_available = wp_status.get('success', False)
+        # WordPress status (kort gecached, geen live probe per page view)
+        is_wordpress_available = page_cache.wordpress_available(
+            lambda: WordPressAPIClient(deadline=Deadline.from_request(request))
+        )
         
         # Get WordPress status
         wordpress_status = "🟢 Connected" if is_wordpress_available else "🔴 Disconnected"
         
-        # Get user info from session
-        user_info = {}
-        if hasattr(request, 'user') and request.user.is_authenticated:
-            user_info = {
-                'username': request.user.username,
-                'email': getattr(request.user, 'email', ''),
-                'authenticated': True
-            }
-        else:
-            user_info = {'authenticated': False}
+        # Get user info from session (placeholders, per request ingevuld)
+        user_info = page_cache.audience_user_info(request)
         
         context = {
             'user_info': user_info,
@@ -64,8 +62,16 @@ def index(request):
             'django_env': 'Production - Render Ready'
         }
         
-        logger.info(f"V15 calendar view loaded - WordPress: {wordpress_status}")
-        return render(request, 'calendar.html', context)
+        key = page_cache.page_key('calendar', request, is_wordpress_available)
+        html, cache_hit = page_cache.get_or_render(key, 'calendar.html', context)
+        
+        # CSRF cookie zetten; de pagina zelf bevat geen token
+        get_token(request)
+        
+        response = HttpResponse(page_cache.personalise(html, request))
+        response['X-Page-Cache'] = 'hit' if cache_hit else 'miss'
+        patch_vary_headers(response, ['Cookie', 'Accept-Language'])
+        return response
         
     except Exception as e:
         logger.error(f"Error in index view: {str(e)}")
@@ -83,7 +89,7 @@ def index(request):
 def health_check(request):
     """Health check endpoint for Render deployment"""
     try:
-        wp_client = WordPressAPIClient()
+        wp_client = WordPressAPIClient(deadline=Deadline.from_request(request))
         wp_status = wp_client.test_connection()
         
         return JsonResponse({
@@ -138,7 +144,7 @@ def api_user_session(request):
             user_info = {'authenticated': False}
         
         # WordPress status
-        wp_client = WordPressAPIClient()
+        wp_client = WordPressAPIClient(deadline=Deadline.from_request(request))
         wp_status = wp_client.test_connection()
         is_wordpress_available = wp_status.get('success', False)
         
@@ -163,17 +169,20 @@ def api_user_session(request):
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
 def api_availability(request):
-    """Get availability data from WordPress API - V15 FIX: Both GET and POST support"""
+    """
+    Get availability data from WordPress API - V15 FIX: Both GET and POST support
+    Optional: fields=date,available,... and format=columnar (parallel arrays).
+    """
     try:
-        # Get CSRF token
-        csrf_token = get_token(request)
-        
         # Get date range from request
         if request.method == 'POST':
             data = json.loads(request.body)
             start_date = data.get('start_date', '') or data.get('start', '')
             end_date = data.get('end_date', '') or data.get('end', '')
-        elif request.method == 'GET':
+            resource_value = data.get('resource')
+            fields_value = data.get('fields')
+            format_value = data.get('format')
+        else:
             # Support query parameters from V14 template
             start_date = request.GET.get('start', '')
             end_date = request.GET.get('end', '')
@@ -183,20 +192,49 @@ def api_availability(request):
                 start_date = request.GET.get('start_date', '')
             if not end_date:
                 end_date = request.GET.get('end_date', '')
-        else:
+            resource_value = request.GET.get('resource')
+            fields_value = request.GET.get('fields')
+            format_value = request.GET.get('format')
+        
+        # Veldselectie/kolomformaat: alleen de gevraagde data
+        projected = bool(fields_value or format_value)
+        fields = projection.parse_fields(fields_value, availability.DAY_FIELDS)
+        output_format = projection.parse_format(format_value)
+        
+        if not start_date and not end_date:
             # Default to current month
-            today = datetime.now()
+            today = datetime.now().date()
             start_date = today.replace(day=1).strftime('%Y-%m-%d')
-            next_month = today.replace(day=28) + timedelta(days=4)
-            end_date = next_month.replace(day=1).strftime('%Y-%m-%d')
+            end_date = availability.month_end(today).strftime('%Y-%m-%d')
+        
+        # Alleen gevalideerde datums gaan verder (en terug in de response), nooit ruwe input
+        start_date = availability.parse_day(start_date, 'start').isoformat()
+        end_date = availability.parse_day(end_date, 'end').isoformat()
+        
+        # WordPress data + lokale bezetting, per maand gecached (+ prefetch)
+        resource = reservations.resolve_resource(resource_value)
+        availability_data = availability.get_availability(start_date, end_date, resource)
         
-        # Get data from WordPress API
-        wp_client = WordPressAPIClient()
-        availability_data = wp_client.get_availability(start_date, end_date)
+        if projected:
+            availability_data = dict(
+                availability_data,
+                data=projection.project(availability_data.get('data', []), fields, availability.DAY_FIELDS, output_format),
+                fields=list(fields),
+                format=output_format,
+            )
+            return JsonResponse({
+                'success': True,
+                'availability': availability_data,
+                'data_source': 'WordPress API',
+                'start_date': start_date,
+                'end_date': end_date,
+                'version': 'V15'
+            })
         
+        # Geen csrf_token in de body (BREACH: dan niet comprimeerbaar);
+        # clients lezen het uit de csrftoken cookie of api_user_session
         return JsonResponse({
             'success': True,
-            'csrf_token': csrf_token,
             'availability': availability_data,
             'data_source': 'WordPress API',
             'start_date': start_date,
@@ -204,12 +242,203 @@ def api_availability(request):
             'version': 'V15'
         })
         
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'version': 'V15'
+        }, status=400)
+        
     except Exception as e:
         logger.error(f"Error in api_availability: {str(e)}")
         return JsonResponse({
             'success': False,
             'error': str(e),
-            'csrf_token': '',
+            'version': 'V15'
+        }, status=500)
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def api_availability_matrix(request):
+    """Beschikbaarheid van de hele vloot: resources x dagen in één request"""
+    try:
+        today = datetime.now().date()
+        start_value = request.GET.get('start', '')
+        end_value = request.GET.get('end', '')
+        start_date = availability.parse_day(start_value, 'start') if start_value else today.replace(day=1)
+        end_date = availability.parse_day(end_value, 'end') if end_value else availability.month_end(start_date)
+        
+        slugs = [slug for slug in request.GET.get('resources', '').split(',') if slug]
+        resources = availability.select_resources(slugs)
+        matrix = availability.availability_matrix(start_date, end_date, resources)
+        
+        return JsonResponse({
+            'success': True,
+            'matrix': matrix,
+            'version': 'V15'
+        })
+        
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'version': 'V15'
+        }, status=400)
+        
+    except Exception as e:
+        logger.error(f"Error in api_availability_matrix: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'version': 'V15'
+        }, status=500)
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def api_analytics(request):
+    """Bezetting, omzet per formule en lead-time per maand of kwartaal (staff)"""
+    try:
+        if not (request.user.is_authenticated and request.user.is_staff):
+            return JsonResponse({
+                'success': False,
+                'error': 'Staff access required',
+                'version': 'V15'
+            }, status=403)
+        
+        granularity = request.GET.get('granularity', 'month')
+        periods = analytics.parse_periods(granularity, request.GET.get('start', ''), request.GET.get('end', ''))
+        slug = request.GET.get('resource', '')
+        resource = reservations.resolve_resource(slug) if slug else None
+        
+        return JsonResponse({
+            'success': True,
+            'granularity': granularity,
+            'resource': resource.slug if resource else None,
+            'periods': analytics.get_analytics(periods, granularity, resource),
+            'version': 'V15'
+        })
+        
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'version': 'V15'
+        }, status=400)
+        
+    except Exception as e:
+        logger.error(f"Error in api_analytics: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'version': 'V15'
+        }, status=500)
+
+@require_http_methods(["GET"])
+def api_rentals(request):
+    """
+    Reservaties voor de back office (staff), keyset gepagineerd op (created_at, id).
+    ?cursor= voor de volgende pagina, ?format=ndjson streamt alles.
+    """
+    try:
+        if not (request.user.is_authenticated and request.user.is_staff):
+            return JsonResponse({
+                'success': False,
+                'error': 'Staff access required',
+                'version': 'V15'
+            }, status=403)
+        
+        filters, order = rental_listing.parse_filters(request.GET)
+        cursor = request.GET.get('cursor') or None
+        
+        if request.GET.get('format') == 'ndjson':
+            response = StreamingHttpResponse(
+                rental_listing.stream_ndjson(filters, order, cursor),
+                content_type='application/x-ndjson'
+            )
+            response['Content-Disposition'] = 'attachment; filename="kroanworks-rentals.ndjson"'
+            return response
+        
+        try:
+            limit = int(request.GET['limit']) if request.GET.get('limit') else None
+        except ValueError:
+            raise ValueError('limit must be a number')
+        rentals, next_cursor = rental_listing.page(filters, order, cursor, limit)
+        
+        return JsonResponse({
+            'success': True,
+            'rentals': rentals,
+            'count': len(rentals),
+            'next_cursor': next_cursor,
+            'filters': filters,
+            'order': order,
+            'version': 'V15'
+        })
+        
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'version': 'V15'
+        }, status=400)
+        
+    except Exception as e:
+        logger.error(f"Error in api_rentals: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'version': 'V15'
+        }, status=500)
+
+def _ical_state(request):
+    """Range, resource + (etag, last_modified) van de ICS feed, één keer per request"""
+    if not hasattr(request, '_ical_state'):
+        try:
+            start_date, end_date = ical.parse_range(
+                request.GET.get('start', ''), request.GET.get('end', '')
+            )
+            slug = request.GET.get('resource', '')
+            resource = reservations.resolve_resource(slug) if slug else None
+            request._ical_state = (start_date, end_date, resource) + ical.feed_state(start_date, end_date, resource)
+        except ValueError:
+            request._ical_state = None
+    return request._ical_state
+
+def _ical_etag(request):
+    state = _ical_state(request)
+    return state[3] if state else None
+
+def _ical_last_modified(request):
+    state = _ical_state(request)
+    return state[4] if state else None
+
+@csrf_exempt
+@require_http_methods(["GET", "HEAD"])
+@condition(etag_func=_ical_etag, last_modified_func=_ical_last_modified)
+def api_availability_ics(request):
+    """ICS feed met bezette en voorbehouden periodes - cached + streamed"""
+    state = _ical_state(request)
+    if state is None:
+        return JsonResponse({
+            'success': False,
+            'error': 'Invalid date range or resource, use start/end as YYYY-MM-DD',
+            'version': 'V15'
+        }, status=400)
+
+    start_date, end_date, resource, etag, last_modified = state
+    try:
+        response = StreamingHttpResponse(
+            ical.get_feed(start_date, end_date, etag, last_modified, resource),
+            content_type='text/calendar; charset=utf-8'
+        )
+        response['Content-Disposition'] = 'inline; filename="kroanworks-beschikbaarheid.ics"'
+        patch_cache_control(response, public=True, max_age=300)
+        return response
+
+    except Exception as e:
+        logger.error(f"Error in api_availability_ics: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
             'version': 'V15'
         }, status=500)
 
@@ -219,7 +448,18 @@ def api_calculate_price(request):
     """Calculate rental price"""
     try:
         data = json.loads(request.body)
-        
+
+        # Offerte per formule (gecached); zonder formule de oude basisberekening
+        if data.get('formula'):
+            quote, cache_hit = quotes.get_quote(data)
+            return JsonResponse({
+                'success': True,
+                **quote,
+                'calculation': 'Formula quote',
+                'cached': cache_hit,
+                'version': 'V15'
+            })
+
         # Price calculation logic here
         base_price = 100.00  # Base price
         days = data.get('days', 1)
@@ -233,7 +473,13 @@ def api_calculate_price(request):
             'calculation': 'Base price calculation',
             'version': 'V15'
         })
-        
+
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'version': 'V15'
+        }, status=400)
     except Exception as e:
         logger.error(f"Error in api_calculate_price: {str(e)}")
         return JsonResponse({
@@ -244,21 +490,81 @@ def api_calculate_price(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@ratelimit('reservation')
+@idempotent('create_reservation')
 def api_create_reservation(request):
     """Create reservation in WordPress"""
     try:
         data = json.loads(request.body)
+        start_date, end_date = reservations.parse_period(data)
+        resource = reservations.resolve_resource(data.get('resource'))
+        
+        # Klantgegevens uit request of ingelogde gebruiker
+        user = getattr(request, 'user', None)
+        is_authenticated = bool(user and user.is_authenticated)
+        customer_name = data.get('customer_name') or (
+            (user.get_full_name() or user.username) if is_authenticated else 'Onbekend'
+        )
+        customer_email = data.get('customer_email') or (user.email if is_authenticated else '')
+        
+        # Lokale claim eerst: overlappende reservaties falen hier atomisch
+        rental = reservations.create_rental(
+            customer_name, customer_email, start_date, end_date, resource=resource,
+            formula=data.get('formula', '')
+        )
+        
+        # Mail, kalender opwarmen en eventueel WordPress sync: achtergrondtaken
+        sync_task = tasks.after_reservations([rental], notes={rental.id: data.get('notes', '')})
+        if sync_task is not None:
+            return JsonResponse({
+                'success': True,
+                'reservation_id': rental.id,
+                'resource': resource.slug,
+                'wordpress_reservation_id': None,
+                'wordpress_synced': False,
+                'wordpress_sync_task': sync_task.id,
+                'message': 'Reservation created successfully',
+                'version': 'V15'
+            })
         
         # WordPress reservation logic here
-        wp_client = WordPressAPIClient()
+        wp_client = WordPressAPIClient(deadline=Deadline.from_request(request))
+        wp_result = wp_client.create_reservation({
+            'rental_id': rental.id,
+            'resource': resource.slug,
+            'customer_name': customer_name,
+            'customer_email': customer_email,
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'formula': data.get('formula', ''),
+            'notes': data.get('notes', ''),
+        })
         
         return JsonResponse({
             'success': True,
-            'reservation_id': 'reservation-123',
+            'reservation_id': rental.id,
+            'resource': resource.slug,
+            'wordpress_reservation_id': wp_result.get('reservation_id'),
+            'wordpress_synced': wp_result.get('success', False),
             'message': 'Reservation created successfully',
             'version': 'V15'
         })
         
+    except reservations.BookingConflict as e:
+        logger.warning(f"Booking conflict in api_create_reservation: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'version': 'V15'
+        }, status=409)
+        
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'version': 'V15'
+        }, status=400)
+        
     except Exception as e:
         logger.error(f"Error in api_create_reservation: {str(e)}")
         return JsonResponse({
@@ -267,8 +573,152 @@ def api_create_reservation(request):
             'version': 'V15'
         }, status=500)
 
+def _bulk_item(data, index, customer_name, customer_email, resources):
+    """Eén item van een bulk reservatie valideren; ValueError met de index erbij"""
+    if not isinstance(data, dict):
+        raise ValueError(f'items[{index}] must be an object')
+    try:
+        start_date, end_date = reservations.parse_period(data)
+        # Eén lookup per resource, niet per item
+        key = data.get('resource')
+        if key not in resources:
+            resources[key] = reservations.resolve_resource(key)
+        resource = resources[key]
+    except ValueError as e:
+        raise ValueError(f'items[{index}]: {e}')
+    return {
+        'customer_name': data.get('customer_name') or customer_name,
+        'customer_email': data.get('customer_email') or customer_email,
+        'start_date': start_date,
+        'end_date': end_date,
+        'resource': resource,
+        'formula': data.get('formula', ''),
+    }
+
 @csrf_exempt
 @require_http_methods(["POST"])
+@ratelimit('bulk_reservation')
+@idempotent('create_reservations_bulk')
+def api_create_reservations_bulk(request):
+    """
+    Create several reservations in one request.
+    mode 'atomic' (default): all items or none; 'per_item': each item on its own.
+    WordPress receives them through /batch/v1, per item results in the response.
+    """
+    try:
+        data = json.loads(request.body)
+        mode = data.get('mode', reservations.BULK_ATOMIC)
+        if mode not in reservations.BULK_MODES:
+            raise ValueError(f'mode must be one of {", ".join(reservations.BULK_MODES)}')
+        items = data.get('items')
+        if not isinstance(items, list) or not items:
+            raise ValueError('items must be a non-empty list')
+        max_items = getattr(settings, 'BULK_RESERVATION_MAX_ITEMS', 100)
+        if len(items) > max_items:
+            raise ValueError(f'At most {max_items} items per request')
+        
+        # Klantgegevens per item, anders uit request of ingelogde gebruiker
+        user = getattr(request, 'user', None)
+        is_authenticated = bool(user and user.is_authenticated)
+        customer_name = data.get('customer_name') or (
+            (user.get_full_name() or user.username) if is_authenticated else 'Onbekend'
+        )
+        customer_email = data.get('customer_email') or (user.email if is_authenticated else '')
+        
+        # Eerst alles valideren; atomic faalt hier voor er iets geclaimd is
+        results = [{'index': index, 'success': False} for index in range(len(items))]
+        valid = {}
+        resources = {}
+        for index, item in enumerate(items):
+            try:
+                valid[index] = _bulk_item(item, index, customer_name, customer_email, resources)
+            except ValueError as e:
+                if mode == reservations.BULK_ATOMIC:
+                    raise
+                results[index]['error'] = str(e)
+        
+        # Lokale claims in één transactie
+        indexes = list(valid)
+        created = reservations.create_rentals([valid[index] for index in indexes], mode=mode)
+        rentals = []
+        for index, (rental, error) in zip(indexes, created):
+            if rental is None:
+                results[index]['error'] = error
+                continue
+            results[index].update({
+                'success': True,
+                'reservation_id': rental.id,
+                'resource': rental.resource.slug,
+            })
+            rentals.append((index, rental))
+        
+        # Mail, kalender opwarmen en eventueel WordPress sync: achtergrondtaken
+        sync_task = None
+        if rentals:
+            sync_task = tasks.after_reservations(
+                [rental for _, rental in rentals],
+                notes={rental.id: items[index].get('notes', '') for index, rental in rentals},
+            )
+        if sync_task is not None:
+            for index, rental in rentals:
+                results[index].update({'wordpress_synced': False, 'wordpress_sync_task': sync_task.id})
+        
+        # WordPress: batches van maximaal 25 na de commit
+        elif rentals:
+            wp_client = WordPressAPIClient(deadline=Deadline.from_request(request))
+            wp_results = wp_client.create_reservations_batch([{
+                'rental_id': rental.id,
+                'resource': rental.resource.slug,
+                'customer_name': rental.customer_name,
+                'customer_email': rental.customer_email,
+                'start_date': rental.start_date.isoformat(),
+                'end_date': rental.end_date.isoformat(),
+                'formula': rental.formula,
+                'notes': items[index].get('notes', ''),
+            } for index, rental in rentals])
+            for (index, rental), wp_result in zip(rentals, wp_results):
+                results[index].update({
+                    'wordpress_reservation_id': wp_result.get('reservation_id'),
+                    'wordpress_synced': wp_result.get('success', False),
+                })
+        
+        failed = len(items) - len(rentals)
+        return JsonResponse({
+            'success': failed == 0,
+            'mode': mode,
+            'created': len(rentals),
+            'failed': failed,
+            'results': results,
+            'version': 'V15'
+        })
+        
+    except reservations.BulkConflict as e:
+        logger.warning(f"Booking conflict in api_create_reservations_bulk: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'index': e.index,
+            'version': 'V15'
+        }, status=409)
+        
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'version': 'V15'
+        }, status=400)
+        
+    except Exception as e:
+        logger.error(f"Error in api_create_reservations_bulk: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'version': 'V15'
+        }, status=500)
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@ratelimit('login', keys=('ip', 'username'))
 def api_login(request):
     """Handle user login"""
     try:
@@ -277,7 +727,7 @@ def api_login(request):
         password = data.get('password', '')
         
         # WordPress authentication
-        wp_client = WordPressAPIClient()
+        wp_client = WordPressAPIClient(deadline=Deadline.from_request(request))
         auth_result = wp_client.authenticate_user(username, password)
         
         if auth_result.get('success'):
@@ -309,7 +759,7 @@ def api_logout(request):
     """Handle user logout"""
     try:
         # WordPress logout
-        wp_client = WordPressAPIClient()
+        wp_client = WordPressAPIClient(deadline=Deadline.from_request(request))
         
         return JsonResponse({
             'success': True,
@@ -330,12 +780,17 @@ def api_logout(request):
 def api_status(request):
     """Get system status"""
     try:
-        wp_client = WordPressAPIClient()
+        wp_client = WordPressAPIClient(deadline=Deadline.from_request(request))
         wp_status = wp_client.test_connection()
         
         return JsonResponse({
             'system_status': 'operational',
             'wordpress_connection': wp_status,
+            'wordpress_client_metrics': {
+                'singleflight': get_singleflight_metrics(),
+                'requests': get_request_metrics(),
+            },
+            'quote_cache': quotes.get_quote_cache_stats(),
             'django_version': '4.2.7',
             'render_ready': True,
             'version': 'V15',
@@ -352,17 +807,21 @@ def api_status(request):
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@ratelimit('wordpress_test')
 def api_wordpress_test(request):
-    """Test WordPress API connection"""
+    """Test WordPress API connection; ?full=1 also probes all configured endpoints"""
     try:
-        wp_client = WordPressAPIClient()
+        wp_client = WordPressAPIClient(deadline=Deadline.from_request(request))
         test_result = wp_client.test_connection()
         
-        return JsonResponse({
+        payload = {
             'wordpress_test': test_result,
             'api_url': wp_client.base_url,
             'version': 'V15'
-        })
+        }
+        if request.GET.get('full') in ['1', 'true']:
+            payload['url_tests'] = wp_client.test_wordpress_urls()
+        return JsonResponse(payload)
         
     except Exception as e:
         logger.error(f"Error in api_wordpress_test: {str(e)}")
@@ -378,39 +837,28 @@ def api_wordpress_test(request):
 @csrf_exempt
 @require_http_methods(["GET"])
 def api_formulas(request):
-    """Get pricing formulas - V15 Array Format"""
-    formulas = [
-        {
-            'name': 'Weekend formule',
-            'price': 150.00,
-            'included_km': 100,
-            'deposit': 200.00,
-            'extra_km_rate': 0.30
-        },
-        {
-            'name': 'Midweek formule',
-            'price': 120.00,
-            'included_km': 80,
-            'deposit': 150.00,
-            'extra_km_rate': 0.30
-        },
-        {
-            'name': 'Week formule',
-            'price': 450.00,
-            'included_km': 300,
-            'deposit': 400.00,
-            'extra_km_rate': 0.25
-        },
-        {
-            'name': 'Langere-termijn formule',
-            'price': 100.00,
-            'included_km': 200,
-            'deposit': 100.00,
-            'extra_km_rate': 0.20
-        }
-    ]
+    """Get pricing formulas - V15 Array Format; optional fields=name,price and format=columnar"""
+    fields_value = request.GET.get('fields')
+    format_value = request.GET.get('format')
+    if not (fields_value or format_value):
+        return JsonResponse({
+            'formulas': get_formulas(),
+            'version': 'V15'
+        })
+    
+    try:
+        fields = projection.parse_fields(fields_value, FORMULA_FIELDS)
+        output_format = projection.parse_format(format_value)
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e),
+            'version': 'V15'
+        }, status=400)
     return JsonResponse({
-        'formulas': formulas,
+        'formulas': projection.project(FORMULAS, fields, FORMULA_FIELDS, output_format),
+        'fields': list(fields),
+        'format': output_format,
         'version': 'V15'
     })
 
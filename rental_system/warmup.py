@@ -0,0 +1,157 @@
+"""
+WARMUP.PY - V13
+===============
+
+Warm-start voor (gunicorn) workers
+Opt-in via WARMUP_ENABLED. Twee fases:
+
+- pre_fork:  templates compileren, URL resolver opbouwen, formule
+             catalogus laden. Geen database of netwerk, dus veilig in
+             de gunicorn master met preload_app.
+- post_fork: database connectie, WordPress connection pool (TLS
+             handshake), blackout kalender en beschikbaarheid van de huidige en volgende
+             maanden. Per worker, na de fork (zie gunicorn.conf.py).
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import logging
+import time
+from datetime import date
+
+from django.conf import settings
+from django.db import connection, connections
+from django.template.loader import get_template
+from django.urls import get_resolver, reverse
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES = ['calendar.html']
+
+
+def warm_templates():
+    for name in TEMPLATES:
+        get_template(name)
+    return len(TEMPLATES)
+
+
+def warm_urls():
+    """Resolver vullen en elke naamloze-argument route één keer reversen"""
+    resolver = get_resolver()
+    resolver.url_patterns
+    count = 0
+    for name in resolver.reverse_dict.keys():
+        if isinstance(name, str):
+            try:
+                reverse(name)
+                count += 1
+            except Exception:
+                pass
+    return count
+
+
+def warm_formulas():
+    from .formulas import get_catalogue
+    return len(get_catalogue())
+
+
+def warm_database():
+    connection.ensure_connection()
+    return connection.vendor
+
+
+def warm_wordpress():
+    """Eerste TLS handshake vooraf, connectie blijft in de pool van dit proces"""
+    from .wordpress_api import WordPressAPIClient
+    return WordPressAPIClient().test_connection().get('success', False)
+
+
+def warm_blackouts():
+    """Blackout kalender compileren vóór de eerste beschikbaarheid request"""
+    from .blackouts import get_calendar
+    return get_calendar().stats()['closed_days']
+
+
+def _months_ahead(months, today=None):
+    today = today or date.today()
+    year, month = today.year, today.month
+    for _ in range(months):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def warm_availability():
+    """Maand buckets van de huidige en volgende maand(en) vooraf vullen"""
+    from .availability import availability_matrix, get_month, month_end, select_resources
+
+    resources = select_resources()
+    months = 0
+    for year, month in _months_ahead(getattr(settings, 'WARMUP_PREFETCH_MONTHS', 2)):
+        start_date = date(year, month, 1)
+        for resource in resources:
+            get_month(resource, year, month)
+        availability_matrix(start_date, month_end(start_date), resources)
+        months += 1
+    return months
+
+
+PRE_FORK_PHASES = [
+    ('templates', warm_templates),
+    ('urls', warm_urls),
+    ('formulas', warm_formulas),
+]
+
+POST_FORK_PHASES = [
+    ('database', warm_database),
+    ('wordpress', warm_wordpress),
+    ('blackouts', warm_blackouts),
+    ('availability', warm_availability),
+]
+
+
+def run_phases(phases):
+    """Voer fases uit; een fout in één fase stopt de andere niet"""
+    timings = {}
+    for name, phase in phases:
+        started = time.perf_counter()
+        try:
+            result = phase()
+            status = 'ok'
+        except Exception as e:
+            result = str(e)
+            status = 'error'
+            logger.warning(f"⚠️ Warm-up phase {name} failed: {str(e)}")
+        timings[name] = {
+            'status': status,
+            'result': result,
+            'ms': round((time.perf_counter() - started) * 1000, 1),
+        }
+    return timings
+
+
+def is_enabled():
+    return getattr(settings, 'WARMUP_ENABLED', False)
+
+
+def pre_fork():
+    """Vanuit RentalSystemConfig.ready() (master met preload_app, of elke worker)"""
+    timings = run_phases(PRE_FORK_PHASES)
+    # Workers mogen geen connecties van de master erven
+    connections.close_all()
+    logger.info(f"✅ Warm-up pre_fork: {timings}")
+    return timings
+
+
+def post_fork():
+    """Vanuit gunicorn post_worker_init, nadat de app in de worker geladen is"""
+    timings = run_phases(POST_FORK_PHASES)
+    logger.info(f"✅ Warm-up post_fork: {timings}")
+    return timings
+
+
+def warm_up():
+    """Alle fases, bv. voor een enkel proces zonder gunicorn hooks"""
+    timings = pre_fork()
+    timings.update(post_fork())
+    return timings
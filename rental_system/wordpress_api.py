@@ -22,13 +22,240 @@ DATUM: 2025-10-29
 """
 
 import requests
+import hashlib
 import logging
 import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait as wait_futures
 from django.conf import settings
+from django.core.cache import cache
 from datetime import datetime, date
 
+from .profiling import record_call
+from .wordpress_probe import probe_endpoints
+
 logger = logging.getLogger(__name__)
 
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Het tijdsbudget van de request is op; geen nieuwe upstream call meer"""
+
+
+class Deadline:
+    """
+    Tijdsbudget van één inkomende request, doorgegeven aan de client.
+    Elke upstream call krijgt min(eigen timeout, resterend budget).
+    """
+
+    HEADER = 'HTTP_X_REQUEST_TIMEOUT'
+
+    def __init__(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def from_request(cls, request):
+        """Budget uit de X-Request-Timeout header (seconden), anders uit settings"""
+        budget = getattr(settings, 'WORDPRESS_REQUEST_BUDGET', 8.0)
+        try:
+            budget = min(budget, float(request.META.get(cls.HEADER, budget)))
+        except (TypeError, ValueError):
+            pass
+        return cls(max(budget, 0.0))
+
+    def remaining(self):
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def timeout(self, cap):
+        """Timeout voor de volgende call; DeadlineExceeded als er niets meer over is"""
+        remaining = self.remaining()
+        if remaining <= 0.05:
+            raise DeadlineExceeded('Request deadline exceeded before upstream call')
+        return min(cap, remaining)
+
+
+class LatencyTracker:
+    """Glijdend venster van latencies per endpoint, voor p95 (hedging)"""
+
+    def __init__(self, size=200):
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._size = size
+
+    def record(self, key, seconds):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self._size)).append(seconds)
+
+    def percentile(self, key, percentile=95, min_samples=20):
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * percentile / 100))]
+
+
+class _InFlightCall:
+    """Eén lopende upstream call waar andere threads op wachten"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Single-flight voor identieke idempotente GETs.
+    Gelijktijdige callers met dezelfde key delen één upstream call en
+    krijgen allemaal hetzelfde resultaat (of dezelfde exception).
+    Optioneel ook over processen heen via een lock in de Django cache.
+    """
+
+    CACHE_PREFIX = 'wp:sf:v1'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._metrics = {
+            'leader_calls': 0,
+            'coalesced_calls': 0,
+            'cross_process_hits': 0,
+            'errors': 0,
+        }
+
+    def _count(self, metric):
+        with self._lock:
+            self._metrics[metric] += 1
+
+    def metrics(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['in_flight'] = len(self._calls)
+        return metrics
+
+    def do(self, key, fn, timeout=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _InFlightCall()
+            else:
+                self._metrics['coalesced_calls'] += 1
+
+        if not leader:
+            if not call.event.wait(timeout):
+                raise DeadlineExceeded('Request deadline exceeded while waiting for in-flight call')
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run_leader(key, fn, timeout)
+            return call.result
+        except Exception as e:
+            call.error = e
+            self._count('errors')
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def _run_leader(self, key, fn, timeout=None):
+        if not getattr(settings, 'WORDPRESS_SINGLEFLIGHT_CROSS_PROCESS', False):
+            self._count('leader_calls')
+            return fn()
+
+        # Cross-process: één proces haalt op, de rest leest het resultaat uit de cache
+        ttl = getattr(settings, 'WORDPRESS_SINGLEFLIGHT_RESULT_TTL', 2)
+        wait = getattr(settings, 'WORDPRESS_SINGLEFLIGHT_WAIT', 5)
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        result_key = f'{self.CACHE_PREFIX}:result:{digest}'
+        lock_key = f'{self.CACHE_PREFIX}:lock:{digest}'
+
+        result = cache.get(result_key)
+        owner = result is None and cache.add(lock_key, 1, timeout=wait)
+        if result is None and not owner:
+            # Wachten op het andere proces, nooit langer dan de request deadline
+            limited = timeout is not None and timeout < wait
+            until = time.monotonic() + (timeout if limited else wait)
+            while result is None and time.monotonic() < until:
+                time.sleep(0.05)
+                result = cache.get(result_key)
+            if result is None and limited:
+                raise DeadlineExceeded('Request deadline exceeded while waiting for another process')
+        if result is not None:
+            self._count('cross_process_hits')
+            return result
+
+        if not owner:
+            # Het andere proces is te traag of weg: zelf ophalen, lock alleen als hij vrij is
+            owner = cache.add(lock_key, 1, timeout=wait)
+        try:
+            self._count('leader_calls')
+            result = fn()
+            cache.set(result_key, result, timeout=ttl)
+            return result
+        finally:
+            # Alleen onze eigen lock vrijgeven
+            if owner:
+                cache.delete(lock_key)
+
+
+# Gedeeld per proces: clients worden per request aangemaakt
+singleflight = SingleFlight()
+
+
+def get_singleflight_metrics():
+    """Tellers van de single-flight laag (hoeveel calls gedeeld werden)"""
+    return singleflight.metrics()
+
+
+# Latencies, retries en hedges: gedeeld per proces
+latency_tracker = LatencyTracker()
+_request_metrics_lock = threading.Lock()
+_request_metrics = {'requests': 0, 'retries': 0, 'hedged': 0, 'hedge_wins': 0, 'deadline_exceeded': 0}
+_hedge_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='wp-hedge')
+
+RETRY_STATUSES = (502, 503, 504)
+# WordPress core weigert /batch/v1 requests met meer dan 25 sub-requests
+BATCH_MAX_REQUESTS = 25
+RESERVATIONS_ROUTE = '/wp/v2/reservations'
+
+
+def _count_request_metric(metric):
+    with _request_metrics_lock:
+        _request_metrics[metric] += 1
+
+
+def get_request_metrics():
+    """Tellers voor retries en hedged requests"""
+    with _request_metrics_lock:
+        return dict(_request_metrics)
+
+_adapter_lock = threading.Lock()
+_adapter_state = {'pid': None, 'adapter': None}
+
+
+def get_http_adapter():
+    """
+    Gedeelde connection pool per proces. Na een fork (gunicorn workers)
+    krijgt het nieuwe proces een eigen pool; sockets worden niet gedeeld.
+    """
+    pid = os.getpid()
+    with _adapter_lock:
+        if _adapter_state['pid'] != pid:
+            _adapter_state['adapter'] = requests.adapters.HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=getattr(settings, 'WORDPRESS_POOL_MAXSIZE', 10)
+            )
+            _adapter_state['pid'] = pid
+        return _adapter_state['adapter']
+
+
 class WordPressAPIClient:
     """
     V13: WordPress API client - RENDER DEPLOYMENT READY
@@ -36,15 +263,21 @@ class WordPressAPIClient:
     Production-ready for Render deployment
     """
     
-    def __init__(self):
+    def __init__(self, deadline=None):
+        # Tijdsbudget van de inkomende request (zie Deadline.from_request)
+        self.deadline = deadline
+        
         # WordPress configuratie
         self.base_url = getattr(settings, 'WORDPRESS_API_URL', 'https://test.kroanworks.be/wp-json')
         self.username = getattr(settings, 'WORDPRESS_JWT_USERNAME', 'Luc_Snel')
         self.password = getattr(settings, 'WORDPRESS_JWT_PASSWORD', 'Mozart-480111')
         self.home_url = getattr(settings, 'WORDPRESS_HOME_URL', 'https://test.kroanworks.be')
         
-        # HTTP Session voor hergebruik
+        # HTTP Session voor hergebruik; connecties uit de gedeelde pool van dit proces
         self.session = requests.Session()
+        adapter = get_http_adapter()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         
         # Headers voor alle requests
         self.default_headers = {
@@ -55,17 +288,118 @@ class WordPressAPIClient:
         
         logger.info(f"V13 WordPress API Client initialized - URL: {self.base_url}")
     
+    def _get(self, url, timeout, params=None):
+        """Idempotente GET via de single-flight laag"""
+        query = '&'.join(f'{k}={v}' for k, v in sorted((params or {}).items()))
+        key = f'GET {url}?{query}'
+        wait = self.deadline.remaining() if self.deadline else None
+        return singleflight.do(
+            key,
+            lambda: self._request('GET', url, timeout, idempotent=True, params=params),
+            timeout=wait
+        )
+    
+    def _timeout(self, cap):
+        return self.deadline.timeout(cap) if self.deadline else cap
+    
+    def _request(self, method, url, timeout, idempotent=False, **kwargs):
+        """
+        Upstream call binnen het resterende budget.
+        Idempotente calls krijgen jittered exponential backoff retries,
+        GETs optioneel een hedged tweede request boven de p95.
+        """
+        _count_request_metric('requests')
+        max_retries = getattr(settings, 'WORDPRESS_MAX_RETRIES', 2) if idempotent else 0
+        base = getattr(settings, 'WORDPRESS_RETRY_BACKOFF', 0.1)
+        cap = getattr(settings, 'WORDPRESS_RETRY_BACKOFF_MAX', 1.0)
+        
+        for attempt in range(max_retries + 1):
+            last_attempt = attempt == max_retries
+            try:
+                call_timeout = self._timeout(timeout)
+            except DeadlineExceeded:
+                _count_request_metric('deadline_exceeded')
+                raise
+            
+            try:
+                if method == 'GET' and getattr(settings, 'WORDPRESS_HEDGE_ENABLED', False):
+                    response = self._hedged_get(url, call_timeout, **kwargs)
+                else:
+                    response = self._send(method, url, call_timeout, **kwargs)
+                if response.status_code not in RETRY_STATUSES or last_attempt:
+                    return response
+                logger.warning(f"⚠️ WordPress {method} {url} returned {response.status_code}, retrying")
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if last_attempt or isinstance(e, DeadlineExceeded):
+                    raise
+                logger.warning(f"⚠️ WordPress {method} {url} failed ({e.__class__.__name__}), retrying")
+            
+            # Full jitter; niet slapen als het budget daarna op is
+            backoff = random.uniform(0, min(cap, base * (2 ** attempt)))
+            if self.deadline and backoff >= self.deadline.remaining():
+                _count_request_metric('deadline_exceeded')
+                raise DeadlineExceeded('Request deadline exceeded before retry')
+            _count_request_metric('retries')
+            time.sleep(backoff)
+    
+    def _send(self, method, url, timeout, **kwargs):
+        started = time.monotonic()
+        try:
+            response = self.session.request(
+                method,
+                url,
+                headers=self.default_headers,
+                timeout=timeout,
+                **kwargs
+            )
+        finally:
+            # Ook mislukte calls tellen mee in een lopend profiel
+            record_call('wordpress', f'{method} {url}', time.monotonic() - started)
+        latency_tracker.record(url, time.monotonic() - started)
+        return response
+    
+    def _hedged_get(self, url, timeout, **kwargs):
+        """
+        Start een tweede identieke GET als de eerste trager is dan de
+        geobserveerde p95. Het eerste geslaagde antwoord wint. Begrensd
+        door WORDPRESS_HEDGE_MAX_RATIO om WordPress niet te overladen.
+        """
+        p95 = latency_tracker.percentile(url, min_samples=getattr(settings, 'WORDPRESS_HEDGE_MIN_SAMPLES', 20))
+        metrics = get_request_metrics()
+        max_ratio = getattr(settings, 'WORDPRESS_HEDGE_MAX_RATIO', 0.1)
+        if p95 is None or p95 >= timeout or metrics['hedged'] >= metrics['requests'] * max_ratio:
+            return self._send('GET', url, timeout, **kwargs)
+        
+        started = time.monotonic()
+        first = _hedge_pool.submit(self._send, 'GET', url, timeout, **kwargs)
+        done, _ = wait_futures([first], timeout=p95)
+        if done:
+            return first.result()
+        
+        _count_request_metric('hedged')
+        second = _hedge_pool.submit(self._send, 'GET', url, max(timeout - (time.monotonic() - started), 0.05), **kwargs)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait_futures(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except requests.exceptions.RequestException as e:
+                    error = e
+                    continue
+                if future is second:
+                    _count_request_metric('hedge_wins')
+                return response
+        raise error
+    
     def test_connection(self):
         """Test WordPress API verbinding"""
         try:
             logger.info("Testing WordPress API connection...")
             
             # Test basic connection
-            response = self.session.get(
-                f"{self.base_url}/wp/v2/posts",
-                headers=self.default_headers,
-                timeout=2
-            )
+            response = self._get(f"{self.base_url}/wp/v2/posts", timeout=2)
             
             if response.status_code == 200:
                 logger.info("✅ WordPress API connection successful")
@@ -113,11 +447,11 @@ class WordPressAPIClient:
                 'password': password
             }
             
-            response = self.session.post(
+            response = self._request(
+                'POST',
                 f"{self.base_url}/jwt-auth/v1/token",
-                json=auth_data,
-                headers=self.default_headers,
-                timeout=10
+                timeout=10,
+                json=auth_data
             )
             
             if response.status_code == 200:
@@ -194,23 +528,25 @@ class WordPressAPIClient:
                 'version': 'V13'
             }
     
+    @staticmethod
+    def _reservation_post(reservation_data):
+        """Reservation post voor WordPress (custom post type)"""
+        return {
+            'title': f"Reservation - {reservation_data.get('customer_name', 'Unknown')}",
+            'content': json.dumps(reservation_data),
+            'status': 'private'  # or 'publish' depending on your needs
+        }
+    
     def create_reservation(self, reservation_data):
         """Create reservation in WordPress"""
         try:
             logger.info("Creating reservation in WordPress")
             
-            # In real implementation, this would create a reservation post in WordPress
-            reservation_post = {
-                'title': f"Reservation - {reservation_data.get('customer_name', 'Unknown')}",
-                'content': json.dumps(reservation_data),
-                'status': 'private'  # or 'publish' depending on your needs
-            }
-            
-            response = self.session.post(
-                f"{self.base_url}/wp/v2/reservations",  # Custom post type
-                json=reservation_post,
-                headers=self.default_headers,
-                timeout=10
+            response = self._request(
+                'POST',
+                f"{self.base_url}{RESERVATIONS_ROUTE}",  # Custom post type
+                timeout=10,
+                json=self._reservation_post(reservation_data)
             )
             
             if response.status_code in [200, 201]:
@@ -239,6 +575,78 @@ class WordPressAPIClient:
                 'version': 'V13'
             }
     
+    def create_reservations_batch(self, reservations_data):
+        """
+        Create several reservations through the WordPress batch endpoint
+        (/batch/v1, WordPress 5.6+), at most BATCH_MAX_REQUESTS per call.
+        Returns one result per reservation, in the same order.
+        """
+        size = max(1, min(getattr(settings, 'WORDPRESS_BATCH_SIZE', BATCH_MAX_REQUESTS), BATCH_MAX_REQUESTS))
+        results = []
+        for offset in range(0, len(reservations_data), size):
+            results.extend(self._create_reservation_chunk(reservations_data[offset:offset + size]))
+        return results
+    
+    def _create_reservation_chunk(self, chunk):
+        try:
+            logger.info(f"Creating {len(chunk)} reservations in WordPress (batch)")
+            response = self._request(
+                'POST',
+                f"{self.base_url}/batch/v1",
+                timeout=15,
+                json={
+                    'validation': 'normal',
+                    'requests': [
+                        {'method': 'POST', 'path': RESERVATIONS_ROUTE, 'body': self._reservation_post(data)}
+                        for data in chunk
+                    ],
+                },
+            )
+            
+            if response.status_code == 404:
+                # Geen batch endpoint (WordPress < 5.6): één POST per reservatie
+                logger.warning("⚠️ WordPress batch endpoint not available, creating reservations one by one")
+                return [self.create_reservation(data) for data in chunk]
+            
+            if response.status_code not in [200, 207]:
+                logger.warning(f"⚠️ Failed to create reservation batch: {response.status_code}")
+                return [{
+                    'success': False,
+                    'message': f'Failed to create reservation batch: {response.status_code}',
+                    'version': 'V13'
+                } for _ in chunk]
+            
+            responses = response.json().get('responses', [])
+            results = []
+            for index in range(len(chunk)):
+                item = responses[index] if index < len(responses) else {}
+                status = item.get('status')
+                body = item.get('body') or {}
+                if status in [200, 201]:
+                    results.append({
+                        'success': True,
+                        'reservation_id': body.get('id'),
+                        'reservation_data': body,
+                        'version': 'V13'
+                    })
+                else:
+                    results.append({
+                        'success': False,
+                        'message': f"Failed to create reservation: {status} {body.get('message', '') if isinstance(body, dict) else ''}".strip(),
+                        'version': 'V13'
+                    })
+            logger.info(f"✅ Reservation batch: {sum(result['success'] for result in results)}/{len(chunk)} created")
+            return results
+            
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error(f"❌ Error creating reservation batch: {str(e)}")
+            return [{
+                'success': False,
+                'message': f'Reservation error: {str(e)}',
+                'error': str(e),
+                'version': 'V13'
+            } for _ in chunk]
+    
     def get_pricing_formulas(self):
         """Get pricing formulas from WordPress"""
         try:
@@ -292,10 +700,10 @@ class WordPressAPIClient:
             logger.info(f"Getting user data for: {username}")
             
             # Get user from WordPress REST API
-            response = self.session.get(
-                f"{self.base_url}/wp/v2/users?search={username}",
-                headers=self.default_headers,
-                timeout=10
+            response = self._get(
+                f"{self.base_url}/wp/v2/users",
+                timeout=10,
+                params={'search': username}
             )
             
             if response.status_code == 200:
@@ -330,41 +738,29 @@ class WordPressAPIClient:
             }
     
     def test_wordpress_urls(self):
-        """Test belangrijke WordPress URLs"""
+        """
+        Test de WordPress endpoints uit WORDPRESS_PROBE_ENDPOINTS tegelijk,
+        binnen WORDPRESS_PROBE_DEADLINE (en het resterende request budget).
+        Per endpoint: status en DNS/connect/TLS/TTFB tijden.
+        """
         try:
             logger.info("Testing WordPress URLs...")
             
-            urls_to_test = [
-                f"{self.base_url}/wp/v2/posts",
-                f"{self.base_url}/wp/v2/users",
-                f"{self.base_url}/jwt-auth/v1/token",
-                self.home_url
-            ]
-            
-            results = []
-            for url in urls_to_test:
-                try:
-                    response = self.session.get(url, timeout=5)
-                    results.append({
-                        'url': url,
-                        'status': response.status_code,
-                        'success': response.status_code == 200
-                    })
-                except Exception as e:
-                    results.append({
-                        'url': url,
-                        'status': 'error',
-                        'success': False,
-                        'error': str(e)
-                    })
+            endpoints = getattr(settings, 'WORDPRESS_PROBE_ENDPOINTS', [])
+            deadline = getattr(settings, 'WORDPRESS_PROBE_DEADLINE', 5.0)
+            if self.deadline:
+                deadline = min(deadline, self.deadline.remaining())
+            results, elapsed_ms = probe_endpoints(endpoints, self.base_url, self.home_url, deadline)
             
             successful_urls = [r for r in results if r['success']]
-            logger.info(f"✅ URL test completed: {len(successful_urls)}/{len(results)} successful")
+            logger.info(f"✅ URL test completed: {len(successful_urls)}/{len(results)} successful in {elapsed_ms} ms")
             
             return {
                 'success': True,
-                'total_urls': len(urls_to_test),
+                'total_urls': len(results),
                 'successful_urls': len(successful_urls),
+                'elapsed_ms': elapsed_ms,
+                'deadline_ms': round(deadline * 1000, 2),
                 'results': results,
                 'version': 'V13'
             }
@@ -0,0 +1,170 @@
+"""
+WORDPRESS_PROBE.PY - V13
+========================
+
+Diagnose van de WordPress endpoints (api/wordpress-test?full=1)
+Alle endpoints uit WORDPRESS_PROBE_ENDPOINTS worden tegelijk getest op
+een begrensde pool, binnen één totale deadline (WORDPRESS_PROBE_DEADLINE,
+nooit langer dan het budget van de inkomende request).
+
+Elke probe opent een eigen verbinding (geen pool, geen retries), zodat
+de fases apart gemeten kunnen worden: DNS, connect, TLS en time to
+first byte. Een probe die de deadline niet haalt, meldt in welke fase
+ze bleef hangen. getaddrinfo kent geen timeout: DNS loopt op een eigen
+resolver pool en de probe wacht er hooguit de resterende deadline op.
+
+Author: MiniMax Agent
+Version: V13
+"""
+
+import http.client
+import logging
+import socket
+import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait as wait_futures
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'KroanWorks-Django-V13/1.0 (probe)'
+DEFAULT_EXPECT = (200,)
+
+_probe_pool = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'WORDPRESS_PROBE_CONCURRENCY', 4), thread_name_prefix='wp-probe'
+)
+
+# Eigen pool: een hangende lookup houdt geen probe thread bezet (en de
+# probe pool kan niet op zichzelf wachten)
+_resolver_pool = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'WORDPRESS_PROBE_CONCURRENCY', 4), thread_name_prefix='wp-probe-dns'
+)
+
+
+class ProbeTimeout(Exception):
+    """De totale deadline is op voor deze fase kon starten"""
+
+
+def _remaining(expires_at):
+    remaining = expires_at - time.monotonic()
+    if remaining <= 0:
+        raise ProbeTimeout('Probe deadline exceeded')
+    return remaining
+
+
+def _ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def endpoint_url(endpoint, base_url, home_url):
+    """Volledige URL: 'url' (met {home}/{api}) of 'path' relatief aan de API"""
+    if endpoint.get('url'):
+        return endpoint['url'].format(home=home_url.rstrip('/'), api=base_url.rstrip('/'))
+    return base_url.rstrip('/') + endpoint['path']
+
+
+def resolve(host, port, expires_at):
+    """getaddrinfo begrensd door de deadline; ProbeTimeout als die eerst op is"""
+    lookup = _resolver_pool.submit(socket.getaddrinfo, host, port, type=socket.SOCK_STREAM)
+    try:
+        return lookup.result(timeout=_remaining(expires_at))[0]
+    except FutureTimeout:
+        lookup.cancel()
+        raise ProbeTimeout('Probe deadline exceeded during DNS lookup')
+
+
+def probe(url, method, expect, expires_at, result):
+    """
+    Eén endpoint testen; vult result ter plaatse aan, zodat de aanroeper
+    bij een timeout de fase en de tijden tot dan toe kan rapporteren.
+    """
+    parts = urlsplit(url)
+    https = parts.scheme == 'https'
+    host = parts.hostname
+    port = parts.port or (443 if https else 80)
+    target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+    timings = result['timings']
+    started = time.perf_counter()
+    sock = None
+    try:
+        result['phase'] = 'dns'
+        phase_started = time.perf_counter()
+        family, socktype, proto, _, address = resolve(host, port, expires_at)
+        timings['dns_ms'] = _ms(phase_started)
+        result['address'] = address[0]
+
+        result['phase'] = 'connect'
+        phase_started = time.perf_counter()
+        sock = socket.socket(family, socktype, proto)
+        sock.settimeout(_remaining(expires_at))
+        sock.connect(address)
+        timings['connect_ms'] = _ms(phase_started)
+
+        if https:
+            result['phase'] = 'tls'
+            phase_started = time.perf_counter()
+            sock.settimeout(_remaining(expires_at))
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+            timings['tls_ms'] = _ms(phase_started)
+            result['tls_version'] = sock.version()
+
+        result['phase'] = 'ttfb'
+        phase_started = time.perf_counter()
+        sock.settimeout(_remaining(expires_at))
+        connection = (http.client.HTTPSConnection if https else http.client.HTTPConnection)(host, port)
+        connection.sock = sock  # verbinding staat al open, connect() wordt overgeslagen
+        connection.request(method, target, headers={
+            'User-Agent': USER_AGENT, 'Accept': 'application/json', 'Connection': 'close',
+        })
+        response = connection.getresponse()
+        timings['ttfb_ms'] = _ms(phase_started)
+
+        result['status'] = response.status
+        result['success'] = response.status in expect
+        result['phase'] = 'done'
+    except (OSError, ProbeTimeout, http.client.HTTPException) as e:
+        result['status'] = 'error'
+        result['success'] = False
+        result['error'] = f'{result["phase"]}: {e.__class__.__name__}: {e}'
+    finally:
+        if sock is not None:
+            sock.close()
+        timings['total_ms'] = _ms(started)
+    return result
+
+
+def probe_endpoints(endpoints, base_url, home_url, deadline):
+    """Alle endpoints tegelijk testen; resultaten in de volgorde van endpoints"""
+    expires_at = time.monotonic() + deadline
+    started = time.perf_counter()
+    results, futures = [], []
+    for endpoint in endpoints:
+        url = endpoint_url(endpoint, base_url, home_url)
+        result = {
+            'name': endpoint.get('name', url),
+            'url': url,
+            'status': None,
+            'success': False,
+            'phase': 'queued',
+            'timings': {},
+        }
+        results.append(result)
+        futures.append(_probe_pool.submit(
+            probe, url, endpoint.get('method', 'GET').upper(), tuple(endpoint.get('expect', DEFAULT_EXPECT)),
+            expires_at, result,
+        ))
+
+    done, _ = wait_futures(futures, timeout=deadline)
+    report = []
+    for future, result in zip(futures, results):
+        if future in done:
+            report.append(result)
+            continue
+        # Nog bezig: momentopname rapporteren
+        future.cancel()
+        snapshot = dict(result, timings=dict(result['timings']))
+        snapshot.update({'status': 'timeout', 'success': False, 'error': f'{result["phase"]}: deadline of {deadline:.1f}s exceeded'})
+        report.append(snapshot)
+    return report, _ms(started)
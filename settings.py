@@ -9,6 +9,7 @@ Author: MiniMax Agent
 Version: V13
 """
 
+import json
 import os
 from pathlib import Path
 
@@ -55,6 +56,10 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware - MUST BE FIRST
     'django.middleware.security.SecurityMiddleware',
+    'rental_system.static_assets.StaticAssetMiddleware',  # Hashed + precompressed static files
+    'rental_system.compression.JSONCompressionMiddleware',  # gzip/br/zstd for JSON API responses
+    'rental_system.profiling.ProfilingMiddleware',  # Opt-in profiling (signed token / sampling)
+    'rental_system.db_router.ReplicaPinMiddleware',  # Read-your-writes when DATABASE_REPLICAS is set
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -93,6 +98,19 @@ DATABASES = {
     }
 }
 
+# Read replicas (rental_system/db_router.py): JSON list of overrides on 'default', one per replica, e.g.
+# DATABASE_REPLICAS='[{"NAME": "/data/replica1.sqlite3"}]' or '[{"HOST": "replica-1.internal"}]'
+DATABASE_REPLICAS = []
+try:
+    for _index, _override in enumerate(json.loads(os.environ.get('DATABASE_REPLICAS', '[]')), start=1):
+        DATABASES[f'replica{_index}'] = {**DATABASES['default'], **_override, 'TEST': {'MIRROR': 'default'}}
+        DATABASE_REPLICAS.append(f'replica{_index}')
+except (TypeError, ValueError):
+    DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['rental_system.db_router.ReadReplicaRouter']
+DATABASE_REPLICA_APPS = ['rental_system']  # reads of these apps go to a replica
+DATABASE_REPLICA_PIN_SECONDS = int(os.environ.get('DATABASE_REPLICA_PIN_SECONDS', '5'))  # read-your-writes window
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -122,6 +140,24 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# collectstatic pipeline: content-hashed names + .gz/.br variants.
+# Requires `python manage.py collectstatic --noinput` in the build step.
+STATIC_ASSET_PIPELINE = os.environ.get('STATIC_ASSET_PIPELINE', 'False').lower() in ['true', 'on', '1']
+STATIC_COMPRESS_MIN_SIZE = int(os.environ.get('STATIC_COMPRESS_MIN_SIZE', '256'))
+STATIC_ASSETS_SERVE = os.environ.get('STATIC_ASSETS_SERVE', str(not DEBUG)).lower() in ['true', 'on', '1']
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'rental_system.static_assets.CompressedManifestStaticFilesStorage'
+            if STATIC_ASSET_PIPELINE else
+            'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -135,6 +171,11 @@ CORS_ALLOWED_ORIGINS = [
     'https://test.kroanworks.be',
     'https://roentgenologic-cormous-oscar.ngrok-free.dev',
 ]
+try:
+    from corsheaders.defaults import default_headers
+    CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+except ImportError:
+    pass
 
 # Logging Configuration
 LOGGING = {
@@ -187,6 +228,20 @@ WORDPRESS_JWT_USERNAME = os.environ.get('WORDPRESS_JWT_USERNAME', 'Luc_Snel')
 WORDPRESS_JWT_PASSWORD = os.environ.get('WORDPRESS_JWT_PASSWORD', 'Mozart-480111')
 WORDPRESS_HOME_URL = os.environ.get('WORDPRESS_HOME_URL', 'https://test.kroanworks.be/home')
 
+# Single-flight for identical WordPress GETs (cross-process via CACHES['default'])
+WORDPRESS_SINGLEFLIGHT_CROSS_PROCESS = os.environ.get('WORDPRESS_SINGLEFLIGHT_CROSS_PROCESS', 'False').lower() in ['true', 'on', '1']
+WORDPRESS_SINGLEFLIGHT_RESULT_TTL = int(os.environ.get('WORDPRESS_SINGLEFLIGHT_RESULT_TTL', '2'))
+WORDPRESS_SINGLEFLIGHT_WAIT = int(os.environ.get('WORDPRESS_SINGLEFLIGHT_WAIT', '5'))
+
+# WordPress request budget, retries and hedging
+WORDPRESS_REQUEST_BUDGET = float(os.environ.get('WORDPRESS_REQUEST_BUDGET', '8.0'))  # seconds per incoming request
+WORDPRESS_MAX_RETRIES = int(os.environ.get('WORDPRESS_MAX_RETRIES', '2'))  # idempotent calls only
+WORDPRESS_RETRY_BACKOFF = float(os.environ.get('WORDPRESS_RETRY_BACKOFF', '0.1'))
+WORDPRESS_RETRY_BACKOFF_MAX = float(os.environ.get('WORDPRESS_RETRY_BACKOFF_MAX', '1.0'))
+WORDPRESS_HEDGE_ENABLED = os.environ.get('WORDPRESS_HEDGE_ENABLED', 'False').lower() in ['true', 'on', '1']
+WORDPRESS_HEDGE_MIN_SAMPLES = int(os.environ.get('WORDPRESS_HEDGE_MIN_SAMPLES', '20'))
+WORDPRESS_HEDGE_MAX_RATIO = float(os.environ.get('WORDPRESS_HEDGE_MAX_RATIO', '0.1'))
+
 # Rental System Settings
 EXTRA_KM_TARIFF = float(os.environ.get('EXTRA_KM_TARIFF', '0.30'))
 VOORSCHOT_PERCENTAGE = int(os.environ.get('VOORSCHOT_PERCENTAGE', '30'))
@@ -200,6 +255,110 @@ try:
 except:
     VOORBEHOUDEN_DAGEN = ['2025-12-25', '2025-12-26']
 
+# Compiled blackout calendar window (VOORBEHOUDEN_DAGEN + BlackoutRule, see rental_system/blackouts.py)
+BLACKOUT_HORIZON_DAYS_BACK = int(os.environ.get('BLACKOUT_HORIZON_DAYS_BACK', '366'))
+BLACKOUT_HORIZON_DAYS_AHEAD = int(os.environ.get('BLACKOUT_HORIZON_DAYS_AHEAD', '1098'))
+
+# Rate limiting (per IP / username, sliding window in CACHES['default'])
+# Needs a shared cache (REDIS_URL or CACHE_BACKEND=database): with LocMemCache every
+# worker counts on its own and N workers allow N x the configured rate
+RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'True').lower() in ['true', 'on', '1']
+RATELIMIT_TRUST_FORWARDED_FOR = os.environ.get('RATELIMIT_TRUST_FORWARDED_FOR', 'False').lower() in ['true', 'on', '1']  # True on Render (proxy)
+RATELIMIT_RATES = {
+    'login': os.environ.get('RATELIMIT_LOGIN', '10/m'),
+    'reservation': os.environ.get('RATELIMIT_RESERVATION', '20/m'),
+    'bulk_reservation': os.environ.get('RATELIMIT_BULK_RESERVATION', '5/m'),
+    'wordpress_test': os.environ.get('RATELIMIT_WORDPRESS_TEST', '6/m'),
+}
+
+# Worker warm-up (see rental_system/warmup.py and gunicorn.conf.py)
+WARMUP_ENABLED = os.environ.get('WARMUP_ENABLED', 'False').lower() in ['true', 'on', '1']
+WARMUP_PREFETCH_MONTHS = int(os.environ.get('WARMUP_PREFETCH_MONTHS', '2'))
+WORDPRESS_POOL_MAXSIZE = int(os.environ.get('WORDPRESS_POOL_MAXSIZE', '10'))
+
+# Month-bucketed availability cache with prefetch of the next months
+AVAILABILITY_CACHE_TIMEOUT = int(os.environ.get('AVAILABILITY_CACHE_TIMEOUT', '3600'))
+AVAILABILITY_PREFETCH_MONTHS = int(os.environ.get('AVAILABILITY_PREFETCH_MONTHS', '2'))
+
+# In-process quote cache for api_calculate_price (see rental_system/quotes.py)
+QUOTE_CACHE_SIZE = int(os.environ.get('QUOTE_CACHE_SIZE', '1024'))
+QUOTE_CACHE_TTL = int(os.environ.get('QUOTE_CACHE_TTL', '600'))  # seconds
+
+# Analytics API (closed periods are cached without timeout)
+ANALYTICS_CACHE_TIMEOUT = int(os.environ.get('ANALYTICS_CACHE_TIMEOUT', '300'))  # open periods
+ANALYTICS_CLOSED_CACHE_TIMEOUT = int(os.environ.get('ANALYTICS_CLOSED_CACHE_TIMEOUT', '86400'))  # closed periods
+ANALYTICS_MAX_PERIODS = int(os.environ.get('ANALYTICS_MAX_PERIODS', '60'))
+
+# On-demand request profiling (see rental_system/profiling.py, manage.py profiling_token)
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False').lower() in ['true', 'on', '1']
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0.0'))  # 0.0 - 1.0 of all requests
+PROFILING_TOKEN_MAX_AGE = int(os.environ.get('PROFILING_TOKEN_MAX_AGE', '3600'))  # seconds
+PROFILING_DIR = os.environ.get('PROFILING_DIR', str(BASE_DIR / 'profiles'))
+PROFILING_SAMPLE_INTERVAL = float(os.environ.get('PROFILING_SAMPLE_INTERVAL', '0.005'))  # seconds
+PROFILING_CPROFILE = os.environ.get('PROFILING_CPROFILE', 'True').lower() in ['true', 'on', '1']
+PROFILING_MAX_PROFILES = int(os.environ.get('PROFILING_MAX_PROFILES', '200'))
+PROFILING_MAX_AGE = int(os.environ.get('PROFILING_MAX_AGE', str(7 * 24 * 3600)))  # seconds
+
+# Idempotency-Key support for create-reservation (see rental_system/idempotency.py)
+IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', str(24 * 3600)))  # seconds a response is replayed
+IDEMPOTENCY_WAIT_TIMEOUT = float(os.environ.get('IDEMPOTENCY_WAIT_TIMEOUT', '10'))  # duplicates wait this long
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.environ.get('IDEMPOTENCY_LOCK_TIMEOUT', '60'))  # in-progress record considered abandoned
+
+# Bulk reservations (api/create-reservations), forwarded to WordPress /batch/v1
+BULK_RESERVATION_MAX_ITEMS = int(os.environ.get('BULK_RESERVATION_MAX_ITEMS', '100'))
+WORDPRESS_BATCH_SIZE = int(os.environ.get('WORDPRESS_BATCH_SIZE', '25'))  # WordPress core max is 25
+
+# WordPress diagnostics (api/wordpress-test?full=1, see rental_system/wordpress_probe.py)
+# 'path' is relative to WORDPRESS_API_URL, 'url' may use {home} and {api}; 'expect' lists healthy statuses
+WORDPRESS_PROBE_ENDPOINTS = [
+    {'name': 'posts', 'path': '/wp/v2/posts?per_page=1'},
+    {'name': 'users', 'path': '/wp/v2/users?per_page=1'},
+    {'name': 'jwt', 'path': '/jwt-auth/v1'},
+    {'name': 'reservations', 'path': '/wp/v2/reservations?per_page=1', 'expect': [200, 401]},
+    {'name': 'media', 'path': '/wp/v2/media?per_page=1'},
+    {'name': 'home', 'url': '{home}'},
+]
+try:
+    WORDPRESS_PROBE_ENDPOINTS += json.loads(os.environ.get('WORDPRESS_PROBE_EXTRA_ENDPOINTS', '[]'))
+except (TypeError, ValueError):
+    pass
+WORDPRESS_PROBE_DEADLINE = float(os.environ.get('WORDPRESS_PROBE_DEADLINE', '5.0'))  # seconds for all probes together
+WORDPRESS_PROBE_CONCURRENCY = int(os.environ.get('WORDPRESS_PROBE_CONCURRENCY', '4'))
+
+# Back office rentals listing (api/rentals, keyset pagination + NDJSON export)
+RENTALS_PAGE_SIZE = int(os.environ.get('RENTALS_PAGE_SIZE', '50'))
+RENTALS_PAGE_MAX = int(os.environ.get('RENTALS_PAGE_MAX', '200'))
+RENTALS_EXPORT_CHUNK = int(os.environ.get('RENTALS_EXPORT_CHUNK', '1000'))
+
+# Background tasks in the database (rental_system/taskqueue.py, worker: manage.py run_tasks)
+TASKS_EAGER = os.environ.get('TASKS_EAGER', 'False').lower() in ['true', 'on', '1']  # run in-process after commit, no worker
+TASKS_MAX_ATTEMPTS = int(os.environ.get('TASKS_MAX_ATTEMPTS', '5'))
+TASKS_RETRY_BACKOFF = float(os.environ.get('TASKS_RETRY_BACKOFF', '10'))  # seconds, doubled per attempt
+TASKS_RETRY_BACKOFF_MAX = float(os.environ.get('TASKS_RETRY_BACKOFF_MAX', '3600'))
+TASKS_LOCK_TIMEOUT = int(os.environ.get('TASKS_LOCK_TIMEOUT', '600'))  # running longer = crashed worker, requeue
+TASKS_KEEP_FINISHED = int(os.environ.get('TASKS_KEEP_FINISHED', str(7 * 24 * 3600)))
+TASKS_WORDPRESS_SYNC = os.environ.get('TASKS_WORDPRESS_SYNC', 'False').lower() in ['true', 'on', '1']  # reservations -> WordPress off-request
+RESERVATION_NOTIFICATIONS = os.environ.get('RESERVATION_NOTIFICATIONS', 'True').lower() in ['true', 'on', '1']
+
+# Cache versions (rental_system/cache_versions.py): counters live in the database,
+# each process keeps a read version at most this many seconds (0 = read every lookup)
+CACHE_VERSION_TTL = float(os.environ.get('CACHE_VERSION_TTL', '1.0'))
+
+# Calendar page cache (per audience, invalidated on formula/availability changes)
+CALENDAR_PAGE_CACHE_TIMEOUT = int(os.environ.get('CALENDAR_PAGE_CACHE_TIMEOUT', '300'))
+WORDPRESS_STATUS_CACHE_TIMEOUT = int(os.environ.get('WORDPRESS_STATUS_CACHE_TIMEOUT', '30'))
+
+# JSON API response compression
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))  # bytes
+COMPRESSION_ENCODINGS = ['br', 'zstd', 'gzip']  # preference; br/zstd only when installed
+
+# ICS feed Settings
+ICAL_CACHE_TIMEOUT = int(os.environ.get('ICAL_CACHE_TIMEOUT', '3600'))
+ICAL_MAX_RANGE_DAYS = int(os.environ.get('ICAL_MAX_RANGE_DAYS', '1096'))
+
+# Fleet availability matrix
+AVAILABILITY_MATRIX_MAX_DAYS = int(os.environ.get('AVAILABILITY_MATRIX_MAX_DAYS', '400'))
+
 # Calendar Settings
 CALENDAR_HEIGHT = os.environ.get('CALENDAR_HEIGHT', '700px')
 CALENDAR_WIDTH = os.environ.get('CALENDAR_WIDTH', '100%')
@@ -243,13 +402,33 @@ CSRF_TRUSTED_ORIGINS = [
 # ngrok public URL for reference
 NGROK_PUBLIC_URL = 'https://roentgenologic-cormous-oscar.ngrok-free.dev'
 
-# Cache Settings (optional)
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# Cache Settings
+# Rate limits and cached pages/buckets should be shared by all workers:
+# REDIS_URL (needs the redis package) or CACHE_BACKEND=database (run
+# `python manage.py createcachetable` once). Default: LocMemCache per process.
+REDIS_URL = os.environ.get('REDIS_URL', '')
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'redis' if REDIS_URL else 'locmem').lower()
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+elif CACHE_BACKEND == 'database':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'rental_system_cache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+        }
     }
-}
 
 # ========================================
 # WORDPRESS API HELPER FUNCTIONS